@@ -1,19 +1,56 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory
+# The server runs on eventlet: patch blocking I/O, sleeps and threading
+# before anything else is imported, so a request waiting on Gemini, an
+# image job or the batch pool yields to other clients instead of stalling
+# the whole event loop. Only when run as the server; importers such as the
+# benchmarks keep real threads.
+if __name__ == '__main__':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory, g, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_socketio import SocketIO, emit, join_room
 from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3
+import hmac
+import importlib.machinery
+import ipaddress
 import json
 import os
+import sqlite3
+import sys
 from datetime import datetime
 import uuid
 from dotenv import load_dotenv
-import requests
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.decorators import admin_required
-from diffusers import StableDiffusionPipeline
-import torch
+from utils.db import DATABASE_PATH, close_db, get_db, init_schema, open_connections, query_latency, transaction
+from utils.pagination import (
+    InvalidCursorError, decode_cursor, encode_cursor, keyset_page_sql, parse_limit, split_page
+)
+from utils.search import (
+    PROMPT_WEIGHT, TWEET_WEIGHT, build_match_query, highlight_sql, render_highlight
+)
+from utils.user_stats import (
+    read_user_stats, record_content_created, record_content_deleted, record_content_published
+)
+from utils.user_cache import UserCache
+from utils.pipeline_cache import PipelineCache
+from utils.image_backend import DEFAULT_PRESET, PREVIEW_PRESET, QUALITY_PRESETS, LocalDiffusionBackend
+from utils.image_workers import ProcessImageBackend
+from utils.image_jobs import ImageJobQueue, QueueFullError
+from utils.admission import AdmissionController
+from utils.batching import MicroBatcher
+from utils.tweet_cache import TweetCache
+from utils.gemini_client import GeminiClient, extract_texts
+from utils.circuit_breaker import CircuitBreaker
+from utils.realtime import EventCoalescer
+from utils.socketio_queue import SQLiteManager
+from utils.leader import LeaderLease
+from utils.training_log import TrainingLog
+from utils.health import HealthCollector
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
 
 # Load environment variables
 load_dotenv()
@@ -26,8 +63,88 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Initialize SocketIO. With several web workers, emits are relayed between
+# them through SOCKETIO_MESSAGE_QUEUE: a redis:// or amqp:// URL, or
+# sqlite:///path for a broker-less queue shared by workers on one host
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+socketio_options = {}
+if SOCKETIO_MESSAGE_QUEUE and SOCKETIO_MESSAGE_QUEUE.startswith('sqlite:///'):
+    socketio_options['client_manager'] = SQLiteManager(SOCKETIO_MESSAGE_QUEUE)
+elif SOCKETIO_MESSAGE_QUEUE:
+    socketio_options['message_queue'] = SOCKETIO_MESSAGE_QUEUE
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_options)
+
+# Name of this web worker; keep it stable across restarts of the same worker
+WORKER_ID = os.getenv('WORKER_ID', 'main')
+
+# Admin-feed events are buffered and sent as one 'admin_events' message per
+# interval; set ADMIN_EVENT_INTERVAL=0 to send each event as it happens
+ADMIN_EVENT_INTERVAL = float(os.getenv('ADMIN_EVENT_INTERVAL', '0.5'))
+admin_feed = EventCoalescer(
+    lambda events: socketio.emit('admin_events', {'events': events}, room='admin'),
+    interval=ADMIN_EVENT_INTERVAL
+) if ADMIN_EVENT_INTERVAL > 0 else None
+
+def notify(event, data, user_id=None):
+    """Send a real-time event to the admin room and, if given, the user it concerns"""
+    if user_id is not None:
+        socketio.emit(event, data, room=f'user_{user_id}')
+    if admin_feed:
+        admin_feed.publish(event, data)
+    else:
+        socketio.emit(event, data, room='admin')
+
+# Request and pipeline-stage instrumentation, exposed at /metrics
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests', ('endpoint', 'method')
+)
+REQUESTS_TOTAL = metrics.counter(
+    'http_requests_total', 'HTTP requests by endpoint and status', ('endpoint', 'method', 'status')
+)
+STAGE_SECONDS = metrics.histogram(
+    'generation_stage_duration_seconds', 'Time spent in each content generation stage', ('stage',)
+)
+GEMINI_REQUESTS = metrics.counter('gemini_requests_total', 'Gemini API calls by outcome', ('outcome',))
+
+# Scrapers authenticate with a bearer token or by address. Loopback is not
+# trusted by default: behind a same-host reverse proxy every request is local.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOW_IPS = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv('METRICS_ALLOW_IPS', '').split(',') if entry.strip()
+]
+
+def metrics_access_allowed():
+    """Admin session, matching METRICS_TOKEN or an address in METRICS_ALLOW_IPS"""
+    if current_user.is_authenticated and current_user.is_admin:
+        return True
+    auth = request.headers.get('Authorization', '')
+    if METRICS_TOKEN and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], METRICS_TOKEN):
+        return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOW_IPS)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        REQUESTS_TOTAL.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """Hand this request's SQLite connection back to the pool"""
+    close_db()
 
 # User class for Flask-Login
 class User(UserMixin):
@@ -37,117 +154,261 @@ class User(UserMixin):
         self.email = email
         self.is_admin = is_admin
 
+def fetch_user_row(user_id):
+    cursor = get_db().cursor()
+    cursor.execute('SELECT id, username, email, is_admin FROM users WHERE id = ?', (user_id,))
+    return cursor.fetchone()
+
+# Users resolved by Flask-Login on every request, cached in front of SQLite
+user_cache = UserCache(
+    fetch_user_row,
+    max_size=int(os.getenv('USER_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('USER_CACHE_TTL', '60'))
+)
+
 @login_manager.user_loader
 def load_user(user_id):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user_data = cursor.fetchone()
-    conn.close()
+    user_data = user_cache.get(user_id)
     
     if user_data:
-        return User(user_data[0], user_data[1], user_data[2], user_data[4])
+        return User(*user_data)
     return None
 
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('database.db')
+    conn = get_db()
     cursor = conn.cursor()
     
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_admin BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Generated content table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS generated_content (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            prompt TEXT NOT NULL,
-            generated_tweet TEXT NOT NULL,
-            image_url TEXT,
-            is_posted BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+    # Create any missing tables
+    init_schema(conn)
     
     # Create admin user if not exists
     cursor.execute('SELECT * FROM users WHERE username = ?', ('admin',))
     if not cursor.fetchone():
         admin_hash = generate_password_hash('admin123')
+        # OR IGNORE: another worker starting at the same time may win
         cursor.execute('''
-            INSERT INTO users (username, email, password_hash, is_admin)
+            INSERT OR IGNORE INTO users (username, email, password_hash, is_admin)
             VALUES (?, ?, ?, ?)
         ''', ('admin', 'admin@example.com', admin_hash, True))
     
     conn.commit()
-    conn.close()
+    user_cache.clear()
+
+# Shared Stable Diffusion pipelines, loaded once per process
+IMAGE_MODEL_ID = "SG161222/Realistic_Vision_V5.1_noVAE"
+PIPELINE_CACHE_SETTINGS = {
+    'max_entries': int(os.getenv('PIPELINE_CACHE_SIZE', '1')),
+    'idle_timeout': int(os.getenv('PIPELINE_IDLE_TIMEOUT', '1800')),
+    'memory_budget_mb': int(os.getenv('PIPELINE_MEMORY_BUDGET_MB', '0')) or None
+}
+pipeline_cache = PipelineCache(**PIPELINE_CACHE_SETTINGS)
+
+# Diffusion runs in separate worker processes unless IMAGE_WORKER_PROCESSES=0;
+# either way torch/diffusers are only imported on the first image request
+IMAGE_WORKER_PROCESSES = int(os.getenv('IMAGE_WORKER_PROCESSES', '1'))
+IMAGE_TORCH_THREADS = int(os.getenv('IMAGE_TORCH_THREADS', '0')) or None
+if IMAGE_WORKER_PROCESSES > 0:
+    image_backend = ProcessImageBackend(
+        IMAGE_MODEL_ID,
+        processes=IMAGE_WORKER_PROCESSES,
+        torch_threads=IMAGE_TORCH_THREADS,
+        cache_settings=PIPELINE_CACHE_SETTINGS
+    )
+else:
+    image_backend = LocalDiffusionBackend(IMAGE_MODEL_ID, pipeline_cache, torch_threads=IMAGE_TORCH_THREADS)
+
+# Quality preset used when a request does not pick one, and whether images
+# start with a quick preview that the full image then replaces
+IMAGE_QUALITY = os.getenv('IMAGE_QUALITY', DEFAULT_PRESET)
+IMAGE_PREVIEW_FIRST = os.getenv('IMAGE_PREVIEW_FIRST', 'false').lower() == 'true'
 
 # AI API functions
-from tenacity import retry, stop_after_attempt, wait_fixed
 import logging
 logging.basicConfig(level=logging.ERROR, format='[%(levelname)s] %(message)s')
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def generate_tweet_with_ai(prompt):
+GEMINI_MODEL = "gemini-2.0-flash"
+TWEET_PROMPT_TEMPLATE = (
+    "Write a professional, engaging tweet (max 120 characters) "
+    "about: '{prompt}'. Use emojis, relevant hashtags, and keep it concise and catchy."
+)
+TWEET_SETTINGS = {'model': GEMINI_MODEL, 'template': TWEET_PROMPT_TEMPLATE}
+
+# Cache of generated tweets, keyed by normalized prompt + generation settings
+tweet_cache = TweetCache(
+    max_size=int(os.getenv('TWEET_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('TWEET_CACHE_TTL', '3600')),
+    persist=os.getenv('TWEET_CACHE_PERSIST', 'false').lower() == 'true'
+)
+
+# Measured latencies and resource usage for the admin health feed
+health = HealthCollector(db_latency=query_latency, database_path=DATABASE_PATH)
+
+# One pooled, keep-alive Gemini client shared by all requests
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+def get_gemini_client(api_key):
+    """Return the shared Gemini client, creating it on first use"""
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None or _gemini_client.api_key != api_key:
+            _gemini_client = GeminiClient(
+                api_key,
+                model=GEMINI_MODEL,
+                base_url=os.getenv('GEMINI_API_BASE'),
+                max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+                read_timeout=float(os.getenv('GEMINI_TIMEOUT', '10')),
+                max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '2'))
+            )
+        return _gemini_client
+
+# Skips Gemini entirely while it is failing or slow, so requests fall back
+# to mock tweets at once instead of waiting out timeouts
+gemini_breaker = CircuitBreaker(
+    'gemini',
+    window_size=int(os.getenv('GEMINI_BREAKER_WINDOW', '20')),
+    min_calls=int(os.getenv('GEMINI_BREAKER_MIN_CALLS', '5')),
+    failure_threshold=float(os.getenv('GEMINI_BREAKER_FAILURE_RATE', '0.5')),
+    slow_call_seconds=float(os.getenv('GEMINI_BREAKER_SLOW_SECONDS', '4')),
+    slow_call_threshold=float(os.getenv('GEMINI_BREAKER_SLOW_RATE', '0.5')),
+    open_seconds=float(os.getenv('GEMINI_BREAKER_OPEN_SECONDS', '30'))
+)
+metrics.gauge(
+    'gemini_circuit_open', 'Gemini circuit breaker state (0 closed, 0.5 half-open, 1 open)',
+    callback=lambda: {'closed': 0, 'half_open': 0.5, 'open': 1}[gemini_breaker.state]
+)
+
+# Most a single request will wait for Gemini before using the fallback
+TWEET_LATENCY_BUDGET = float(os.getenv('TWEET_LATENCY_BUDGET', '5'))
+
+def tweet_timeout(deadline=None):
+    """Gemini timeout for a request: its latency budget, capped by the request deadline"""
+    if deadline is None:
+        return TWEET_LATENCY_BUDGET
+    return max(0.1, min(TWEET_LATENCY_BUDGET, deadline - time.monotonic()))
+
+def record_gemini_call(seconds, ok):
+    health.gemini.record(seconds, ok=ok)
+    gemini_breaker.record(seconds, ok=ok)
+    GEMINI_REQUESTS.inc(outcome='success' if ok else 'error')
+
+def request_tweets_from_gemini(prompt, api_key, count=1, timeout=None):
+    """Call the Gemini API once for up to count candidate tweets; returns [] on failure"""
+    if not gemini_breaker.allow():
+        GEMINI_REQUESTS.inc(outcome='short_circuited')
+        return []
+    
+    started = time.perf_counter()
+    try:
+        result = get_gemini_client(api_key).generate_content(
+            TWEET_PROMPT_TEMPLATE.format(prompt=prompt),
+            generation_config={'candidateCount': count} if count > 1 else None,
+            timeout=timeout
+        )
+
+        logging.debug("Gemini API response: %s", result)
+
+        texts = extract_texts(result)
+
+        if texts:
+            record_gemini_call(time.perf_counter() - started, ok=True)
+            return texts
+        else:
+            print("[WARNING] Gemini API returned empty or invalid text.")
+
+    except Exception as e:
+        logging.exception("[Gemini fallback] Error during tweet generation")
+        print("[ERROR] Gemini exception:", e)
+
+    record_gemini_call(time.perf_counter() - started, ok=False)
+    return []
+
+def request_tweet_from_gemini(prompt, api_key, timeout=None):
+    """Call the Gemini API once; returns the tweet text or None on failure"""
+    texts = request_tweets_from_gemini(prompt, api_key, timeout=timeout)
+    return texts[0] if texts else None
+
+def generate_tweet_with_ai(prompt, timeout=None):
     """
     Generate a short, creative tweet using the Gemini 2.0 Flash API.
-    Falls back to mock tweets on failure.
+    Results are cached per prompt; falls back to mock tweets on failure,
+    timeout or while the Gemini circuit breaker is open.
     """
     api_key = os.getenv('TWEET_API_KEY')
     if not api_key:
         print("[ERROR] TWEET_API_KEY not found in environment.")
         return "❌ API key missing! Please check your environment setup."
 
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-    headers = {
-        'Content-Type': 'application/json',
-        'X-goog-api-key': api_key
-    }
+    text = tweet_cache.get_or_generate(
+        prompt, TWEET_SETTINGS, lambda: request_tweet_from_gemini(prompt, api_key, timeout)
+    )
+    if text:
+        return text
 
-    payload = {
-        "contents": [
-            {
-                "parts": [
-                    {
-                        "text": (
-                            f"Write a professional, engaging tweet (max 120 characters) "
-                            f"about: '{prompt}'. Use emojis, relevant hashtags, and keep it concise and catchy."
-                        )
-                    }
-                ]
-            }
-        ]
-    }
+    return fallback_tweet(prompt)
 
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        result = response.json()
+def generate_tweet_candidates(prompt, count=1, timeout=None):
+    """
+    Up to count distinct tweets for a prompt, all from a single Gemini call.
+    A single tweet goes through the cache; falls back to one mock tweet.
+    """
+    api_key = os.getenv('TWEET_API_KEY')
+    if count <= 1 or not api_key:
+        return [generate_tweet_with_ai(prompt, timeout)]
 
-        logging.debug("Gemini API response: %s", result)
+    texts = request_tweets_from_gemini(prompt, api_key, count, timeout)
+    if texts:
+        return list(dict.fromkeys(texts))
+    return [fallback_tweet(prompt)]
 
-        text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '').strip()
+def stream_tweet_with_ai(prompt, timeout=None):
+    """
+    Yield ('token', text) pieces as Gemini streams the tweet. If the stream
+    fails part-way, yields ('replace', tweet) with the fallback tweet, so the
+    final tweet is always the joined tokens or the last replacement.
+    """
+    api_key = os.getenv('TWEET_API_KEY')
+    if not api_key:
+        print("[ERROR] TWEET_API_KEY not found in environment.")
+        yield 'replace', "❌ API key missing! Please check your environment setup."
+        return
 
-        if text:
-            return text
-        else:
-            print("[WARNING] Gemini API returned empty or invalid text.")
+    cached = tweet_cache.lookup(prompt, TWEET_SETTINGS)
+    if cached:
+        yield 'replace', cached
+        return
+
+    if not gemini_breaker.allow():
+        GEMINI_REQUESTS.inc(outcome='short_circuited')
+        yield 'replace', fallback_tweet(prompt)
+        return
 
+    pieces = []
+    text = ''
+    started = time.perf_counter()
+    try:
+        client = get_gemini_client(api_key)
+        for piece in client.stream_text(TWEET_PROMPT_TEMPLATE.format(prompt=prompt), timeout=timeout):
+            if not pieces:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage='tweet_first_token')
+            pieces.append(piece)
+            yield 'token', piece
+        text = ''.join(pieces).strip()
     except Exception as e:
-        logging.exception("[Gemini fallback] Error during tweet generation")
-        print("[ERROR] Gemini exception:", e)
+        print("[ERROR] Gemini streaming exception:", e)
+    finally:
+        # Also runs if the client disconnects mid-stream; a stream that was
+        # producing text counts as a healthy call
+        record_gemini_call(time.perf_counter() - started, ok=bool(text or pieces))
 
-    # Fallback mock tweets
+    if text:
+        tweet_cache.store(prompt, TWEET_SETTINGS, text)
+        return
+    yield 'replace', fallback_tweet(prompt)
+
+def fallback_tweet(prompt):
+    """Mock tweet used when Gemini is unavailable"""
     import random
     mock_tweets = [
         f"🚀 Just discovered something amazing about {prompt}! The future is here and it's incredible. #AI #Innovation #Tech",
@@ -166,42 +427,53 @@ def generate_title_from_prompt(prompt):
         clean_title = "generated_image"
     return clean_title
 
-def generate_local_image(prompt):
+def run_image_batch(items):
+    """
+    Render several (prompt, path, preset) items, one diffusion call per
+    preset in the batch since a call shares its settings
+    """
+    print(f"[DEBUG] Running image batch of {len(items)}")
+    by_preset = {}
+    for index, (prompt, path, preset) in enumerate(items):
+        by_preset.setdefault(preset, []).append(index)
+    
+    paths = [None] * len(items)
+    for preset, indexes in by_preset.items():
+        started = time.perf_counter()
+        rendered = image_backend.render(
+            [items[i][0] for i in indexes], [items[i][1] for i in indexes], preset=preset
+        )
+        elapsed = time.perf_counter() - started
+        health.diffusion.record(elapsed)
+        STAGE_SECONDS.observe(elapsed, stage='diffusion_preview' if preset == PREVIEW_PRESET else 'diffusion')
+        for i, path in zip(indexes, rendered):
+            paths[i] = path
+    return paths
+
+# Prompts arriving together are coalesced into a single pipeline call,
+# with one batch in flight per worker process
+image_batcher = MicroBatcher(
+    run_image_batch,
+    max_batch_size=int(os.getenv('IMAGE_BATCH_SIZE', '4')),
+    max_wait=float(os.getenv('IMAGE_BATCH_WAIT', '0.2')),
+    name='image-batcher',
+    concurrency=max(1, IMAGE_WORKER_PROCESSES)
+)
+
+def generate_local_image(prompt, preset=None):
     """Generate image locally using Stable Diffusion Pipeline (from image.py logic)"""
     try:
-        print(f"[DEBUG] Starting local image generation with prompt: {prompt}")
-        
-        # Initialize pipeline on CUDA if available, else CPU
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"[DEBUG] Using device: {device}")
-        
-        pipe = StableDiffusionPipeline.from_pretrained(
-            "SG161222/Realistic_Vision_V5.1_noVAE",
-            dtype=torch.float16 if device == "cuda" else torch.float32,
-            low_cpu_mem_usage=True
-        ).to(device)
-        
-        pipe.enable_attention_slicing()
-        pipe.enable_vae_slicing()
-        
-        if device == "cuda":
-            pipe.vae.to(dtype=torch.float32)
+        preset = preset or IMAGE_QUALITY
+        print(f"[DEBUG] Starting local image generation ({preset}) with prompt: {prompt}")
         
-        # Generate image
-        image = pipe(
-            prompt,
-            height=512,
-            width=512,
-            num_inference_steps=15,  # Faster generation
-            guidance_scale=6.0
-        ).images[0]
-        
-        # Create filename and save
+        # The backend saves the image straight to this path
         title = generate_title_from_prompt(prompt)
         filename = f"{title}_{uuid.uuid4().hex[:8]}.png"
         image_path = os.path.join("generated_images", filename)
         os.makedirs("generated_images", exist_ok=True)
-        image.save(image_path)
+        
+        with STAGE_SECONDS.time(stage='image_total'):
+            image_batcher.submit((prompt, image_path, preset)).result()
         
         print(f"[DEBUG] Image saved to: {image_path}")
         return f"/images/{filename}"
@@ -259,75 +531,277 @@ def generate_image_with_ai(tweet_content):
         traceback.print_exc()
         return None
 
-@app.route("/generate-tweet", methods=["POST"])
-def generate_tweet_route():
+def remove_generated_image(image_url):
+    """Delete the file behind an /images/ URL, e.g. a preview that was replaced"""
     try:
-        data = request.get_json()
-        prompt = data.get("prompt", "").strip()
-        
-        if not prompt:
-            return jsonify({"success": False, "message": "Prompt is required"}), 400
+        os.remove(os.path.join("generated_images", os.path.basename(image_url)))
+    except OSError as e:
+        print(f"[ERROR] Could not remove {image_url}: {e}")
 
-        print(f"[DEBUG] Generating tweet for prompt: {prompt}")
-        
-        # Generate tweet text
-        generated_tweet = generate_tweet_with_ai(prompt)
-        print(f"[DEBUG] Generated tweet: {generated_tweet}")
-        
-        # Generate image (only for authenticated users)
-        image_url = None
-        if current_user.is_authenticated:
+def on_image_job_preview(job):
+    """Show the quick preview in the user's room; the full image follows as 'image_ready'"""
+    socketio.emit('image_ready', {
+        'job_id': job['id'],
+        'content_id': job['content_id'],
+        'status': 'preview',
+        'image_url': job['preview_url'],
+        'error': None
+    }, room=f"user_{job['user_id']}")
+
+def on_image_job_complete(job):
+    """Deliver a finished image job to the user's Socket.IO room"""
+    if job['status'] == 'done' and job['preview_url']:
+        remove_generated_image(job['preview_url'])
+
+    if not job['content_id']:
+        # Finished before its tweet was saved; the request returns it directly
+        return
+
+    socketio.emit('image_ready', {
+        'job_id': job['id'],
+        'content_id': job['content_id'],
+        'status': job['status'],
+        'image_url': job['image_url'],
+        'error': job['error']
+    }, room=f"user_{job['user_id']}")
+    
+    # Failed jobs are recorded too, without an image, so no generation is
+    # missing from the training data
+    if job['status'] in ('done', 'failed'):
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('SELECT generated_tweet FROM generated_content WHERE id = ?', (job['content_id'],))
+        row = cursor.fetchone()
+        if row:
             try:
-                print("[DEBUG] Generating local image...")
-                image_url = generate_local_image(prompt)
-                print(f"[DEBUG] Generated image URL: {image_url}")
+                save_training_data(job['user_id'], job['prompt'], row[0], job['image_url'])
             except Exception as e:
-                print(f"[ERROR] Local image generation failed: {e}")
-                image_url = None
+                print(f"[ERROR] Training data save failed: {e}")
 
-        # Save to database if user is authenticated
-        content_id = None
-        if current_user.is_authenticated:
-            try:
-                conn = sqlite3.connect('database.db')
-                cursor = conn.cursor()
+# Image generation runs on dedicated workers, off the request path
+image_jobs = ImageJobQueue(
+    generate_local_image,
+    on_complete=on_image_job_complete,
+    max_queued=int(os.getenv('IMAGE_QUEUE_SIZE', '32')),
+    worker_id=WORKER_ID,
+    preview_preset=PREVIEW_PRESET,
+    on_preview=on_image_job_preview,
+    # Enough workers to fill a batch for every worker process, so
+    # concurrent jobs can be coalesced
+    workers=int(os.getenv('IMAGE_WORKERS', '0')) or image_batcher.max_batch_size * image_batcher.concurrency
+)
+metrics.gauge('image_queue_depth', 'Image jobs waiting for a worker', callback=image_jobs.depth)
+metrics.gauge('sqlite_open_connections', 'Open shared SQLite connections', callback=open_connections)
+
+def typical_image_seconds():
+    """Median recent diffusion batch time, or None before the first batch"""
+    p50_ms = health.diffusion.summary()['p50_ms']
+    return p50_ms / 1000 if p50_ms else None
+
+# Checked before any image job is queued: per-user and global rates (jobs
+# per minute, 0 = unlimited) and a cap on queued plus running jobs
+image_admission = AdmissionController(
+    user_rate=float(os.getenv('IMAGE_USER_RATE', '6')),
+    user_burst=float(os.getenv('IMAGE_USER_BURST', '3')),
+    global_rate=float(os.getenv('IMAGE_GLOBAL_RATE', '60')),
+    global_burst=float(os.getenv('IMAGE_GLOBAL_BURST', '10')),
+    max_pending=int(os.getenv('IMAGE_MAX_PENDING', '32')),
+    pending=image_jobs.pending,
+    job_seconds=typical_image_seconds,
+    slots=image_batcher.max_batch_size * image_batcher.concurrency
+)
+IMAGE_ADMISSIONS = metrics.counter('image_admissions_total', 'Image job admission decisions', ('outcome',))
+metrics.gauge('image_jobs_pending', 'Image jobs queued or running', callback=image_jobs.pending)
+
+ADMISSION_MESSAGES = {
+    'queue_full': 'Image generation is at capacity (you would be number {position} in the queue). Please try again in about {seconds}s.',
+    'user_rate': "You're generating images too quickly. Please try again in {seconds}s.",
+    'global_rate': 'Image generation is busy right now. Please try again in {seconds}s.'
+}
+
+def admit_image_jobs(count=1):
+    """Admission check for the current user's next image jobs; returns None or why they were refused"""
+    if not count or not current_user.is_authenticated:
+        return None
+    
+    decision = image_admission.admit(current_user.id, count)
+    IMAGE_ADMISSIONS.inc(outcome='admitted' if decision.admitted else decision.reason)
+    if decision.admitted:
+        return None
+    
+    info = decision.to_dict()
+    if info['retry_after'] is None:
+        message = f"Too many images requested at once (at most {int(image_admission.user_burst)})."
+    else:
+        message = ADMISSION_MESSAGES[decision.reason].format(
+            position=info['queue_position'], seconds=info['retry_after']
+        )
+    print(f"[DEBUG] Image admission rejected for user {current_user.id}: {decision.reason}")
+    return {'message': message, **info}
+
+def image_throttle_response(refusal):
+    """429 for refused image jobs, with Retry-After when waiting will help"""
+    response = jsonify({'success': False, **refusal})
+    response.status_code = 429
+    if refusal['retry_after'] is not None:
+        response.headers['Retry-After'] = str(refusal['retry_after'])
+    return response
+
+# Tweet and image are generated in parallel; the request waits for both
+# until this many seconds after it started, then returns what is ready
+GENERATE_DEADLINE = float(os.getenv('GENERATE_DEADLINE', '15'))
+
+def remaining_time(deadline):
+    return max(0.0, deadline - time.monotonic())
+
+def parse_bool_option(options, name, default=False):
+    """A true/false request option; raises ValueError for anything else"""
+    value = options.get(name, default)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', '1', 'yes', 'on'):
+        return True
+    if isinstance(value, str) and value.lower() in ('false', '0', 'no', 'off'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+def parse_image_options(options):
+    """(quality preset, preview first) from request options; raises ValueError"""
+    quality = options.get('quality') or IMAGE_QUALITY
+    if quality not in QUALITY_PRESETS:
+        raise ValueError(f"quality must be one of: {', '.join(QUALITY_PRESETS)}")
+    return quality, parse_bool_option(options, 'preview_first', IMAGE_PREVIEW_FIRST)
+
+def start_image_job(prompt, quality=None, preview_first=False, admit=True):
+    """
+    Queue the image for the current user before the tweet exists; returns
+    (job_id, status). A job refused by admission control gets status
+    'throttled' and the reason in g.image_throttle; the tweet goes ahead.
+    A preview-first job renders twice, so it is admitted as two jobs.
+    """
+    if not current_user.is_authenticated:
+        return None, None
+    if admit:
+        refusal = admit_image_jobs(image_jobs.renders(quality, preview_first))
+        if refusal:
+            g.image_throttle = refusal
+            return None, 'throttled'
+    try:
+        with STAGE_SECONDS.time(stage='image_enqueue'):
+            image_job_id = image_jobs.submit(current_user.id, prompt, preset=quality, preview_first=preview_first)
+        print(f"[DEBUG] Queued image job: {image_job_id}")
+        return image_job_id, 'queued'
+    except QueueFullError as e:
+        print(f"[ERROR] {e}")
+        # The job never ran, so hand back the admission it was charged
+        image_admission.refund(current_user.id, image_jobs.renders(quality, preview_first))
+        return None, 'rejected'
+
+def store_generated_tweet(prompt, generated_tweet, image_job_id=None, image_status=None, deadline=None):
+    """
+    Save a generated tweet for the current user, link the image job started
+    for it and record training data. Waits for the image until deadline and
+    returns the JSON payload sent back to the client.
+    """
+    # Save to database if user is authenticated
+    content_id = None
+    if current_user.is_authenticated:
+        try:
+            with STAGE_SECONDS.time(stage='db_insert'), transaction() as cursor:
                 cursor.execute('''
                     INSERT INTO generated_content (user_id, prompt, generated_tweet, image_url)
                     VALUES (?, ?, ?, ?)
-                ''', (current_user.id, prompt, generated_tweet, image_url))
+                ''', (current_user.id, prompt, generated_tweet, None))
                 content_id = cursor.lastrowid
-                conn.commit()
-                conn.close()
-                print(f"[DEBUG] Saved to database with ID: {content_id}")
-                
-                # Emit real-time content update
-                socketio.emit('content_update', {
+                record_content_created(cursor, current_user.id)
+            print(f"[DEBUG] Saved to database with ID: {content_id}")
+            
+            # Emit real-time content update
+            with STAGE_SECONDS.time(stage='emit'):
+                notify('content_update', {
                     'action': 'new_content',
                     'user_id': current_user.id,
                     'username': current_user.username,
                     'content_id': content_id
-                })
-            except Exception as e:
-                print(f"[ERROR] Database save failed: {e}")
-        
-        # Save training data
+                }, user_id=current_user.id)
+        except Exception as e:
+            print(f"[ERROR] Database save failed: {e}")
+    
+    # Link the image job; if it is still running, wait out the shared
+    # deadline. Anything later reaches the user's room as 'image_ready'.
+    image_url = None
+    training_image_url = None
+    save_training_now = True
+    if image_job_id and content_id:
+        job = image_jobs.attach_content(image_job_id, content_id)
+        # A job that finished before the link skipped its completion
+        # callback, so its training data is saved here; otherwise the
+        # callback saves it when the job ends, with or without an image
+        save_training_now = job['status'] in ('done', 'failed')
+        training_image_url = job['image_url']
+        if not save_training_now and deadline is not None:
+            # A preview-first job returns as soon as its preview is ready
+            with STAGE_SECONDS.time(stage='image_wait'):
+                job = image_jobs.wait(image_job_id, remaining_time(deadline), until_preview=True)
+        image_status = job['status']
+        image_url = job['image_url'] or job['preview_url']
+        if image_status not in ('done', 'failed') and job['preview_url']:
+            image_status = 'preview'
+    
+    # Save training data now unless the image job will save it on completion
+    if save_training_now:
         try:
-            save_training_data(
-                current_user.id if current_user.is_authenticated else None,
-                prompt, 
-                generated_tweet, 
-                image_url
-            )
+            with STAGE_SECONDS.time(stage='training_data'):
+                save_training_data(
+                    current_user.id if current_user.is_authenticated else None,
+                    prompt, 
+                    generated_tweet, 
+                    training_image_url
+                )
         except Exception as e:
             print(f"[ERROR] Training data save failed: {e}")
 
-        return jsonify({
-            'success': True,
-            'tweet': generated_tweet,
-            'image_url': image_url,
-            'content_id': content_id,
-            'can_post': current_user.is_authenticated
-        })
+    result = {
+        'success': True,
+        'tweet': generated_tweet,
+        'image_url': image_url,
+        'image_job_id': image_job_id,
+        'image_status': image_status,
+        'content_id': content_id,
+        'can_post': current_user.is_authenticated
+    }
+    if image_status == 'throttled':
+        result['image_throttle'] = g.get('image_throttle')
+    return result
+
+@app.route("/generate-tweet", methods=["POST"])
+def generate_tweet_route():
+    try:
+        data = request.get_json()
+        prompt = data.get("prompt", "").strip()
+        
+        if not prompt:
+            return jsonify({"success": False, "message": "Prompt is required"}), 400
+        try:
+            quality, preview_first = parse_image_options(data)
+            image_required = parse_bool_option(data, 'image_required')
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        print(f"[DEBUG] Generating tweet for prompt: {prompt}")
+        deadline = time.monotonic() + GENERATE_DEADLINE
+        
+        # The image only depends on the prompt, so start it first
+        image_job_id, image_status = start_image_job(prompt, quality, preview_first)
+        if image_status == 'throttled' and image_required:
+            return image_throttle_response(g.image_throttle)
+        
+        # Generate tweet text
+        with STAGE_SECONDS.time(stage='tweet'):
+            generated_tweet = generate_tweet_with_ai(prompt, timeout=tweet_timeout(deadline))
+        print(f"[DEBUG] Generated tweet: {generated_tweet}")
+        
+        return jsonify(store_generated_tweet(prompt, generated_tweet, image_job_id, image_status, deadline))
 
     except Exception as e:
         print(f"[ERROR] Generate tweet route error: {e}")
@@ -335,30 +809,285 @@ def generate_tweet_route():
         traceback.print_exc()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/generate-tweet/stream", methods=["POST"])
+def generate_tweet_stream_route():
+    """
+    Same as /generate-tweet, but streamed as server-sent events: 'token'
+    events carry text as Gemini produces it, 'replace' swaps in a complete
+    tweet (cache hit or fallback) and 'done' carries the saved result.
+    """
+    data = request.get_json() or {}
+    prompt = data.get("prompt", "").strip()
+    
+    if not prompt:
+        return jsonify({"success": False, "message": "Prompt is required"}), 400
+    try:
+        quality, preview_first = parse_image_options(data)
+        image_required = parse_bool_option(data, 'image_required')
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    print(f"[DEBUG] Streaming tweet for prompt: {prompt}")
+    deadline = time.monotonic() + GENERATE_DEADLINE
+    image_job_id, image_status = start_image_job(prompt, quality, preview_first)
+    if image_status == 'throttled' and image_required:
+        return image_throttle_response(g.image_throttle)
+
+    def events():
+        try:
+            pieces = []
+            with STAGE_SECONDS.time(stage='tweet'):
+                for kind, text in stream_tweet_with_ai(prompt, timeout=tweet_timeout(deadline)):
+                    if kind == 'replace':
+                        pieces = [text]
+                    else:
+                        pieces.append(text)
+                    yield sse_event(kind, {'text': text})
+            generated_tweet = ''.join(pieces).strip()
+            print(f"[DEBUG] Generated tweet: {generated_tweet}")
+            yield sse_event('done', store_generated_tweet(prompt, generated_tweet, image_job_id, image_status, deadline))
+        except Exception as e:
+            print(f"[ERROR] Streaming tweet route error: {e}")
+            yield sse_event('error', {'success': False, 'message': str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Bulk generation: every batch shares one bounded pool, so a large campaign
+# cannot flood Gemini or starve the single-tweet endpoints
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '50'))
+BATCH_MAX_CANDIDATES = int(os.getenv('BATCH_MAX_CANDIDATES', '4'))
+batch_executor = ThreadPoolExecutor(
+    max_workers=max(1, int(os.getenv('BATCH_CONCURRENCY', '4'))),
+    thread_name_prefix='batch'
+)
+
+def parse_batch_items(data):
+    """
+    Normalize a batch request into [{'prompt', 'candidates', 'image'}].
+    Items are prompt strings or objects; 'options' holds defaults for all
+    of them. Raises ValueError with a message for the client.
+    """
+    items = data.get('items', data.get('prompts'))
+    defaults = data.get('options') or {}
+    if not isinstance(items, list) or not items:
+        raise ValueError('items must be a non-empty list')
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f'At most {BATCH_MAX_ITEMS} items per batch')
+    if not isinstance(defaults, dict):
+        raise ValueError('options must be an object')
+
+    parsed = []
+    for item in items:
+        if isinstance(item, str):
+            item = {'prompt': item}
+        if not isinstance(item, dict):
+            raise ValueError('Each item must be a prompt or an object')
+        options = dict(defaults, **item)
+
+        prompt = str(options.get('prompt') or '').strip()
+        if not prompt:
+            raise ValueError('Every item needs a prompt')
+        try:
+            candidates = int(options.get('candidates', 1))
+        except (TypeError, ValueError):
+            raise ValueError('candidates must be an integer')
+        if not 1 <= candidates <= BATCH_MAX_CANDIDATES:
+            raise ValueError(f'candidates must be between 1 and {BATCH_MAX_CANDIDATES}')
+
+        quality, _ = parse_image_options(options)
+
+        parsed.append({
+            'prompt': prompt,
+            'candidates': candidates,
+            'image': bool(options.get('image', False)),
+            'quality': quality
+        })
+    return parsed
+
+@app.route('/api/generate-batch', methods=['POST'])
+@login_required
+def generate_batch_route():
+    """
+    Generate tweets for a list of prompts. Items fan out over the shared
+    batch pool; each finished item is emitted to the user's room as
+    'batch_item' while the request is still waiting on the rest (the wait
+    yields to the event loop, see the monkey-patching at the top), then all
+    rows are saved in one transaction and 'batch_complete' carries the
+    saved content ids.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        items = parse_batch_items(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    # Images are admitted all or nothing, before any text is generated, so
+    # a refused batch is answered at once with when to retry
+    image_throttle = admit_image_jobs(sum(1 for item in items if item['image']))
+    if image_throttle:
+        return image_throttle_response(image_throttle)
+
+    batch_id = str(data.get('batch_id') or uuid.uuid4().hex)[:64]
+    user_id = current_user.id
+    room = f"user_{user_id}"
+    print(f"[DEBUG] Generating batch {batch_id} of {len(items)} items")
+
+    try:
+        # Images only depend on the prompt, so queue them before any text
+        for item in items:
+            item['image_job_id'], item['image_status'] = (
+                start_image_job(item['prompt'], item['quality'], admit=False) if item['image'] else (None, None)
+            )
+
+        with STAGE_SECONDS.time(stage='batch_tweets'):
+            futures = {
+                batch_executor.submit(generate_tweet_candidates, item['prompt'], item['candidates'], tweet_timeout()): index
+                for index, item in enumerate(items)
+            }
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                item = items[index]
+                try:
+                    item['tweets'] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Batch item {index} failed: {e}")
+                    item['tweets'] = [fallback_tweet(item['prompt'])]
+                socketio.emit('batch_item', {
+                    'batch_id': batch_id,
+                    'index': index,
+                    'prompt': item['prompt'],
+                    'tweets': item['tweets'],
+                    'completed': completed,
+                    'total': len(items)
+                }, room=room)
+
+        with STAGE_SECONDS.time(stage='db_insert'), transaction() as cursor:
+            for item in items:
+                item['content_ids'] = []
+                for tweet in item['tweets']:
+                    cursor.execute('''
+                        INSERT INTO generated_content (user_id, prompt, generated_tweet, image_url)
+                        VALUES (?, ?, ?, ?)
+                    ''', (user_id, item['prompt'], tweet, None))
+                    item['content_ids'].append(cursor.lastrowid)
+                    record_content_created(cursor, user_id)
+        saved = sum(len(item['content_ids']) for item in items)
+        print(f"[DEBUG] Saved batch {batch_id}: {saved} rows")
+
+        notify('content_update', {
+            'action': 'new_content',
+            'user_id': user_id,
+            'username': current_user.username,
+            'content_id': items[-1]['content_ids'][-1],
+            'count': saved
+        }, user_id=user_id)
+
+        results = []
+        for index, item in enumerate(items):
+            # The image belongs to the first candidate; like a single
+            # generate, its training data waits for a still-running job
+            image_url = None
+            save_first = True
+            if item['image_job_id']:
+                job = image_jobs.attach_content(item['image_job_id'], item['content_ids'][0])
+                item['image_status'] = job['status']
+                image_url = job['image_url']
+                save_first = job['status'] in ('done', 'failed')
+
+            for position, tweet in enumerate(item['tweets']):
+                if position or save_first:
+                    try:
+                        save_training_data(user_id, item['prompt'], tweet, image_url if position == 0 else None)
+                    except Exception as e:
+                        print(f"[ERROR] Training data save failed: {e}")
+
+            results.append({
+                'index': index,
+                'prompt': item['prompt'],
+                'tweets': [
+                    {'content_id': content_id, 'tweet': tweet}
+                    for content_id, tweet in zip(item['content_ids'], item['tweets'])
+                ],
+                'image_url': image_url,
+                'image_job_id': item['image_job_id'],
+                'image_status': item['image_status']
+            })
+
+        socketio.emit('batch_complete', {'batch_id': batch_id, 'items': results}, room=room)
+        return jsonify({'success': True, 'batch_id': batch_id, 'items': results})
+
+    except Exception as e:
+        print(f"[ERROR] Generate batch route error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'batch_id': batch_id, 'message': str(e)}), 500
+
+@app.route('/api/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """Hit/miss statistics for the tweet generation and user caches"""
+    return jsonify({
+        'success': True,
+        'tweet_cache': tweet_cache.stats(),
+        'user_cache': user_cache.stats()
+    })
+
+@app.route('/api/admission', methods=['GET'])
+@admin_required
+def get_admission_stats():
+    """Image admission limits, pending jobs and rejection counts for this worker"""
+    return jsonify({'success': True, 'worker': WORKER_ID, 'image_admission': image_admission.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint, limited to admins and configured scrapers"""
+    if not metrics_access_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/image-jobs/<job_id>', methods=['GET'])
+@login_required
+def get_image_job(job_id):
+    """Poll the state of one of the current user's image jobs"""
+    job = image_jobs.get(job_id)
+    if not job or job['user_id'] != current_user.id:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'content_id': job['content_id'],
+        'status': job['status'],
+        'image_url': job['image_url'],
+        'preview_url': job['preview_url'],
+        'quality': job['preset'],
+        'error': job['error']
+    })
+
+# Append-only, rotating JSON Lines log of generated data
+training_log = TrainingLog(
+    directory='training_data',
+    max_bytes=int(os.getenv('TRAINING_LOG_MAX_MB', '64')) * 1024 * 1024,
+    max_age=int(os.getenv('TRAINING_LOG_MAX_AGE', '86400')) or None,
+    compress=os.getenv('TRAINING_LOG_COMPRESS', 'true').lower() == 'true'
+)
+
 def save_training_data(user_id, prompt, tweet, image_url):
     """Save generated data for model training"""
-    training_data = {
+    training_log.append({
         'user_id': user_id,
         'prompt': prompt,
         'generated_tweet': tweet,
         'image_url': image_url,
         'timestamp': datetime.now().isoformat()
-    }
-    
-    # Ensure training_data directory exists
-    os.makedirs('training_data', exist_ok=True)
-    
-    # Append to training data file
-    try:
-        with open('training_data/generated_data.json', 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-    
-    data.append(training_data)
-    
-    with open('training_data/generated_data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    })
 
 # Routes
 @app.route('/')
@@ -376,27 +1105,25 @@ def register():
         if not username or not email or not password:
             return jsonify({'success': False, 'message': 'All fields are required'})
         
-        conn = sqlite3.connect('database.db')
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if user already exists
         cursor.execute('SELECT * FROM users WHERE username = ? OR email = ?', (username, email))
         if cursor.fetchone():
-            conn.close()
             return jsonify({'success': False, 'message': 'User already exists'})
         
         # Create new user
         password_hash = generate_password_hash(password)
-        cursor.execute('''
-            INSERT INTO users (username, email, password_hash)
-            VALUES (?, ?, ?)
-        ''', (username, email, password_hash))
-        
-        conn.commit()
-        conn.close()
+        with transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO users (username, email, password_hash)
+                VALUES (?, ?, ?)
+            ''', (username, email, password_hash))
+        user_cache.invalidate(cursor.lastrowid)
         
         # Emit real-time update
-        socketio.emit('user_update', {'action': 'new_user', 'username': username})
+        notify('user_update', {'action': 'new_user', 'username': username})
         
         return jsonify({'success': True, 'message': 'Registration successful'})
     
@@ -409,18 +1136,17 @@ def login():
         username = data.get('username')
         password = data.get('password')
         
-        conn = sqlite3.connect('database.db')
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
         user_data = cursor.fetchone()
-        conn.close()
         
         if user_data and check_password_hash(user_data[3], password):
             user = User(user_data[0], user_data[1], user_data[2], user_data[4])
             login_user(user)
             
             # Emit real-time login activity
-            socketio.emit('user_activity', {
+            notify('user_activity', {
                 'user_id': user.id,
                 'activity': f'User {username} logged in',
                 'type': 'success'
@@ -443,7 +1169,7 @@ def logout():
     logout_user()
     
     # Emit logout activity
-    socketio.emit('user_activity', {
+    notify('user_activity', {
         'activity': f'User {username} logged out',
         'type': 'info'
     })
@@ -471,25 +1197,182 @@ def user_dashboard():
 @app.route('/admin-panel')
 @admin_required
 def admin_dashboard():
-    conn = sqlite3.connect('database.db')
+    # Only cheap totals are rendered; users and content pages are fetched
+    # on demand from /api/users and /api/content
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT COUNT(*), COALESCE(SUM(is_admin), 0) FROM users')
+    user_count, admin_count = cursor.fetchone()
+    
+    cursor.execute('SELECT COALESCE(SUM(total), 0), COALESCE(SUM(published), 0), COALESCE(SUM(images), 0) FROM user_stats')
+    content_count, published_count, image_count = cursor.fetchone()
+    
+    stats = {
+        'users': user_count,
+        'admins': admin_count,
+        'content': content_count,
+        'published': published_count,
+        'images': image_count
+    }
+    
+    return render_template('admin-dashboard.html', stats=stats)
+
+ADMIN_USER_SORTS = {'id': 'u.id', 'username': 'u.username', 'created_at': 'u.created_at'}
+ADMIN_CONTENT_SORTS = {'id': 'gc.id', 'created_at': 'gc.created_at'}
+
+def parse_bool_arg(name):
+    """Read an optional true/false query parameter"""
+    value = request.args.get(name, '').lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    return None
+
+@app.route('/api/users', methods=['GET'])
+@admin_required
+def admin_list_users():
+    """Page through users with server-side sorting and filtering"""
+    limit = parse_limit(request.args.get('limit'))
+    sort = request.args.get('sort', 'id')
+    if sort not in ADMIN_USER_SORTS:
+        return jsonify({'success': False, 'message': f'Unsupported sort: {sort}'}), 400
+    descending = request.args.get('order', 'asc').lower() == 'desc'
+    sort_column = ADMIN_USER_SORTS[sort]
+    
+    conditions = []
+    params = []
+    search = request.args.get('q', '').strip()
+    if search:
+        conditions.append('(u.username LIKE ? OR u.email LIKE ?)')
+        params.extend([f'{search}%', f'{search}%'])
+    is_admin = parse_bool_arg('is_admin')
+    if is_admin is not None:
+        conditions.append('u.is_admin = ?')
+        params.append(is_admin)
+    
+    try:
+        seek_sql, seek_params, order_sql = keyset_page_sql(sort_column, descending, request.args.get('cursor'), 'u.id')
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if seek_sql:
+        conditions.append(seek_sql)
+        params.extend(seek_params)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    conn = get_db()
     cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT u.id, u.username, u.email, u.is_admin, u.created_at,
+               COALESCE(s.total, 0), COALESCE(s.published, 0), COALESCE(s.images, 0)
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        {where_sql}
+        {order_sql}
+        LIMIT ?
+    ''', params + [limit + 1])
+    rows, has_more = split_page(cursor.fetchall(), limit)
+    
+    users = []
+    for row in rows:
+        users.append({
+            'id': row[0],
+            'username': row[1],
+            'email': row[2],
+            'is_admin': bool(row[3]),
+            'created_at': row[4],
+            'total': row[5],
+            'published': row[6],
+            'drafts': row[5] - row[6],
+            'images': row[7]
+        })
     
-    # Get all users (excluding password hashes for security)
-    cursor.execute('SELECT id, username, email, created_at FROM users')
-    users = cursor.fetchall()
+    next_cursor = None
+    if has_more:
+        last = users[-1]
+        next_cursor = encode_cursor(last['id']) if sort == 'id' else encode_cursor(last[sort], last['id'])
+    
+    return jsonify({'success': True, 'users': users, 'next_cursor': next_cursor, 'has_more': has_more})
+
+@app.route('/api/content', methods=['GET'])
+@admin_required
+def admin_list_content():
+    """Page through all content with server-side sorting and filtering"""
+    limit = parse_limit(request.args.get('limit'))
+    sort = request.args.get('sort', 'created_at')
+    if sort not in ADMIN_CONTENT_SORTS:
+        return jsonify({'success': False, 'message': f'Unsupported sort: {sort}'}), 400
+    descending = request.args.get('order', 'desc').lower() == 'desc'
+    sort_column = ADMIN_CONTENT_SORTS[sort]
+    
+    conditions = []
+    params = []
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None:
+        conditions.append('gc.user_id = ?')
+        params.append(user_id)
+    username = request.args.get('username', '').strip()
+    if username:
+        conditions.append('gc.user_id = (SELECT id FROM users WHERE username = ?)')
+        params.append(username)
+    is_posted = parse_bool_arg('is_posted')
+    if is_posted is not None:
+        conditions.append('gc.is_posted = ?')
+        params.append(is_posted)
+    has_image = parse_bool_arg('has_image')
+    if has_image is not None:
+        conditions.append('gc.image_url IS NOT NULL' if has_image else 'gc.image_url IS NULL')
+    date_from = request.args.get('date_from')
+    if date_from:
+        conditions.append('gc.created_at >= ?')
+        params.append(date_from)
+    date_to = request.args.get('date_to')
+    if date_to:
+        # Inclusive of the whole end day
+        conditions.append("gc.created_at < date(?, '+1 day')")
+        params.append(date_to)
+    
+    try:
+        seek_sql, seek_params, order_sql = keyset_page_sql(sort_column, descending, request.args.get('cursor'), 'gc.id')
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if seek_sql:
+        conditions.append(seek_sql)
+        params.extend(seek_params)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
     
-    # Get all generated content
-    cursor.execute('''
-        SELECT gc.id, u.username, gc.prompt, gc.generated_tweet, gc.image_url, gc.is_posted, gc.created_at
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT gc.id, gc.user_id, u.username, gc.prompt, gc.generated_tweet, gc.image_url, gc.is_posted, gc.created_at
         FROM generated_content gc
         LEFT JOIN users u ON gc.user_id = u.id
-        ORDER BY gc.created_at DESC
-    ''')
-    content = cursor.fetchall()
+        {where_sql}
+        {order_sql}
+        LIMIT ?
+    ''', params + [limit + 1])
+    rows, has_more = split_page(cursor.fetchall(), limit)
+    
+    content = []
+    for row in rows:
+        content.append({
+            'id': row[0],
+            'user_id': row[1],
+            'username': row[2],
+            'prompt': row[3],
+            'tweet': row[4],
+            'image_url': row[5],
+            'is_posted': bool(row[6]),
+            'created_at': row[7]
+        })
     
-    conn.close()
+    next_cursor = None
+    if has_more:
+        last = content[-1]
+        next_cursor = encode_cursor(last['id']) if sort == 'id' else encode_cursor(last[sort], last['id'])
     
-    return render_template('admin-dashboard.html', users=users, content=content)
+    return jsonify({'success': True, 'content': content, 'next_cursor': next_cursor, 'has_more': has_more})
 
 # Legacy routes for backward compatibility
 @app.route('/admin')
@@ -500,19 +1383,12 @@ def admin():
 @app.route('/profile')
 @login_required
 def profile():
-    # Get user's generated content
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT prompt, generated_tweet, image_url, is_posted, created_at
-        FROM generated_content
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-    ''', (current_user.id,))
-    content = cursor.fetchall()
-    conn.close()
+    # Latest page of the user's content plus its totals
+    stats = read_user_stats(current_user.id)
+    content, _, _ = fetch_user_content_page(current_user.id, PROFILE_PAGE_SIZE)
+    content = [(item[1], item[2], item[3], item[4], item[5]) for item in content]
     
-    return render_template('profile.html', content=content)
+    return render_template('profile.html', content=content, stats=stats)
 
 # Static file serving
 @app.route('/static/<path:filename>')
@@ -529,22 +1405,49 @@ def serve_image(filename):
 
 # API Routes
 
+PROFILE_PAGE_SIZE = 50
+
+def fetch_user_content_page(user_id, limit, cursor=None):
+    """
+    Fetch one newest-first page of a user's content using keyset pagination.
+    Returns (rows, next_cursor, has_more); raises InvalidCursorError.
+    """
+    conn = get_db()
+    db_cursor = conn.cursor()
+    if cursor:
+        created_at, content_id = decode_cursor(cursor)
+        db_cursor.execute('''
+            SELECT id, prompt, generated_tweet, image_url, is_posted, created_at
+            FROM generated_content
+            WHERE user_id = ? AND (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (user_id, created_at, content_id, limit + 1))
+    else:
+        db_cursor.execute('''
+            SELECT id, prompt, generated_tweet, image_url, is_posted, created_at
+            FROM generated_content
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (user_id, limit + 1))
+    
+    rows, has_more = split_page(db_cursor.fetchall(), limit)
+    next_cursor = encode_cursor(rows[-1][5], rows[-1][0]) if has_more else None
+    return rows, next_cursor, has_more
+
 @app.route('/api/user-content', methods=['GET'])
 @login_required
 def get_user_content():
-    """Fetch all content generated by the current user"""
+    """Fetch a page of content generated by the current user"""
     try:
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, prompt, generated_tweet, image_url, is_posted, created_at
-            FROM generated_content
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-        ''', (current_user.id,))
-        
-        content = cursor.fetchall()
-        conn.close()
+        limit = parse_limit(request.args.get('limit'))
+        try:
+            content, next_cursor, has_more = fetch_user_content_page(
+                current_user.id, limit, request.args.get('cursor')
+            )
+        except InvalidCursorError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
         # Convert to list of dictionaries
         content_list = []
@@ -558,19 +1461,113 @@ def get_user_content():
                 'created_at': item[5]
             })
         
-        return jsonify({
+        response = {
             'success': True,
             'content': content_list,
-            'total': len(content_list),
-            'published': sum(1 for c in content_list if c['is_posted']),
-            'drafts': sum(1 for c in content_list if not c['is_posted']),
-            'images': sum(1 for c in content_list if c['image_url'])
-        })
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+        response.update(read_user_stats(current_user.id))
+        return jsonify(response)
     
     except Exception as e:
         print(f"[ERROR] Failed to fetch user content: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+@login_required
+def search_content():
+    """
+    Full-text search over prompts and tweets, best matches first. The cursor
+    is a (score, id) keyset, and bm25 scores shift as content is added or
+    removed, so paging while the library changes may skip or repeat results.
+    """
+    match = build_match_query(request.args.get('q', ''))
+    if match is None:
+        return jsonify({'success': False, 'message': 'Search query is required'}), 400
+    limit = parse_limit(request.args.get('limit'))
+    
+    # Users search their own content; admins search everyone's, or one user's
+    conditions = []
+    params = []
+    user_id = current_user.id if not current_user.is_admin else request.args.get('user_id', type=int)
+    if user_id is not None:
+        conditions.append('gc.user_id = ?')
+        params.append(user_id)
+    is_posted = parse_bool_arg('is_posted')
+    if is_posted is not None:
+        conditions.append('gc.is_posted = ?')
+        params.append(is_posted)
+    has_image = parse_bool_arg('has_image')
+    if has_image is not None:
+        conditions.append('gc.image_url IS NOT NULL' if has_image else 'gc.image_url IS NULL')
+    
+    # bm25 is lower for better matches, so pages run in ascending (score, id)
+    try:
+        seek_sql, seek_params, order_sql = keyset_page_sql('score', False, request.args.get('cursor'), 'gc.id')
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if seek_sql:
+        conditions.append(seek_sql)
+        params.extend(seek_params)
+    filter_sql = ''.join(f' AND {condition}' for condition in conditions)
+    
+    cursor = get_db().cursor()
+    try:
+        # Filters and LIMIT apply before anything is highlighted, so only
+        # the rows on this page pay for highlight()
+        cursor.execute(f'''
+            SELECT gc.id, bm25(content_fts, ?, ?) AS score, gc.user_id, u.username,
+                   gc.prompt, gc.generated_tweet, gc.image_url, gc.is_posted, gc.created_at
+            FROM content_fts
+            JOIN generated_content gc ON gc.id = content_fts.rowid
+            LEFT JOIN users u ON gc.user_id = u.id
+            WHERE content_fts MATCH ?{filter_sql}
+            {order_sql}
+            LIMIT ?
+        ''', [PROMPT_WEIGHT, TWEET_WEIGHT, match] + params + [limit + 1])
+        rows, has_more = split_page(cursor.fetchall(), limit)
+        
+        marked = {}
+        if rows:
+            placeholders = ', '.join('?' for _ in rows)
+            cursor.execute(f'''
+                SELECT rowid, {highlight_sql(0)}, {highlight_sql(1)}
+                FROM content_fts
+                WHERE content_fts MATCH ? AND rowid IN ({placeholders})
+            ''', [match] + [row[0] for row in rows])
+            marked = {row[0]: row[1:] for row in cursor.fetchall()}
+    except sqlite3.OperationalError as e:
+        print(f"[ERROR] Search for {match!r} failed: {e}")
+        return jsonify({'success': False, 'message': 'Search failed'}), 500
+    
+    results = []
+    for row in rows:
+        results.append({
+            'id': row[0],
+            'score': row[1],
+            'user_id': row[2],
+            'username': row[3],
+            'prompt': row[4],
+            'tweet': row[5],
+            'prompt_html': render_highlight(marked.get(row[0], (None, None))[0]),
+            'tweet_html': render_highlight(marked.get(row[0], (None, None))[1]),
+            'image_url': row[6],
+            'is_posted': bool(row[7]),
+            'created_at': row[8]
+        })
+    
+    next_cursor = encode_cursor(results[-1]['score'], results[-1]['id']) if has_more else None
+    return jsonify({'success': True, 'results': results, 'next_cursor': next_cursor, 'has_more': has_more})
+
+@app.route('/api/user-stats', methods=['GET'])
+@login_required
+def get_user_stats():
+    """Content counters for the current user"""
+    response = {'success': True}
+    response.update(read_user_stats(current_user.id))
+    return jsonify(response)
+
 @app.route('/post-tweet', methods=['POST'])
 @login_required
 def post_tweet():
@@ -582,23 +1579,22 @@ def post_tweet():
     
     try:
         # Update database to mark as posted
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE generated_content 
-            SET is_posted = TRUE 
-            WHERE id = ? AND user_id = ?
-        ''', (content_id, current_user.id))
-        conn.commit()
-        conn.close()
+        with transaction() as cursor:
+            cursor.execute('''
+                UPDATE generated_content 
+                SET is_posted = TRUE 
+                WHERE id = ? AND user_id = ? AND NOT is_posted
+            ''', (content_id, current_user.id))
+            if cursor.rowcount:
+                record_content_published(cursor, current_user.id)
         
         # Emit real-time publication update
-        socketio.emit('content_update', {
+        notify('content_update', {
             'action': 'content_published',
             'user_id': current_user.id,
             'username': current_user.username,
             'content_id': content_id
-        })
+        }, user_id=current_user.id)
         
         return jsonify({'success': True, 'message': 'Tweet posted successfully!'})
         
@@ -608,18 +1604,19 @@ def post_tweet():
 @app.route('/delete-content/<int:content_id>', methods=['DELETE'])
 @admin_required
 def delete_content(content_id):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM generated_content WHERE id = ?', (content_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute('SELECT user_id, is_posted, image_url FROM generated_content WHERE id = ?', (content_id,))
+        row = cursor.fetchone()
+        cursor.execute('DELETE FROM generated_content WHERE id = ?', (content_id,))
+        if row and row[0] is not None:
+            record_content_deleted(cursor, row[0], row[1], row[2] is not None)
     
     # Emit real-time deletion update
-    socketio.emit('content_update', {
+    notify('content_update', {
         'action': 'content_deleted',
         'content_id': content_id,
         'admin_user': current_user.username
-    })
+    }, user_id=row[0] if row else None)
     
     return jsonify({'success': True, 'message': 'Content deleted successfully'})
 
@@ -647,43 +1644,63 @@ def handle_join_user(data):
         emit('user_joined', {'message': 'Connected to user real-time updates'})
 
 # Periodic system health updates
+def probe_database():
+    """A representative listing query, timed by the health collector"""
+    get_db().execute(
+        'SELECT id FROM generated_content ORDER BY created_at DESC, id DESC LIMIT 20'
+    ).fetchall()
+
 def emit_system_health():
-    """Emit system health updates periodically"""
-    import random
-    health_data = {
-        'database': {
-            'responseTime': f'{random.randint(8, 25)}ms',
-            'connections': f'{random.randint(30, 80)}/100',
-            'storage': f'{random.uniform(2.0, 3.5):.1f}GB used'
-        },
-        'ai': {
-            'apiCalls': f'{random.uniform(1.0, 2.0):.1f}K/hour',
-            'successRate': f'{random.uniform(98.5, 99.9):.1f}%',
-            'queue': f'{random.randint(0, 5)} pending',
-            'latency': f'{random.randint(700, 1200)}ms',
-            'errorRate': f'{random.uniform(0.1, 0.5):.1f}%'
-        },
-        'server': {
-            'cpu': f'{random.randint(15, 35)}%',
-            'memory': f'{random.uniform(1.5, 2.5):.1f}GB/4GB',
-            'disk': f'{random.randint(40, 60)}% used',
-            'network': f'{random.randint(100, 200)} Mbps',
-            'load': f'{random.uniform(0.5, 1.2):.1f}'
-        }
-    }
+    """Emit measured system health to the admin room"""
+    health_data = health.snapshot(
+        queue_depth=image_jobs.depth(),
+        probe=probe_database,
+        connections=open_connections()
+    )
+    breaker = gemini_breaker.stats()
+    health_data['ai']['circuit'] = breaker['state']
+    health_data['ai']['circuitDetails'] = breaker
+    health_data['ai']['admission'] = image_admission.stats()
+    health_data['server']['worker'] = WORKER_ID
     socketio.emit('system_health_update', health_data, room='admin')
 
+HEALTH_INTERVAL = 30
+
+# Every worker runs the health loop, but only the holder of this lease
+# emits, so admins get one feed however many workers there are
+health_leader = LeaderLease('health-emitter', ttl=HEALTH_INTERVAL * 2.5)
+
 # Start background task for system health updates
 def background_health_updates():
+    health.snapshot()  # baseline for the CPU and network rates
     while True:
-        time.sleep(30)  # Update every 30 seconds
-        emit_system_health()
+        time.sleep(HEALTH_INTERVAL)
+        pipeline_cache.evict_idle()
+        if health_leader.acquire():
+            emit_system_health()
 
-if __name__ == '__main__':
+def start_background_services():
+    """Prepare the database and start this worker's image jobs and health loop"""
     init_db()
+    migrated = training_log.migrate_json_array('training_data/generated_data.json')
+    if migrated:
+        print(f"[DEBUG] Migrated {migrated} training records to JSON Lines")
+    image_jobs.start()
     
     # Start background health monitoring
     health_thread = threading.Thread(target=background_health_updates, daemon=True)
     health_thread.start()
-    
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+
+if __name__ == '__main__':
+    # Spawned image worker processes re-import the main script (as
+    # __mp_main__), which would build a second copy of the whole app in each
+    # of them. They only run functions from utils.image_workers, so give this
+    # script a module spec named __main__, which multiprocessing skips.
+    sys.modules['__main__'].__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+    start_background_services()
+    socketio.run(
+        app,
+        debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true',
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', '5000'))
+    )
@@ -4,15 +4,18 @@ Database backup script for AI Tweet Generator
 Creates a backup of the current database
 """
 
-import sqlite3
 import json
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import DATABASE_PATH, connect
+
 def backup_database():
     """Create a backup of the database"""
     
-    if not os.path.exists('database.db'):
+    if not os.path.exists(DATABASE_PATH):
         print("No database found to backup")
         return
     
@@ -23,9 +26,12 @@ def backup_database():
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_filename = f'backups/database_backup_{timestamp}.json'
     
-    conn = sqlite3.connect('database.db')
+    conn = connect()
     cursor = conn.cursor()
     
+    # Read both tables from one consistent snapshot while writers continue
+    cursor.execute('BEGIN')
+    
     backup_data = {}
     
     # Backup users table
@@ -57,6 +63,7 @@ def backup_database():
         'total_content': len(content)
     }
     
+    conn.rollback()
     conn.close()
     
     # Save backup
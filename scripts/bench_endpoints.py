@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load-test benchmark for the generation endpoints
+Runs the app against a temporary database, a local Gemini stand-in and a
+fake diffusion pipeline, drives concurrent logged-in clients and writes
+requests/sec and latency percentiles per endpoint to a JSON file
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_gemini import start_fake_gemini
+
+# 1x1 transparent PNG
+PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+
+class FakeImage:
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(PNG_BYTES)
+
+
+class FakePipeline:
+    """Stands in for StableDiffusionPipeline: sleeps, then returns tiny images"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __call__(self, prompts, **kwargs):
+        prompts = [prompts] if isinstance(prompts, str) else prompts
+        time.sleep(self.latency)
+        return type('PipelineOutput', (), {'images': [FakeImage() for _ in prompts]})()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(samples, elapsed):
+    """Throughput and latency percentiles for a list of (seconds, ok)"""
+    from utils.health import percentile
+
+    durations = sorted(seconds * 1000 for seconds, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(durations) / len(durations), 2) if durations else None,
+            'p50': round(percentile(durations, 0.50), 2) if durations else None,
+            'p95': round(percentile(durations, 0.95), 2) if durations else None,
+            'p99': round(percentile(durations, 0.99), 2) if durations else None,
+            'max': round(durations[-1], 2) if durations else None
+        }
+    }
+
+
+def run_phase(sessions, requests_per_client, make_request):
+    """Run make_request(session, client_index, i) from every client concurrently"""
+    samples = []
+    lock = threading.Lock()
+
+    def client_loop(index):
+        session = sessions[index]
+        local = []
+        for i in range(requests_per_client):
+            started = time.perf_counter()
+            try:
+                ok = make_request(session, index, i)
+            except Exception:
+                ok = False
+            local.append((time.perf_counter() - started, ok))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        list(pool.map(client_loop, range(len(sessions))))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the generation endpoints')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent logged-in clients')
+    parser.add_argument('--requests', type=int, default=25, help='requests per client per endpoint')
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help='stand-in Gemini mean latency (s)')
+    parser.add_argument('--gemini-jitter', type=float, default=0.05)
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--diffusion-latency', type=float, default=0.5, help='fake pipeline seconds per batch')
+    parser.add_argument('--repeat-prompts', action='store_true', help='reuse prompts to exercise the tweet cache')
+    parser.add_argument('--output', default='bench-results.json')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    gemini, gemini_url = start_fake_gemini(args.gemini_latency, args.gemini_jitter, args.gemini_error_rate)
+
+    # Everything the app writes goes to a throwaway directory
+    workdir = tempfile.mkdtemp(prefix='tweet-bench-')
+    os.chdir(workdir)
+    os.environ['DATABASE_PATH'] = os.path.join(workdir, 'database.db')
+    os.environ['TWEET_API_KEY'] = 'benchmark'
+    os.environ['GEMINI_API_BASE'] = gemini_url
+    # The fake pipeline is patched into this process, so diffuse in-process
+    os.environ['IMAGE_WORKER_PROCESSES'] = '0'
+    # Measure throughput, not the image admission limits
+    os.environ['IMAGE_USER_RATE'] = '0'
+    os.environ['IMAGE_GLOBAL_RATE'] = '0'
+    os.environ['IMAGE_MAX_PENDING'] = '0'
+
+    import requests
+    from werkzeug.serving import make_server
+    import app as web
+
+    web.pipeline_cache.loader = lambda model_id, device, dtype: FakePipeline(args.diffusion_latency)
+    web.init_db()
+    web.image_jobs.start()
+
+    server = make_server('127.0.0.1', 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-server', daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    sessions = []
+    for i in range(args.clients):
+        session = requests.Session()
+        credentials = {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password': 'benchmark'}
+        session.post(f"{base_url}/register", json=credentials)
+        response = session.post(f"{base_url}/login", json=credentials)
+        if not response.json().get('success'):
+            sys.exit(f"Could not log in benchmark client {i}")
+        sessions.append(session)
+
+    content_ids = [[] for _ in sessions]
+
+    def generate(session, index, i):
+        prompt = f"benchmark topic {i}" if args.repeat_prompts else f"benchmark topic {index}-{i}"
+        response = session.post(f"{base_url}/generate-tweet", json={'prompt': prompt})
+        data = response.json()
+        if data.get('content_id'):
+            content_ids[index].append(data['content_id'])
+        return response.status_code == 200 and data.get('success')
+
+    cursors = [None] * len(sessions)
+
+    def user_content(session, index, i):
+        params = {'limit': 10}
+        if cursors[index]:
+            params['cursor'] = cursors[index]
+        response = session.get(f"{base_url}/api/user-content", params=params)
+        data = response.json()
+        cursors[index] = data.get('next_cursor')
+        return response.status_code == 200 and data.get('success')
+
+    def post(session, index, i):
+        ids = content_ids[index]
+        if not ids:
+            return False
+        response = session.post(f"{base_url}/post-tweet", json={'content_id': ids[i % len(ids)]})
+        return response.status_code == 200 and response.json().get('success')
+
+    results = {}
+    for name, make_request in (
+        ('POST /generate-tweet', generate),
+        ('GET /api/user-content', user_content),
+        ('POST /post-tweet', post),
+    ):
+        print(f"Running {name} ...")
+        results[name] = run_phase(sessions, args.requests, make_request)
+
+    # Let queued image jobs finish so their throughput is reported too
+    deadline = time.time() + 120
+    while web.image_jobs.depth() and time.time() < deadline:
+        time.sleep(0.2)
+
+    report = {
+        'benchmark': 'endpoints',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'config': vars(args),
+        'results': results,
+        'image_jobs_pending': web.image_jobs.depth()
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'endpoint':<24} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in results.items():
+        latency = stats['latency_ms']
+        print(f"{name:<24} {stats['requests']:>6} {stats['errors']:>5} {stats['rps']:>8} "
+              f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8}")
+    print(f"\nResults written to {output}")
+
+    server.shutdown()
+    gemini.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the diffusion quality presets
+Loads the app's Stable Diffusion model once per memory layout, times each
+quality preset (scheduler, step count and resolution) after a warmup run
+and writes seconds per image to a JSON file. Needs torch and diffusers.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_endpoints import git_commit
+from utils.image_backend import QUALITY_PRESETS, LocalDiffusionBackend, preset_settings
+from utils.pipeline_cache import PipelineCache, load_stable_diffusion_pipeline
+
+DEFAULT_MODEL_ID = "SG161222/Realistic_Vision_V5.1_noVAE"
+PROMPT = "A cozy coffee shop on a rainy morning, warm light, photorealistic"
+
+
+def time_preset(backend, preset, runs, batch):
+    """Median and best seconds per image for one preset"""
+    prompts = [PROMPT] * batch
+    backend.generate(prompts, preset)  # warmup: scheduler switch, oneDNN kernel selection
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        backend.generate(prompts, preset)
+        samples.append((time.perf_counter() - started) / batch)
+
+    settings = preset_settings(preset)
+    return {
+        'scheduler': settings['scheduler'],
+        'steps': settings['num_inference_steps'],
+        'size': f"{settings['width']}x{settings['height']}",
+        'seconds_per_image_median': round(statistics.median(samples), 3),
+        'seconds_per_image_min': round(min(samples), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark diffusion quality presets')
+    parser.add_argument('--model', default=DEFAULT_MODEL_ID)
+    parser.add_argument('--presets', default=','.join(QUALITY_PRESETS), help='comma-separated preset names')
+    parser.add_argument('--runs', type=int, default=3, help='timed runs per preset')
+    parser.add_argument('--batch', type=int, default=1, help='prompts per pipeline call')
+    parser.add_argument('--threads', type=int, default=0, help='torch threads (0 = torch default)')
+    parser.add_argument('--compare-layout', action='store_true',
+                        help='also time the default (NCHW) memory layout on CPU')
+    parser.add_argument('--output', default='bench-image-presets.json')
+    args = parser.parse_args()
+
+    missing = [name for name in ('torch', 'diffusers') if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"[ERROR] {', '.join(missing)} not installed; install requirements.txt to run this benchmark")
+        sys.exit(1)
+
+    presets = [name.strip() for name in args.presets.split(',') if name.strip()]
+    unknown = [name for name in presets if name not in QUALITY_PRESETS]
+    if unknown:
+        parser.error(f"unknown presets: {', '.join(unknown)}")
+
+    layouts = {'channels_last': True}
+    if args.compare_layout:
+        layouts['contiguous'] = False
+
+    results = {}
+    for layout, channels_last in layouts.items():
+        cache = PipelineCache(
+            loader=lambda model_id, device, dtype, cl=channels_last:
+                load_stable_diffusion_pipeline(model_id, device, dtype, channels_last=cl)
+        )
+        backend = LocalDiffusionBackend(args.model, cache, torch_threads=args.threads or None)
+        results[layout] = {}
+        for preset in presets:
+            print(f"[DEBUG] Timing preset '{preset}' ({layout})")
+            results[layout][preset] = time_preset(backend, preset, args.runs, args.batch)
+        cache.clear()
+
+    import torch
+    report = {
+        'benchmark': 'image_presets',
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model': args.model,
+        'device': backend.device[0],
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'runs': args.runs,
+        'batch': args.batch,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'layout':<14} {'preset':<10} {'scheduler':<10} {'steps':>5} {'size':>9} {'s/image':>8}")
+    for layout, by_preset in results.items():
+        for preset, stats in by_preset.items():
+            print(f"{layout:<14} {preset:<10} {stats['scheduler']:<10} {stats['steps']:>5} "
+                  f"{stats['size']:>9} {stats['seconds_per_image_median']:>8}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
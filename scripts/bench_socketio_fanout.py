@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Socket.IO fan-out benchmark
+Connects many simulated browsers (users in their own rooms plus a few
+admins), replays the same burst of user activity in three delivery modes
+and counts the Socket.IO messages the clients receive:
+  broadcast  - every event to every client (how events were sent before)
+  targeted   - events to the owner's user room and the admin room
+  coalesced  - targeted, with admin-feed events batched per interval
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_endpoints import git_commit
+from fake_gemini import start_fake_gemini
+
+
+def drain(clients):
+    return sum(len(sio.get_received()) for sio in clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Socket.IO event fan-out')
+    parser.add_argument('--users', type=int, default=50, help='connected user browsers')
+    parser.add_argument('--admins', type=int, default=2, help='connected admin browsers')
+    parser.add_argument('--actions', type=int, default=5, help='generate + post actions per user')
+    parser.add_argument('--interval', type=float, default=0.5, help='admin feed coalescing interval (s)')
+    parser.add_argument('--output', default='bench-socketio.json')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    gemini, gemini_url = start_fake_gemini(latency=0.0, jitter=0.0)
+
+    workdir = tempfile.mkdtemp(prefix='tweet-bench-')
+    os.chdir(workdir)
+    os.environ['DATABASE_PATH'] = os.path.join(workdir, 'database.db')
+    # An instant Gemini stand-in, so only event delivery is measured
+    os.environ['TWEET_API_KEY'] = 'benchmark'
+    os.environ['GEMINI_API_BASE'] = gemini_url
+    os.environ['IMAGE_WORKER_PROCESSES'] = '0'
+    # Measure throughput, not the image admission limits
+    os.environ['IMAGE_USER_RATE'] = '0'
+    os.environ['IMAGE_GLOBAL_RATE'] = '0'
+    os.environ['IMAGE_MAX_PENDING'] = '0'
+
+    import app as web
+    from utils.realtime import EventCoalescer
+
+    web.init_db()
+    # Text-only workload: skip image jobs entirely
+    web.start_image_job = lambda *a, **k: (None, None)
+
+    def connect(username, password, register=True):
+        http = web.app.test_client()
+        if register:
+            http.post('/register', json={'username': username, 'email': f'{username}@example.com',
+                                         'password': password})
+        response = http.post('/login', json={'username': username, 'password': password})
+        if not response.get_json().get('success'):
+            sys.exit(f"Could not log in {username}")
+        sio = web.socketio.test_client(web.app, flask_test_client=http)
+        return http, sio
+
+    users = [connect(f'fanout{i}', 'benchmark') for i in range(args.users)]
+    admins = [connect('admin', 'admin123', register=False) for _ in range(args.admins)]
+    for _, sio in users:
+        sio.emit('join_user', {})
+    for _, sio in admins:
+        sio.emit('join_admin')
+
+    user_sockets = [sio for _, sio in users]
+    admin_sockets = [sio for _, sio in admins]
+    targeted_notify = web.notify
+
+    def broadcast_notify(event, data, user_id=None):
+        web.socketio.emit(event, data)
+
+    modes = {
+        'broadcast': (broadcast_notify, None),
+        'targeted': (targeted_notify, None),
+        'coalesced': (targeted_notify, EventCoalescer(
+            lambda events: web.socketio.emit('admin_events', {'events': events}, room='admin'),
+            interval=args.interval
+        ))
+    }
+
+    results = {}
+    for mode, (notify, feed) in modes.items():
+        web.notify = notify
+        web.admin_feed = feed
+        drain(user_sockets + admin_sockets)
+
+        print(f"Running {mode} ...")
+        started = time.perf_counter()
+        events = 0
+        for i in range(args.actions):
+            for index, (http, _) in enumerate(users):
+                data = http.post('/generate-tweet', json={'prompt': f'fan-out {mode} {index}-{i}'}).get_json()
+                http.post('/post-tweet', json={'content_id': data['content_id']})
+                events += 2
+        if feed:
+            time.sleep(args.interval * 2)
+            feed.flush()
+        elapsed = time.perf_counter() - started
+
+        user_messages = drain(user_sockets)
+        admin_messages = drain(admin_sockets)
+        results[mode] = {
+            'events': events,
+            'messages_total': user_messages + admin_messages,
+            'messages_per_user_client': round(user_messages / max(1, len(user_sockets)), 2),
+            'messages_per_admin_client': round(admin_messages / max(1, len(admin_sockets)), 2),
+            'duration_s': round(elapsed, 3)
+        }
+
+    web.notify = targeted_notify
+    for sio in user_sockets + admin_sockets:
+        sio.disconnect()
+
+    report = {
+        'benchmark': 'socketio_fanout',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'config': vars(args),
+        'results': results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'mode':<12} {'events':>7} {'messages':>9} {'per user':>9} {'per admin':>10} {'secs':>7}")
+    for mode, stats in results.items():
+        print(f"{mode:<12} {stats['events']:>7} {stats['messages_total']:>9} "
+              f"{stats['messages_per_user_client']:>9} {stats['messages_per_admin_client']:>10} "
+              f"{stats['duration_s']:>7}")
+    print(f"\nResults written to {output}")
+
+    gemini.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the web tier
+Measures import time and memory of `import app` in fresh interpreters, with
+and without torch/diffusers preloaded (the latter is what every web worker
+paid when app.py imported them at module level)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+for name in {preload!r}:
+    __import__(name)
+import app
+elapsed = time.perf_counter() - started
+
+status = {{}}
+with open('/proc/self/status') as f:
+    for line in f:
+        key, _, value = line.partition(':')
+        if key in ('VmRSS', 'VmHWM'):
+            status[key] = int(value.split()[0]) / 1024
+print(json.dumps({{
+    'import_s': elapsed,
+    'rss_mb': status.get('VmRSS'),
+    'peak_rss_mb': status.get('VmHWM'),
+    'torch_loaded': 'torch' in sys.modules,
+    'diffusers_loaded': 'diffusers' in sys.modules,
+    'modules': len(sys.modules)
+}}))
+'''
+
+
+def available(module):
+    code = f"import importlib.util, sys; sys.exit(0 if importlib.util.find_spec({module!r}) else 1)"
+    return subprocess.run([sys.executable, '-c', code]).returncode == 0
+
+
+def measure(preload, runs, workdir):
+    env = dict(os.environ, DATABASE_PATH=os.path.join(workdir, 'database.db'))
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD.format(root=ROOT, preload=preload)],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            return {'error': result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'}
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['process_s'] = wall
+        samples.append(sample)
+
+    return {
+        'runs': runs,
+        'import_s_median': round(statistics.median(s['import_s'] for s in samples), 3),
+        'process_s_median': round(statistics.median(s['process_s'] for s in samples), 3),
+        'rss_mb_median': round(statistics.median(s['rss_mb'] for s in samples), 1),
+        'peak_rss_mb_max': round(max(s['peak_rss_mb'] for s in samples), 1),
+        'torch_loaded': samples[0]['torch_loaded'],
+        'diffusers_loaded': samples[0]['diffusers_loaded'],
+        'modules': samples[0]['modules']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark web-tier startup time and memory')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per variant')
+    parser.add_argument('--output', default='bench-startup.json')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tweet-startup-')
+    results = {'web': measure([], args.runs, workdir)}
+
+    heavy = [name for name in ('torch', 'diffusers') if available(name)]
+    if heavy:
+        results['web_with_' + '_'.join(heavy)] = measure(heavy, args.runs, workdir)
+    else:
+        print("torch/diffusers are not installed; skipping the preloaded comparison")
+
+    report = {
+        'benchmark': 'startup',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'variant':<28} {'import s':>9} {'process s':>10} {'RSS MB':>8} {'torch':>6}")
+    for name, stats in results.items():
+        if 'error' in stats:
+            print(f"{name:<28} error: {stats['error']}")
+            continue
+        print(f"{name:<28} {stats['import_s_median']:>9} {stats['process_s_median']:>10} "
+              f"{stats['rss_mb_median']:>8} {str(stats['torch_loaded']):>6}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generateContent and streamGenerateContent APIs
+Used by the benchmark scripts and tests/; can also be run on its own for offline
+development with GEMINI_API_BASE=http://127.0.0.1:<port>
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        text = body.get('contents', [{}])[0].get('parts', [{}])[0].get('text', '')
+
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.statuses.pop(0) if server.statuses else None
+        try:
+            self._respond(server, body, text, status)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self, server, body, text, status):
+        latency = max(0.0, random.gauss(server.latency, server.jitter))
+        tweet = f"🚀 Benchmark tweet about {text[-60:]} #AI #Bench"
+
+        if status and status != 200:
+            # Scripted failure, answered without the simulated latency
+            self._send(status, {'error': {'code': status, 'message': 'Scripted error'}})
+            return
+
+        if ':streamGenerateContent' in self.path:
+            # First token arrives after a fraction of the full latency, the
+            # rest of the words are spread over the remainder
+            time.sleep(latency * server.first_token_fraction)
+            if random.random() < server.error_rate:
+                self._send(503, {'error': {'code': 503, 'message': 'Simulated overload'}})
+                return
+            self._stream(tweet, latency * (1 - server.first_token_fraction))
+            return
+
+        time.sleep(latency)
+
+        if random.random() < server.error_rate:
+            self._send(503, {'error': {'code': 503, 'message': 'Simulated overload'}})
+            return
+
+        count = max(1, int((body.get('generationConfig') or {}).get('candidateCount', 1)))
+        texts = [tweet] + [f"{tweet} (take {i + 1})" for i in range(1, count)]
+        self._send(200, {
+            'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}} for text in texts]
+        })
+
+    def _stream(self, tweet, duration):
+        words = tweet.split(' ')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(duration / len(words))
+            piece = word if i == 0 else ' ' + word
+            chunk = {'candidates': [{'content': {'parts': [{'text': piece}], 'role': 'model'}}]}
+            data = f"data: {json.dumps(chunk)}\r\n\r\n".encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_gemini(latency=0.2, jitter=0.05, error_rate=0.0, host='127.0.0.1', port=0,
+                      first_token_fraction=0.2):
+    """Serve the stand-in on a daemon thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.first_token_fraction = first_token_fraction
+    # Status codes to answer the next calls with, in order (200 = normal reply)
+    server.statuses = []
+    # Call counters, used by the client tests
+    server.lock = threading.Lock()
+    server.calls = 0
+    server.connections = set()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, name='fake-gemini', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local Gemini stand-in')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.2, help='mean response time in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='std deviation of the response time')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with 503')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_gemini(args.latency, args.jitter, args.error_rate, port=args.port)
+    print(f"Fake Gemini listening on {base_url} (set GEMINI_API_BASE to this URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
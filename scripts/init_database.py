@@ -4,49 +4,33 @@ Database initialization script for AI Tweet Generator
 Run this script to set up the database with sample data
 """
 
-import sqlite3
 import os
+import sys
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
-import json
 import random
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import DATABASE_PATH, connect, init_schema
+from utils.training_log import TrainingLog
+from utils.user_stats import rebuild_user_stats
+
 def create_database():
     """Create database tables and initial data"""
     
-    # Remove existing database
-    if os.path.exists('database.db'):
-        os.remove('database.db')
+    # Remove existing database (and its WAL files)
+    if os.path.exists(DATABASE_PATH):
+        os.remove(DATABASE_PATH)
         print("Removed existing database")
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(DATABASE_PATH + suffix):
+            os.remove(DATABASE_PATH + suffix)
     
-    conn = sqlite3.connect('database.db')
+    conn = connect()
     cursor = conn.cursor()
     
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_admin BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create generated_content table
-    cursor.execute('''
-        CREATE TABLE generated_content (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            prompt TEXT NOT NULL,
-            generated_tweet TEXT NOT NULL,
-            image_url TEXT,
-            is_posted BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+    # Create all tables
+    init_schema(conn)
     
     print("Created database tables")
     
@@ -119,14 +103,13 @@ def create_database():
     print(f"Created {len(sample_prompts)} sample generated content entries")
     
     conn.commit()
+    rebuild_user_stats(conn)
     conn.close()
     
-    # Create training data directory and sample file
-    os.makedirs('training_data', exist_ok=True)
-    
-    training_data = []
+    # Create sample training data log
+    training_log = TrainingLog(directory='training_data', flush_interval=0)
     for i, (prompt, tweet) in enumerate(zip(sample_prompts, sample_tweets)):
-        training_data.append({
+        training_log.append({
             'user_id': (i % 4) + 2,
             'prompt': prompt,
             'generated_tweet': tweet,
@@ -134,10 +117,7 @@ def create_database():
             'timestamp': (datetime.now() - timedelta(days=random.randint(1, 7))).isoformat()
         })
     
-    with open('training_data/generated_data.json', 'w') as f:
-        json.dump(training_data, f, indent=2)
-    
-    print("Created sample training data file")
+    print("Created sample training data log")
     print("\nDatabase initialization complete!")
     print("\nLogin credentials:")
     print("Admin: username='admin', password='admin123'")
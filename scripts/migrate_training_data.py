@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Training data migration script for AI Tweet Generator
+Converts the legacy training_data/generated_data.json array into the
+append-only JSON Lines log used by the app
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.training_log import TrainingLog
+
+def migrate_training_data():
+    """Move legacy training records into the JSON Lines log"""
+    
+    legacy_path = 'training_data/generated_data.json'
+    if not os.path.exists(legacy_path):
+        print("No legacy training data file found")
+        return
+    
+    training_log = TrainingLog(directory='training_data')
+    migrated = training_log.migrate_json_array(legacy_path)
+    
+    print(f"Migrated {migrated} training records")
+    print(f"Legacy file kept as {legacy_path}.migrated")
+
+if __name__ == '__main__':
+    migrate_training_data()
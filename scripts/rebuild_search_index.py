@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Search index backfill script for AI Tweet Generator
+Re-indexes every prompt and tweet in the full-text search index
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import DATABASE_PATH, connect, init_schema
+from utils.search import rebuild_search_index
+
+def backfill_search_index():
+    """Rebuild the search index from generated_content"""
+    
+    if not os.path.exists(DATABASE_PATH):
+        print("No database found to index")
+        return
+    
+    conn = connect()
+    # Creates the index and its triggers on databases that predate them
+    init_schema(conn)
+    started = time.perf_counter()
+    rows = rebuild_search_index(conn)
+    conn.close()
+    
+    print(f"Indexed {rows} content items in {time.perf_counter() - started:.2f}s")
+
+if __name__ == '__main__':
+    backfill_search_index()
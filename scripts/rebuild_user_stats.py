@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+User stats repair script for AI Tweet Generator
+Rebuilds the per-user content counters from generated_content
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import DATABASE_PATH, connect, init_schema
+from utils.user_stats import rebuild_user_stats
+
+def repair_user_stats():
+    """Recompute every user's counters"""
+    
+    if not os.path.exists(DATABASE_PATH):
+        print("No database found to repair")
+        return
+    
+    conn = connect()
+    init_schema(conn)
+    users = rebuild_user_stats(conn)
+    conn.close()
+    
+    print(f"Rebuilt content counters for {users} users")
+
+if __name__ == '__main__':
+    repair_user_stats()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Run several web workers on one host
+Starts N copies of app.py on consecutive ports, all sharing one database,
+one Socket.IO message queue and one SECRET_KEY (so a login made on one
+worker is valid on every other). Put a reverse proxy with sticky sessions
+in front of the ports; see "Multi-worker mode" in the README.
+"""
+
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run several web workers behind one message queue')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--base-port', type=int, default=5001, help='worker i listens on base-port + i')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--message-queue', default=os.getenv('SOCKETIO_MESSAGE_QUEUE'),
+                        help='redis://, amqp:// or sqlite:/// URL (default: sqlite:///socketio-queue.db)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['SOCKETIO_MESSAGE_QUEUE'] = args.message_queue or 'sqlite:///' + os.path.join(ROOT, 'socketio-queue.db')
+    # The debug reloader would start a second copy of every worker
+    env['FLASK_DEBUG'] = 'False'
+    if not env.get('SECRET_KEY'):
+        env['SECRET_KEY'] = secrets.token_hex(32)
+        print("[WARNING] SECRET_KEY is not set; using a random key, so sessions end when the workers stop")
+
+    processes = []
+    for i in range(args.workers):
+        worker_env = dict(env, WORKER_ID=f'web-{i}', HOST=args.host, PORT=str(args.base_port + i))
+        processes.append(subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py')], cwd=ROOT, env=worker_env))
+        print(f"[DEBUG] Started worker web-{i} on {args.host}:{args.base_port + i}")
+
+    def stop(signum=None, frame=None):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        print("[ERROR] A worker exited; stopping the others")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -68,7 +68,12 @@ function connectWebSocket() {
     })
 
     adminSocket.on("user_activity", (data) => {
-      addActivityLog(data.user_id || "System", data.activity, data.type || "info")
+      handleUserActivity(data)
+    })
+
+    // The server batches feed events into one message per interval
+    adminSocket.on("admin_events", (batch) => {
+      batch.events.forEach(({ event, data }) => handleAdminEvent(event, data))
     })
 
     adminSocket.on("system_health_update", (data) => {
@@ -94,6 +99,25 @@ function updateConnectionStatus(connected) {
   }
 }
 
+// Dispatch one event from a coalesced admin feed batch
+function handleAdminEvent(event, data) {
+  switch (event) {
+    case "user_update":
+      handleUserUpdate(data)
+      break
+    case "content_update":
+      handleContentUpdate(data)
+      break
+    case "user_activity":
+      handleUserActivity(data)
+      break
+  }
+}
+
+function handleUserActivity(data) {
+  addActivityLog(data.user_id || "System", data.activity, data.type || "info")
+}
+
 // Handle user updates
 function handleUserUpdate(data) {
   console.log("👤 User Update:", data)
@@ -120,7 +144,11 @@ function handleContentUpdate(data) {
 
   switch (data.action) {
     case "new_content":
-      addActivityLog(data.username, "Created new content", "success")
+      addActivityLog(
+        data.username,
+        data.count > 1 ? `Created ${data.count} tweets in a batch` : "Created new content",
+        "success",
+      )
       updateContentCount()
       break
     case "content_published":
@@ -211,6 +239,15 @@ function updateSystemHealthData(data) {
     document.getElementById("aiQueue").textContent = data.ai.queue
     document.getElementById("aiLatency").textContent = data.ai.latency
     document.getElementById("aiErrorRate").textContent = data.ai.errorRate
+    const aiCircuit = document.getElementById("aiCircuit")
+    if (aiCircuit && data.ai.circuit) {
+      aiCircuit.textContent = data.ai.circuit.replace("_", "-")
+    }
+    const aiAdmission = document.getElementById("aiAdmission")
+    if (aiAdmission && data.ai.admission) {
+      const rejected = Object.values(data.ai.admission.rejected).reduce((sum, n) => sum + n, 0)
+      aiAdmission.textContent = `${data.ai.admission.pending}/${data.ai.admission.limits.max_pending} pending, ${rejected} rejected`
+    }
   }
 
   if (data.server) {
@@ -52,6 +52,7 @@ function initializeUserSocket() {
 
     userSocket.on("connect", () => {
       console.log("User connected to real-time server")
+      userSocket.emit("join_user", {})
       logUserActivity("Connected to real-time server", "success")
       updateUserStatus("online")
     })
@@ -75,9 +76,59 @@ function initializeUserSocket() {
       logUserActivity("New content generated", "success")
       updateUserStats()
     })
+
+    // Changes to this user's own content, e.g. removed by an admin
+    userSocket.on("content_update", (data) => {
+      if (data.action === "content_deleted") {
+        loadUserContent()
+      }
+    })
+
+    // Images are generated in the background and delivered when ready
+    userSocket.on("image_ready", (data) => {
+      handleImageReady(data)
+    })
+  }
+}
+
+// Show a finished background image job in the preview
+function handleImageReady(data) {
+  if (data.content_id !== currentContentId) {
+    loadUserContent()
+    return
+  }
+
+  const imagePreviewContent = document.getElementById("imagePreviewContent")
+  if (data.status === "preview" && data.image_url) {
+    // A quick low-step render; the full-quality image replaces it
+    if (imagePreviewContent) {
+      imagePreviewContent.innerHTML = renderPreviewImage(data.image_url)
+    }
+    logUserActivity("Image preview ready, refining...", "info")
+  } else if (data.status === "done" && data.image_url) {
+    if (imagePreviewContent) {
+      imagePreviewContent.innerHTML = `
+        <img src="${data.image_url}" alt="Generated image" style="max-width: 100%; height: auto; border-radius: 8px;">
+      `
+    }
+    showNotification("Image generated successfully!", "success")
+    logUserActivity("Image generated successfully", "success")
+  } else {
+    if (imagePreviewContent) {
+      imagePreviewContent.innerHTML = `<p style="color: var(--text-muted);">Image generation failed</p>`
+    }
+    showNotification(data.error || "Image generation failed", "error")
+    logUserActivity("Image generation failed", "error")
   }
 }
 
+function renderPreviewImage(imageUrl) {
+  return `
+    <img src="${imageUrl}" alt="Image preview" style="max-width: 100%; height: auto; border-radius: 8px; opacity: 0.85;">
+    <p style="color: var(--text-muted); font-size: 0.875rem;"><i class="fas fa-spinner fa-spin"></i> Refining image...</p>
+  `
+}
+
 // User Activity Logger
 function logUserActivity(message, type = "info") {
   const activityFeed = document.getElementById("userActivityFeed")
@@ -175,6 +226,81 @@ function animateUserCounterUpdate(elementId, newValue) {
   }
 }
 
+// Show the tweet text as it streams in
+function renderStreamingTweet(text) {
+  const tweetPreviewContent = document.getElementById("tweetPreviewContent")
+  if (!tweetPreviewContent) return
+
+  let textElement = document.getElementById("streamingTweetText")
+  if (!textElement) {
+    tweetPreviewContent.innerHTML = `
+      <div style="text-align: left; color: var(--text-primary);">
+        <div style="display: flex; align-items: center; gap: 0.5rem; margin-bottom: 1rem;">
+          <i class="fas fa-twitter" style="color: #1da1f2;"></i>
+          <strong>Generating Tweet...</strong>
+        </div>
+        <p id="streamingTweetText" style="margin: 0; line-height: 1.5;"></p>
+      </div>
+    `
+    textElement = document.getElementById("streamingTweetText")
+  }
+  textElement.textContent = text
+}
+
+// POST to the streaming endpoint and resolve with the final 'done' payload
+async function streamGenerateTweet(formData, onText) {
+  const response = await fetch("/generate-tweet/stream", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(formData),
+  })
+
+  const contentType = response.headers.get("Content-Type") || ""
+  if (!contentType.includes("text/event-stream") || !response.body) {
+    return response.json()
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  let text = ""
+  let result = null
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let eventName = "message"
+      let data = ""
+      rawEvent.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) eventName = line.slice(6).trim()
+        else if (line.startsWith("data:")) data += line.slice(5).trim()
+      })
+      const payload = data ? JSON.parse(data) : {}
+
+      if (eventName === "token") {
+        text += payload.text
+        onText(text)
+      } else if (eventName === "replace") {
+        text = payload.text
+        onText(text)
+      } else if (eventName === "done" || eventName === "error") {
+        result = payload
+      }
+    }
+  }
+
+  return result || { success: false, message: "Stream ended unexpectedly" }
+}
+
 // Main function to generate tweet from form
 async function generateTweetFromForm() {
   const promptInput = document.getElementById("promptInput")
@@ -209,19 +335,13 @@ async function generateTweetFromForm() {
       includeHashtags: document.getElementById("includeHashtags")?.checked || true,
       includeEmojis: document.getElementById("includeEmojis")?.checked || true,
       generateImage: document.getElementById("generateImage")?.checked || true,
+      quality: document.getElementById("imageQuality")?.value || undefined,
+      preview_first: document.getElementById("previewFirst")?.checked || false,
     }
 
     console.log("Sending request with data:", formData)
 
-    const response = await fetch("/generate-tweet", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify(formData),
-    })
-
-    const result = await response.json()
+    const result = await streamGenerateTweet(formData, renderStreamingTweet)
     console.log("Received response:", result)
 
     if (result.success) {
@@ -241,10 +361,22 @@ async function generateTweetFromForm() {
 
       // Update image preview
       const imagePreviewContent = document.getElementById("imagePreviewContent")
-      if (result.image_url && imagePreviewContent) {
+      if (result.image_status === "preview" && result.image_url && imagePreviewContent) {
+        imagePreviewContent.innerHTML = renderPreviewImage(result.image_url)
+      } else if (result.image_url && imagePreviewContent) {
         imagePreviewContent.innerHTML = `
           <img src="${result.image_url}" alt="Generated image" style="max-width: 100%; height: auto; border-radius: 8px;">
         `
+      } else if (result.image_status === "failed" && imagePreviewContent) {
+        imagePreviewContent.innerHTML = `<p style="color: var(--text-muted);">Image generation failed</p>`
+      } else if (result.image_status === "throttled" && imagePreviewContent) {
+        // The tweet was saved; only the image was refused
+        const reason = result.image_throttle?.message || "Image generation is busy right now."
+        imagePreviewContent.innerHTML = `<p style="color: var(--text-muted);">No image this time. ${reason}</p>`
+      } else if (result.image_job_id && imagePreviewContent) {
+        imagePreviewContent.innerHTML = `
+          <p style="color: var(--text-muted);"><i class="fas fa-spinner fa-spin"></i> Generating image...</p>
+        `
       }
 
       // Show action buttons
@@ -255,7 +387,9 @@ async function generateTweetFromForm() {
 
       currentContentId = result.content_id
 
-      showNotification("Tweet and image generated successfully!", "success")
+      const imagePending =
+        result.image_job_id && (!result.image_url || result.image_status === "preview") && result.image_status !== "failed"
+      showNotification(imagePending ? "Tweet generated! Image is on its way..." : "Tweet generated successfully!", "success")
       logUserActivity("Tweet generated successfully", "success")
       updateUserStats()
       addToRecentActivity("Tweet Created", "success")
@@ -443,17 +577,82 @@ function refreshUserData() {
   }, 1000)
 }
 
-// Load user's generated content
-async function loadUserContent() {
+// Build a content library card; search results carry highlighted text
+function renderContentCard(item) {
+  const card = document.createElement('div')
+  card.className = 'card hover-lift'
+  card.style.cssText = 'background: var(--bg-secondary); border: 1px solid var(--border-color); border-radius: var(--radius-lg); padding: 1.5rem; display: grid; grid-template-columns: auto 1fr; gap: 2rem; align-items: start;'
+
+  const imageHtml = item.image_url ? `
+    <div style="width: 150px; height: 150px; border-radius: var(--radius-lg); overflow: hidden; background: var(--bg-primary);">
+      <img src="${item.image_url}" alt="Generated image" style="width: 100%; height: 100%; object-fit: cover;">
+    </div>
+  ` : `
+    <div style="width: 150px; height: 150px; border-radius: var(--radius-lg); background: var(--bg-primary); display: flex; align-items: center; justify-content: center; color: var(--text-muted);">
+      <i class="fas fa-image" style="font-size: 2rem; opacity: 0.3;"></i>
+    </div>
+  `
+
+  const statusBadge = item.is_posted ? 
+    '<span class="badge badge-success" style="font-size: 0.75rem;">Published</span>' : 
+    '<span class="badge badge-warning" style="font-size: 0.75rem;">Draft</span>'
+
+  const createdDate = new Date(item.created_at).toLocaleDateString('en-US', {
+    year: 'numeric',
+    month: 'short',
+    day: 'numeric',
+    hour: '2-digit',
+    minute: '2-digit'
+  })
+
+  card.innerHTML = `
+    ${imageHtml}
+    <div style="display: flex; flex-direction: column; gap: 1rem;">
+      <div>
+        <div style="display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;">
+          ${statusBadge}
+          <span style="font-size: 0.75rem; color: var(--text-muted);">${createdDate}</span>
+        </div>
+        <h3 style="font-size: 1rem; font-weight: 600; color: var(--text-primary); margin-bottom: 0.5rem; line-height: 1.4; display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical; overflow: hidden;">
+          ${item.prompt_html || item.prompt}
+        </h3>
+        <p style="font-size: 0.875rem; color: var(--text-secondary); line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden; margin-bottom: 1rem;">
+          ${item.tweet_html || item.tweet}
+        </p>
+      </div>
+      <div style="display: flex; gap: 0.5rem; flex-wrap: wrap;">
+        <button onclick="copyContentTweet(this, '${item.tweet.replace(/'/g, "\\'")}')" class="btn btn-secondary" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
+          <i class="fas fa-copy"></i> Copy Tweet
+        </button>
+        ${item.image_url ? `<button onclick="downloadContentImage(this, '${item.image_url}')" class="btn btn-info" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
+          <i class="fas fa-download"></i> Download Image
+        </button>` : ''}
+        ${!item.is_posted ? `<button onclick="publishContentItem(${item.id}, this)" class="btn btn-success" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
+          <i class="fas fa-share"></i> Publish
+        </button>` : ''}
+        <button onclick="deleteContentItem(${item.id}, this)" class="btn btn-danger" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
+          <i class="fas fa-trash"></i> Delete
+        </button>
+      </div>
+    </div>
+  `
+
+  return card
+}
+
+// Load user's generated content, one page at a time
+async function loadUserContent(cursor = null) {
   const contentGrid = document.getElementById('myContentGrid')
   if (!contentGrid) return
 
   try {
-    const response = await fetch('/api/user-content')
+    const url = cursor ? `/api/user-content?cursor=${encodeURIComponent(cursor)}` : '/api/user-content'
+    const response = await fetch(url)
     const result = await response.json()
 
     if (result.success && result.content.length > 0) {
-      contentGrid.innerHTML = ''
+      document.getElementById('loadMoreContent')?.remove()
+      if (!cursor) contentGrid.innerHTML = ''
       
       // Update content tab count
       const contentTabCount = document.getElementById('contentTabCount')
@@ -474,69 +673,20 @@ async function loadUserContent() {
 
       // Create content cards
       result.content.forEach(item => {
-        const card = document.createElement('div')
-        card.className = 'card hover-lift'
-        card.style.cssText = 'background: var(--bg-secondary); border: 1px solid var(--border-color); border-radius: var(--radius-lg); padding: 1.5rem; display: grid; grid-template-columns: auto 1fr; gap: 2rem; align-items: start;'
-
-        const imageHtml = item.image_url ? `
-          <div style="width: 150px; height: 150px; border-radius: var(--radius-lg); overflow: hidden; background: var(--bg-primary);">
-            <img src="${item.image_url}" alt="Generated image" style="width: 100%; height: 100%; object-fit: cover;">
-          </div>
-        ` : `
-          <div style="width: 150px; height: 150px; border-radius: var(--radius-lg); background: var(--bg-primary); display: flex; align-items: center; justify-content: center; color: var(--text-muted);">
-            <i class="fas fa-image" style="font-size: 2rem; opacity: 0.3;"></i>
-          </div>
-        `
-
-        const statusBadge = item.is_posted ? 
-          '<span class="badge badge-success" style="font-size: 0.75rem;">Published</span>' : 
-          '<span class="badge badge-warning" style="font-size: 0.75rem;">Draft</span>'
-
-        const createdDate = new Date(item.created_at).toLocaleDateString('en-US', {
-          year: 'numeric',
-          month: 'short',
-          day: 'numeric',
-          hour: '2-digit',
-          minute: '2-digit'
-        })
-
-        card.innerHTML = `
-          ${imageHtml}
-          <div style="display: flex; flex-direction: column; gap: 1rem;">
-            <div>
-              <div style="display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;">
-                ${statusBadge}
-                <span style="font-size: 0.75rem; color: var(--text-muted);">${createdDate}</span>
-              </div>
-              <h3 style="font-size: 1rem; font-weight: 600; color: var(--text-primary); margin-bottom: 0.5rem; line-height: 1.4; display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical; overflow: hidden;">
-                ${item.prompt}
-              </h3>
-              <p style="font-size: 0.875rem; color: var(--text-secondary); line-height: 1.5; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden; margin-bottom: 1rem;">
-                ${item.tweet}
-              </p>
-            </div>
-            <div style="display: flex; gap: 0.5rem; flex-wrap: wrap;">
-              <button onclick="copyContentTweet(this, '${item.tweet.replace(/'/g, "\\'")}')" class="btn btn-secondary" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
-                <i class="fas fa-copy"></i> Copy Tweet
-              </button>
-              ${item.image_url ? `<button onclick="downloadContentImage(this, '${item.image_url}')" class="btn btn-info" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
-                <i class="fas fa-download"></i> Download Image
-              </button>` : ''}
-              ${!item.is_posted ? `<button onclick="publishContentItem(${item.id}, this)" class="btn btn-success" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
-                <i class="fas fa-share"></i> Publish
-              </button>` : ''}
-              <button onclick="deleteContentItem(${item.id}, this)" class="btn btn-danger" style="font-size: 0.75rem; padding: 0.5rem 1rem;">
-                <i class="fas fa-trash"></i> Delete
-              </button>
-            </div>
-          </div>
-        `
-
-        contentGrid.appendChild(card)
+        contentGrid.appendChild(renderContentCard(item))
       })
 
-      logUserActivity(`Loaded ${result.total} content items`, 'success')
-    } else {
+      if (result.has_more) {
+        const loadMore = document.createElement('button')
+        loadMore.id = 'loadMoreContent'
+        loadMore.className = 'btn btn-secondary'
+        loadMore.innerHTML = '<i class="fas fa-chevron-down"></i> Load more'
+        loadMore.onclick = () => loadUserContent(result.next_cursor)
+        contentGrid.appendChild(loadMore)
+      }
+
+      logUserActivity(`Loaded ${contentGrid.querySelectorAll('.card').length} of ${result.total} content items`, 'success')
+    } else if (!cursor) {
       contentGrid.innerHTML = `
         <div style="text-align: center; padding: 3rem; color: var(--text-muted);">
           <i class="fas fa-file-alt" style="font-size: 3rem; margin-bottom: 1rem; opacity: 0.3;"></i>
@@ -551,6 +701,73 @@ async function loadUserContent() {
   }
 }
 
+// Full-text search over the user's prompts and tweets, best matches first
+async function searchUserContent(query, cursor = null) {
+  const contentGrid = document.getElementById('myContentGrid')
+  if (!contentGrid) return
+
+  const filters = {
+    published: '&is_posted=true',
+    draft: '&is_posted=false',
+    'with-images': '&has_image=true',
+  }
+  const filter = filters[document.getElementById('myContentFilter')?.value] || ''
+
+  try {
+    let url = `/api/search?q=${encodeURIComponent(query)}${filter}`
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`
+    const response = await fetch(url)
+    const result = await response.json()
+    if (!result.success) return
+
+    document.getElementById('loadMoreContent')?.remove()
+    if (!cursor) contentGrid.innerHTML = ''
+    result.results.forEach(item => {
+      contentGrid.appendChild(renderContentCard(item))
+    })
+
+    if (!cursor && result.results.length === 0) {
+      contentGrid.innerHTML = `
+        <div style="text-align: center; padding: 3rem; color: var(--text-muted);">
+          <i class="fas fa-search" style="font-size: 3rem; margin-bottom: 1rem; opacity: 0.3;"></i>
+          <p style="font-size: 1.1rem;">No content matches your search</p>
+        </div>
+      `
+    }
+
+    if (result.has_more) {
+      const loadMore = document.createElement('button')
+      loadMore.id = 'loadMoreContent'
+      loadMore.className = 'btn btn-secondary'
+      loadMore.innerHTML = '<i class="fas fa-chevron-down"></i> Load more'
+      loadMore.onclick = () => searchUserContent(query, result.next_cursor)
+      contentGrid.appendChild(loadMore)
+    }
+  } catch (error) {
+    console.error('Error searching content:', error)
+    showNotification('Search failed', 'error')
+  }
+}
+
+function initializeContentSearch() {
+  const searchInput = document.getElementById('myContentSearch')
+  const filterSelect = document.getElementById('myContentFilter')
+  if (!searchInput) return
+
+  let debounce = null
+  const run = () => {
+    const query = searchInput.value.trim()
+    query ? searchUserContent(query) : loadUserContent()
+  }
+  searchInput.addEventListener('input', () => {
+    clearTimeout(debounce)
+    debounce = setTimeout(run, 250)
+  })
+  filterSelect?.addEventListener('change', () => {
+    if (searchInput.value.trim()) run()
+  })
+}
+
 // Tab functionality
 function showTab(tabName, group) {
   // Hide all tab contents for this group
@@ -595,6 +812,7 @@ document.addEventListener("DOMContentLoaded", () => {
   // Start real-time updates
   updateUserStats()
   loadUserContent()
+  initializeContentSearch()
 
   // Real-time updates
   setInterval(updateUserStats, 15000)
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from fake_gemini import start_fake_gemini
+
+
+@pytest.fixture
+def fake_gemini():
+    """A local Gemini stand-in answering at once; yields (server, base_url)"""
+    server, base_url = start_fake_gemini(latency=0.0, jitter=0.0)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def web(tmp_path_factory):
+    """The app module on a throwaway database; image jobs are queued but never run"""
+    workdir = tmp_path_factory.mktemp('app')
+    os.environ.update(DATABASE_PATH=str(workdir / 'database.db'), IMAGE_WORKER_PROCESSES='0', TWEET_API_KEY='',
+                      GENERATE_DEADLINE='0.1')
+    # Test modules may have imported utils.db, and read its path, already
+    from utils import db
+    db.DATABASE_PATH = os.environ['DATABASE_PATH']
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    import app as web
+    web.init_db()
+    web.app.config['TESTING'] = True
+    yield web
+    # Buffered training records are written relative to the working directory
+    web.training_log.flush()
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def login(web):
+    """Register and log in a new user; returns (test client, user id)"""
+    count = 0
+
+    def login(prefix='user'):
+        nonlocal count
+        count += 1
+        username = f'{prefix}{count}_{os.urandom(3).hex()}'
+        client = web.app.test_client()
+        client.post('/register', json={'username': username, 'email': f'{username}@example.com', 'password': 'pw'})
+        assert client.post('/login', json={'username': username, 'password': 'pw'}).get_json()['success']
+        user_id = web.get_db().execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()[0]
+        return client, user_id
+
+    return login
+
+
+@pytest.fixture
+def admin(web):
+    """A test client logged in as the default admin"""
+    client = web.app.test_client()
+    assert client.post('/login', json={'username': 'admin', 'password': 'admin123'}).get_json()['success']
+    return client
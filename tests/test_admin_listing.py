@@ -0,0 +1,94 @@
+import pytest
+
+from utils.db import transaction
+
+
+def add_content(user_id, created_at, is_posted=False, image_url=None):
+    with transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO generated_content (user_id, prompt, generated_tweet, image_url, is_posted, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, 'coffee', 'tweet', image_url, is_posted, created_at))
+        return cursor.lastrowid
+
+
+def read_all_pages(client, path, key, **params):
+    rows, cursor = [], None
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        data = client.get(path, query_string=query).get_json()
+        assert data['success'], data
+        rows += data[key]
+        cursor = data['next_cursor']
+        if not cursor:
+            return rows
+
+
+@pytest.fixture
+def owner(login):
+    """A user with content spread over three days, several rows per timestamp"""
+    _, user_id = login()
+    ids = []
+    for day in ('2024-03-01', '2024-03-02', '2024-03-03'):
+        for i in range(4):
+            ids.append(add_content(user_id, f'{day} 09:00:00', is_posted=i % 2 == 0,
+                                   image_url='/images/x.png' if i == 0 else None))
+    return user_id, ids
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_content_pages_follow_created_at_then_id(web, admin, owner, order):
+    user_id, ids = owner
+
+    rows = read_all_pages(admin, '/api/content', 'content', user_id=user_id, limit=5, order=order)
+
+    keys = [(row['created_at'], row['id']) for row in rows]
+    assert keys == sorted(keys, reverse=order == 'desc')
+    assert sorted(row['id'] for row in rows) == sorted(ids)
+
+
+def test_content_filters(web, admin, owner):
+    user_id, _ = owner
+
+    def count(**params):
+        return len(read_all_pages(admin, '/api/content', 'content', user_id=user_id, limit=5, **params))
+
+    assert count(is_posted='true') == 6
+    assert count(has_image='yes') == 3
+    assert count(date_from='2024-03-02', date_to='2024-03-02') == 4
+    assert count(has_image='false', is_posted='false') == 6
+
+
+def test_users_page_by_username_without_repeats(web, admin, login):
+    for _ in range(5):
+        login('listing')
+
+    rows = read_all_pages(admin, '/api/users', 'users', q='listing', sort='username', order='desc', limit=2)
+
+    names = [row['username'] for row in rows]
+    assert len(names) == 5
+    assert names == sorted(names, reverse=True)
+
+
+def test_users_page_by_created_at_splits_ties_by_id(web, admin, login):
+    for _ in range(5):
+        login('samesecond')
+
+    rows = read_all_pages(admin, '/api/users', 'users', q='samesecond', sort='created_at', limit=2)
+
+    keys = [(row['created_at'], row['id']) for row in rows]
+    assert len(keys) == 5
+    assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize('path, params', [('/api/users', {'sort': 'email'}), ('/api/content', {'sort': 'prompt'}),
+                                          ('/api/content', {'cursor': 'bogus'})])
+def test_bad_listing_parameters_are_rejected(web, admin, path, params):
+    assert admin.get(path, query_string=params).status_code == 400
+
+
+def test_listings_are_admin_only(web, login):
+    client, _ = login()
+
+    assert client.get('/api/content').status_code == 302
+    assert client.get('/api/users').status_code == 302
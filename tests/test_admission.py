@@ -0,0 +1,152 @@
+import math
+
+import pytest
+
+from utils.admission import AdmissionController, TokenBucket
+from utils.image_jobs import ImageJobQueue
+
+
+def test_bucket_refills_at_its_rate_up_to_burst():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    start = bucket.updated
+    bucket.take(2)
+
+    assert bucket.wait_time(1, start) == 1.0
+    assert bucket.wait_time(1, start + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, start + 1.0) == 0.0
+    assert bucket.wait_time(2, start + 100) == 0.0
+    assert bucket.tokens == 2
+
+
+def test_bucket_cannot_grant_more_than_burst():
+    bucket = TokenBucket(rate=1.0, burst=2)
+
+    assert bucket.wait_time(3) == math.inf
+
+
+def test_bucket_refund_is_capped_at_burst():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    bucket.take(1)
+    bucket.refund(5)
+
+    assert bucket.tokens == 2
+
+
+def make_controller(**kwargs):
+    options = dict(user_rate=60, user_burst=2, global_rate=0, global_burst=1, max_pending=0)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_user_rate_rejects_with_retry_after():
+    controller = make_controller()
+
+    assert controller.admit('alice', 2).admitted
+    decision = controller.admit('alice')
+
+    assert not decision.admitted
+    assert decision.reason == 'user_rate'
+    assert decision.to_dict()['retry_after'] == 1
+    assert controller.admit('bob').admitted
+
+
+def test_refund_restores_the_user_and_global_budget():
+    controller = make_controller(global_rate=60, global_burst=2)
+    assert controller.admit('alice', 2).admitted
+
+    controller.refund('alice', 2)
+
+    assert controller.admitted == 0
+    assert controller.admit('alice', 2).admitted
+
+
+def test_queue_cap_reports_position():
+    controller = make_controller(max_pending=3, pending=lambda: 3)
+
+    decision = controller.admit('alice')
+
+    assert decision.reason == 'queue_full'
+    assert decision.queue_position == 4
+
+
+@pytest.fixture
+def admission(web, monkeypatch):
+    """A fresh controller and an unstarted one-slot job queue for the app"""
+    jobs = ImageJobQueue(lambda prompt, preset: None, max_queued=1)
+    controller = make_controller(max_pending=0, pending=jobs.pending)
+    monkeypatch.setattr(web, 'image_jobs', jobs)
+    monkeypatch.setattr(web, 'image_admission', controller)
+    return controller
+
+
+def test_throttled_image_still_returns_the_tweet(web, login, admission):
+    client, user_id = login()
+    admission.admit(user_id, 2)
+
+    response = client.post('/generate-tweet', json={'prompt': 'coffee'})
+
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['tweet'] and data['content_id']
+    assert data['image_status'] == 'throttled'
+    assert data['image_throttle']['reason'] == 'user_rate'
+
+
+def test_image_required_fails_fast_with_retry_after(web, login, admission):
+    client, user_id = login()
+    admission.admit(user_id, 2)
+
+    response = client.post('/generate-tweet', json={'prompt': 'coffee', 'image_required': True})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['reason'] == 'user_rate'
+
+
+def test_refused_batch_gets_429_before_any_work(web, login, admission):
+    client, user_id = login()
+    admission.admit(user_id, 1)
+
+    response = client.post('/api/generate-batch', json={'items': [{'prompt': 'a', 'image': True}] * 2})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert web.read_user_stats(user_id)['total'] == 0
+
+
+def test_full_job_queue_refunds_the_admission(web, login, admission):
+    client, user_id = login()
+
+    statuses = [
+        client.post('/generate-tweet', json={'prompt': f'coffee {i}'}).get_json()['image_status']
+        for i in range(3)
+    ]
+
+    # One job fills the queue; the rest are refused by the queue, not the
+    # rate limit, because their admission was handed back
+    assert statuses == ['queued', 'rejected', 'rejected']
+    assert admission.admitted == 1
+
+
+@pytest.mark.parametrize('value, renders', [(False, 1), ('false', 1), ('0', 1), (True, 2), ('on', 2)])
+def test_preview_first_is_charged_as_parsed(web, login, monkeypatch, value, renders):
+    jobs = ImageJobQueue(lambda prompt, preset: None, max_queued=4, preview_preset=web.PREVIEW_PRESET)
+    controller = make_controller(user_burst=4, pending=jobs.pending)
+    monkeypatch.setattr(web, 'image_jobs', jobs)
+    monkeypatch.setattr(web, 'image_admission', controller)
+    client, _ = login()
+
+    response = client.post('/generate-tweet', json={'prompt': 'coffee', 'quality': 'high', 'preview_first': value})
+
+    assert response.status_code == 200
+    assert controller.admitted == renders
+
+
+@pytest.mark.parametrize('value', ['maybe', 2, None])
+def test_invalid_preview_first_is_rejected(web, login, value):
+    client, _ = login()
+
+    response = client.post('/generate-tweet', json={'prompt': 'coffee', 'preview_first': value})
+
+    assert response.status_code == 400
+    assert 'preview_first' in response.get_json()['message']
@@ -0,0 +1,122 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cache, tweet_cache
+from utils.cache import SingleFlight, TTLCache
+from utils.tweet_cache import TweetCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock for the cache module; advance with clock[0] += seconds"""
+    now = [1000.0]
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    memory = TTLCache(ttl=10)
+    memory.set('a', 1)
+    memory.set('b', 2, ttl=30)
+
+    clock[0] += 11
+
+    assert memory.get('a') is None
+    assert memory.get('b') == 2
+    assert memory.stats()['hits'] == 1 and memory.stats()['misses'] == 1
+
+
+def test_ttl_zero_never_expires(clock):
+    memory = TTLCache(ttl=0)
+    memory.set('a', 1)
+
+    clock[0] += 10 ** 6
+
+    assert memory.get('a') == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    memory = TTLCache(max_size=2)
+    memory.set('a', 1)
+    memory.set('b', 2)
+    memory.get('a')
+
+    memory.set('c', 3)
+
+    assert memory.get('b') is None
+    assert memory.get('a') == 1 and memory.get('c') == 3
+    assert memory.stats()['evictions'] == 1
+
+
+def test_single_flight_shares_one_call():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'tweet'
+
+    def caller():
+        results.append(flights.do('key', slow))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    threads[0].start()
+    started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    while flights.coalesced < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['tweet'] * 5
+
+
+def test_single_flight_passes_errors_on_and_forgets_the_call():
+    flights = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flights.do('key', lambda: (_ for _ in ()).throw(ValueError('upstream down')))
+
+    assert flights.do('key', lambda: 'retry') == 'retry'
+
+
+def test_cache_key_ignores_case_and_spacing_but_not_settings():
+    assert make_cache_key('Coffee   Shop ') == make_cache_key('coffee shop')
+    assert make_cache_key('coffee', {'temperature': 0.9}) != make_cache_key('coffee', {'temperature': 0.2})
+
+
+def test_tweets_are_cached_but_failures_are_not():
+    tweets = TweetCache()
+    answers = iter([None, 'fresh tweet'])
+
+    assert tweets.get_or_generate('coffee', {}, lambda: next(answers)) is None
+    assert tweets.get_or_generate('coffee', {}, lambda: next(answers)) == 'fresh tweet'
+    assert tweets.get_or_generate('Coffee', {}, lambda: 'not called') == 'fresh tweet'
+    assert tweets.upstream_calls == 2
+
+
+def test_persisted_tweets_survive_a_restart(web):
+    TweetCache(persist=True).get_or_generate('restart proof', {}, lambda: 'saved tweet')
+
+    restarted = TweetCache(persist=True)
+
+    assert restarted.lookup('restart proof', {}) == 'saved tweet'
+    assert restarted.stats()['persistent_hits'] == 1
+
+
+def test_expired_persisted_tweets_are_regenerated(web, monkeypatch):
+    TweetCache(ttl=60, persist=True).get_or_generate('stale prompt', {}, lambda: 'old tweet')
+
+    later = time.time() + 120
+    monkeypatch.setattr(tweet_cache, 'time', SimpleNamespace(time=lambda: later))
+
+    assert TweetCache(ttl=60, persist=True).get_or_generate('stale prompt', {}, lambda: 'new tweet') == 'new tweet'
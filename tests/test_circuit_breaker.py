@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record(0.1, ok=False)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_until_enough_calls(clock):
+    breaker = CircuitBreaker('test', min_calls=4, failure_threshold=0.5)
+
+    for _ in range(3):
+        breaker.record(0.1, ok=False)
+
+    assert breaker.state == CLOSED
+    breaker.record(0.1, ok=True)
+    assert breaker.state == OPEN
+
+
+def test_failure_rate_below_threshold_keeps_it_closed(clock):
+    breaker = CircuitBreaker('test', min_calls=4, failure_threshold=0.5)
+
+    for ok in (True, True, False, True, True, False):
+        breaker.record(0.1, ok=ok)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()['failure_rate'] == round(2 / 6, 3)
+
+
+def test_slow_calls_open_it(clock):
+    breaker = CircuitBreaker('test', min_calls=2, slow_call_seconds=1, slow_call_threshold=0.5)
+
+    breaker.record(0.2)
+    breaker.record(1.5)
+
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_short_circuits_until_cool_down(clock):
+    breaker = CircuitBreaker('test', min_calls=2, open_seconds=30)
+    open_breaker(breaker)
+
+    assert not breaker.allow()
+    assert not breaker.allow()
+    clock.value += 29
+    assert breaker.stats()['retry_in'] == 1.0
+    assert not breaker.allow()
+
+    stats = breaker.stats()
+    assert stats['short_circuited'] == 3
+    assert stats['times_opened'] == 1
+    clock.value += 1
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker('test', min_calls=2, open_seconds=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(0.1, ok=True)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()['window_calls'] == 0
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize('seconds, ok', [(0.1, False), (10, True)])
+def test_half_open_failure_or_slow_trial_reopens(clock, seconds, ok):
+    breaker = CircuitBreaker('test', min_calls=2, slow_call_seconds=5, open_seconds=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    assert breaker.allow()
+    breaker.record(seconds, ok=ok)
+
+    assert breaker.state == OPEN
+    assert breaker.stats()['times_opened'] == 2
+    assert not breaker.allow()
+
+
+def test_outcomes_recorded_while_open_are_ignored(clock):
+    breaker = CircuitBreaker('test', min_calls=2, open_seconds=30)
+    open_breaker(breaker)
+
+    breaker.record(0.1, ok=True)
+
+    assert breaker.state == OPEN
+    assert breaker.stats()['window_calls'] == 0
+
+
+def test_open_breaker_skips_gemini(web, monkeypatch, clock):
+    calls = []
+    monkeypatch.setattr(web, 'get_gemini_client', lambda api_key: calls.append(api_key))
+    monkeypatch.setattr(web, 'gemini_breaker', CircuitBreaker('gemini', min_calls=1))
+    web.gemini_breaker.record(0.1, ok=False)
+
+    assert web.request_tweets_from_gemini('a prompt', 'key') == []
+    assert calls == []
+    assert web.gemini_breaker.stats()['short_circuited'] == 1
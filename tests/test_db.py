@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils import db
+
+
+def in_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_released_connections_are_reused(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    before = db.open_connections()
+    seen = []
+
+    def request():
+        seen.append(db.get_db(path))
+        db.close_db()
+
+    for _ in range(5):
+        in_threads(1, request)
+
+    assert len(set(map(id, seen))) == 1
+    assert db.open_connections() == before + 1
+
+
+def test_pool_closes_connections_beyond_its_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'POOL_SIZE', 2)
+    path = str(tmp_path / 'pool.db')
+    before = db.open_connections()
+    barrier = threading.Barrier(6)
+
+    def request():
+        db.get_db(path).execute('SELECT 1')
+        barrier.wait()
+        db.close_db()
+
+    in_threads(6, request)
+
+    assert db.open_connections() == before + 2
+
+
+def test_released_connection_is_rolled_back(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    conn = db.get_db(path)
+    conn.execute('CREATE TABLE t (x)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    db.close_db()
+
+    assert db.get_db(path).execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    db.close_db()
+
+
+def test_requests_do_not_leak_connections(web, login):
+    client, _ = login()
+    client.get('/api/user-stats')
+    before = db.open_connections()
+
+    in_threads(20, lambda: client.get('/api/user-stats'))
+
+    assert db.open_connections() <= before + db.POOL_SIZE
+
+
+def old_database(path, version):
+    """A database as an earlier release left it: base schema plus the first version migrations"""
+    conn = sqlite3.connect(path)
+    for statement in db.SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO users (username, email, password_hash) VALUES ('old', 'old@example.com', 'x')")
+    conn.execute("INSERT INTO generated_content (user_id, prompt, generated_tweet, is_posted) VALUES (1, 'p', 't', 1)")
+    conn.commit()
+    for statements in db.MIGRATIONS[:version]:
+        for statement in statements:
+            conn.execute(statement)
+    conn.execute(f'PRAGMA user_version = {version}')
+    conn.commit()
+    return conn
+
+
+def schema_of(conn):
+    return sorted(conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'content_fts_%'"
+    ).fetchall())
+
+
+def test_fresh_database_reaches_the_latest_version(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'fresh.db'))
+    db.init_schema(conn)
+
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(db.MIGRATIONS)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(image_jobs)')}
+    assert {'worker', 'preset', 'preview_first', 'preview_url'} <= columns
+
+
+@pytest.mark.parametrize('version', range(len(db.MIGRATIONS)))
+def test_every_old_version_upgrades_to_the_same_schema(tmp_path, version):
+    fresh = sqlite3.connect(str(tmp_path / 'fresh.db'))
+    db.init_schema(fresh)
+    conn = old_database(str(tmp_path / 'old.db'), version)
+
+    db.migrate(conn)
+
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(db.MIGRATIONS)
+    assert schema_of(conn) == schema_of(fresh)
+    # Backfills see the rows that were already there
+    assert conn.execute('SELECT total, published FROM user_stats WHERE user_id = 1').fetchone() == (1, 1)
+    assert conn.execute("SELECT rowid FROM content_fts WHERE content_fts MATCH 'p'").fetchall() == [(1,)]
+
+
+def test_migrating_twice_changes_nothing(tmp_path):
+    conn = old_database(str(tmp_path / 'old.db'), 0)
+    db.migrate(conn)
+    before = schema_of(conn)
+
+    db.migrate(conn)
+
+    assert schema_of(conn) == before
+
+
+def test_workers_migrating_together_apply_each_step_once(tmp_path):
+    path = str(tmp_path / 'old.db')
+    old_database(path, 0).close()
+    errors = []
+
+    def worker():
+        conn = db.connect(path)
+        try:
+            db.migrate(conn)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    in_threads(4, worker)
+
+    assert errors == []
+    conn = sqlite3.connect(path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(db.MIGRATIONS)
+    assert conn.execute('SELECT COUNT(*) FROM user_stats').fetchone()[0] == 1
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from fake_gemini import start_fake_gemini
+from utils.gemini_client import AsyncGeminiClient, GeminiClient, GeminiTimeoutError
+
+
+def make_client(base_url, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return GeminiClient('test-key', base_url=base_url, **kwargs)
+
+
+def test_generate_text_returns_first_candidate(fake_gemini):
+    server, base_url = fake_gemini
+    client = make_client(base_url)
+
+    text = client.generate_text('coffee', {'candidateCount': 2})
+
+    assert 'coffee' in text
+    assert '(take' not in text
+    assert server.calls == 1
+
+
+def test_reuses_one_connection(fake_gemini):
+    server, base_url = fake_gemini
+    client = make_client(base_url)
+
+    for _ in range(5):
+        client.generate_text('coffee')
+
+    assert server.calls == 5
+    assert len(server.connections) == 1
+
+
+def test_retries_rate_limits_and_server_errors(fake_gemini):
+    server, base_url = fake_gemini
+    server.statuses = [429, 503]
+    client = make_client(base_url, max_retries=2)
+
+    assert 'coffee' in client.generate_text('coffee')
+    assert server.calls == 3
+
+
+def test_gives_up_after_max_retries(fake_gemini):
+    server, base_url = fake_gemini
+    server.statuses = [503, 503, 503]
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.generate_text('coffee')
+
+    assert excinfo.value.response.status_code == 503
+    assert server.calls == 3
+
+
+@pytest.mark.parametrize('status', [400, 401, 403, 404])
+def test_does_not_retry_client_errors(fake_gemini, status):
+    server, base_url = fake_gemini
+    server.statuses = [status]
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.generate_text('coffee')
+
+    assert excinfo.value.response.status_code == status
+    assert server.calls == 1
+
+
+def test_retries_dropped_connections():
+    # Nothing listens on the port of a closed server
+    server, base_url = start_fake_gemini()
+    server.shutdown()
+    server.server_close()
+    client = make_client(base_url, max_retries=1, connect_timeout=0.5)
+
+    with pytest.raises(requests.ConnectionError):
+        client.generate_text('coffee')
+
+
+def test_backoff_grows_and_honours_retry_after():
+    client = make_client('http://127.0.0.1:1', backoff=0.5, max_backoff=4.0)
+
+    for attempt, cap in enumerate([0.5, 1.0, 2.0, 4.0, 4.0]):
+        assert 0 <= client.retry_delay(attempt) <= cap
+
+    response = requests.Response()
+    response.headers['Retry-After'] = '3'
+    assert client.retry_delay(0, response) == 3.0
+    response.headers['Retry-After'] = '120'
+    assert client.retry_delay(0, response) == 4.0
+
+
+def test_async_client(fake_gemini):
+    server, base_url = fake_gemini
+    client = AsyncGeminiClient(make_client(base_url))
+
+    async def generate_all():
+        return await asyncio.gather(*(client.generate_text(f'topic {i}') for i in range(4)))
+
+    texts = asyncio.run(generate_all())
+
+    assert [f'topic {i}' in text for i, text in enumerate(texts)] == [True] * 4
+    assert server.calls == 4
+
+
+def test_deadline_bounds_retries_and_backoff(fake_gemini):
+    server, base_url = fake_gemini
+    server.latency = 0.2
+    server.statuses = [503] * 10
+    client = make_client(base_url, max_retries=10, backoff=0.2, max_backoff=0.2)
+
+    started = time.monotonic()
+    with pytest.raises(requests.RequestException):
+        client.generate_text('coffee', timeout=0.5)
+
+    assert time.monotonic() - started < 0.8
+    assert server.calls < 10
+
+
+def test_deadline_includes_waiting_for_a_slot(fake_gemini):
+    server, base_url = fake_gemini
+    server.latency = 1.0
+    client = make_client(base_url, max_concurrency=1, acquire_timeout=5)
+    holder = threading.Thread(target=client.generate_text, args=('slow',))
+    holder.start()
+    while not server.in_flight:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    with pytest.raises(GeminiTimeoutError):
+        client.generate_text('coffee', timeout=0.2)
+
+    assert time.monotonic() - started < 0.5
+    holder.join()
+
+
+def test_deadline_cuts_off_a_slow_response(fake_gemini):
+    server, base_url = fake_gemini
+    server.latency = 1.0
+    client = make_client(base_url, max_retries=2)
+
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.generate_text('coffee', timeout=0.3)
+
+    assert time.monotonic() - started < 0.6
+    assert server.calls == 1
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from utils.gemini_client import GeminiBusyError, GeminiClient
+
+
+def make_client(base_url, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return GeminiClient('test-key', base_url=base_url, **kwargs)
+
+
+def test_stream_yields_text_in_pieces(fake_gemini):
+    server, base_url = fake_gemini
+    client = make_client(base_url)
+
+    pieces = list(client.stream_text('coffee'))
+
+    assert len(pieces) > 1
+    assert ''.join(pieces) == client.generate_text('coffee')
+
+
+def test_stream_retries_before_first_piece(fake_gemini):
+    server, base_url = fake_gemini
+    server.statuses = [503]
+    client = make_client(base_url, max_retries=1)
+
+    assert 'coffee' in ''.join(client.stream_text('coffee'))
+    assert server.calls == 2
+
+
+def test_stream_does_not_retry_client_errors(fake_gemini):
+    server, base_url = fake_gemini
+    server.statuses = [400]
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        list(client.stream_text('coffee'))
+
+    assert server.calls == 1
+
+
+def test_stream_releases_its_slot_when_abandoned(fake_gemini):
+    server, base_url = fake_gemini
+    client = make_client(base_url, max_concurrency=1, acquire_timeout=0.5)
+
+    stream = client.stream_text('coffee')
+    next(stream)
+    stream.close()
+
+    assert 'coffee' in client.generate_text('coffee')
+
+
+def test_concurrency_limit_caps_upstream_calls(fake_gemini):
+    server, base_url = fake_gemini
+    server.latency = 0.2
+    client = make_client(base_url, max_concurrency=2)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(client.generate_text('coffee'))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 6
+    assert server.max_in_flight == 2
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_busy_when_no_slot_frees_up(fake_gemini, streaming):
+    server, base_url = fake_gemini
+    server.latency = 0.5
+    client = make_client(base_url, max_concurrency=1, acquire_timeout=0.05)
+    holder = threading.Thread(target=client.generate_text, args=('slow',))
+    holder.start()
+    while not server.in_flight:
+        time.sleep(0.01)
+
+    with pytest.raises(GeminiBusyError):
+        if streaming:
+            list(client.stream_text('coffee'))
+        else:
+            client.generate_text('coffee')
+
+    holder.join()
+    assert server.calls == 1
+
+
+def test_stream_stops_at_its_deadline(fake_gemini):
+    server, base_url = fake_gemini
+    server.latency = 1.0
+    client = make_client(base_url)
+
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        list(client.stream_text('coffee', timeout=0.5))
+
+    assert time.monotonic() - started < 0.8
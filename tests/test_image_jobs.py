@@ -0,0 +1,162 @@
+import threading
+import uuid
+
+import pytest
+
+from utils.db import get_db, transaction
+from utils.image_jobs import JOB_DONE, JOB_FAILED, JOB_QUEUED, ImageJobQueue, QueueFullError
+from utils.user_stats import read_user_stats, record_content_created
+
+
+class FakeRenderer:
+    """generate() stand-in: records its calls and blocks until released"""
+
+    def __init__(self, result='/images/{preset}.png'):
+        self.result = result
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, prompt, preset):
+        self.calls.append(preset)
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result and self.result.format(preset=preset)
+
+
+def make_queue(generate, **kwargs):
+    return ImageJobQueue(generate, worker_id=uuid.uuid4().hex, **kwargs)
+
+
+def add_content(user_id):
+    with transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO generated_content (user_id, prompt, generated_tweet) VALUES (?, ?, ?)',
+            (user_id, 'coffee', 'tweet')
+        )
+        content_id = cursor.lastrowid
+        record_content_created(cursor, user_id, has_image=False)
+    return content_id
+
+
+def image_of(content_id):
+    return get_db().execute('SELECT image_url FROM generated_content WHERE id = ?', (content_id,)).fetchone()[0]
+
+
+def test_finished_job_sets_the_image_and_reports_it(web, login):
+    _, user_id = login()
+    content_id = add_content(user_id)
+    completed = []
+    jobs = make_queue(FakeRenderer(), on_complete=completed.append)
+    jobs.start()
+
+    job_id = jobs.submit(user_id, 'coffee', content_id=content_id, preset='full')
+    job = jobs.wait(job_id, timeout=5)
+
+    assert job['status'] == JOB_DONE
+    assert job['image_url'] == '/images/full.png'
+    assert image_of(content_id) == '/images/full.png'
+    assert read_user_stats(user_id)['images'] == 1
+    assert [(c['id'], c['content_id']) for c in completed] == [(job_id, content_id)]
+    assert jobs.pending() == 0
+
+
+@pytest.mark.parametrize('finish_first', [True, False])
+def test_attach_content_before_or_after_the_job_finishes(web, login, finish_first):
+    _, user_id = login()
+    renderer = FakeRenderer()
+    renderer.release.clear()
+    jobs = make_queue(renderer)
+    jobs.start()
+
+    job_id = jobs.submit(user_id, 'coffee', preset='full')
+    content_id = add_content(user_id)
+    if finish_first:
+        renderer.release.set()
+        jobs.wait(job_id, timeout=5)
+        jobs.attach_content(job_id, content_id)
+    else:
+        assert jobs.attach_content(job_id, content_id)['status'] != JOB_DONE
+        renderer.release.set()
+        jobs.wait(job_id, timeout=5)
+
+    assert image_of(content_id) == '/images/full.png'
+    assert read_user_stats(user_id)['images'] == 1
+
+
+@pytest.mark.parametrize('result, error', [(None, 'Image generation failed'), (RuntimeError('out of memory'), 'out of memory')])
+def test_failed_render_marks_the_job_failed(web, login, result, error):
+    _, user_id = login()
+    content_id = add_content(user_id)
+    completed = []
+    jobs = make_queue(FakeRenderer(result), on_complete=completed.append)
+    jobs.start()
+
+    job = jobs.wait(jobs.submit(user_id, 'coffee', content_id=content_id), timeout=5)
+
+    assert (job['status'], job['error']) == (JOB_FAILED, error)
+    assert image_of(content_id) is None
+    assert completed[0]['status'] == JOB_FAILED
+    assert jobs.pending() == 0
+
+
+def test_full_queue_rejects_and_records_the_job(web, login):
+    _, user_id = login()
+    jobs = make_queue(FakeRenderer(), max_queued=1)
+
+    queued = jobs.submit(user_id, 'first')
+    with pytest.raises(QueueFullError):
+        jobs.submit(user_id, 'second')
+
+    assert jobs.pending() == jobs.depth() == 1
+    assert jobs.get(queued)['status'] == JOB_QUEUED
+    rejected = get_db().execute('SELECT status, error FROM image_jobs WHERE prompt = ? AND worker = ?',
+                                ('second', jobs.worker_id)).fetchone()
+    assert tuple(rejected) == (JOB_FAILED, 'Image queue is full')
+
+
+def test_preview_is_shown_then_replaced(web, login):
+    _, user_id = login()
+    content_id = add_content(user_id)
+    renderer = FakeRenderer()
+    previews = []
+    jobs = make_queue(renderer, preview_preset='fast', on_preview=previews.append)
+    jobs.start()
+
+    renderer.release.clear()
+    job_id = jobs.submit(user_id, 'coffee', content_id=content_id, preset='full', preview_first=True)
+    renderer.release.set()
+    previewed = jobs.wait(job_id, timeout=5, until_preview=True)
+    assert previewed['preview_url'] == '/images/fast.png'
+    finished = jobs.wait(job_id, timeout=5)
+
+    assert renderer.calls == ['fast', 'full']
+    assert [p['content_id'] for p in previews] == [content_id]
+    assert finished['image_url'] == '/images/full.png'
+    assert image_of(content_id) == '/images/full.png'
+    assert read_user_stats(user_id)['images'] == 1
+
+
+def test_preview_only_when_it_differs_from_the_preset():
+    jobs = ImageJobQueue(FakeRenderer(), preview_preset='fast')
+
+    assert jobs.renders('full', preview_first=True) == 2
+    assert jobs.renders('fast', preview_first=True) == 1
+    assert jobs.renders('full') == 1
+    assert ImageJobQueue(FakeRenderer()).renders('full', preview_first=True) == 1
+
+
+def test_start_fails_only_this_workers_interrupted_jobs(web, login):
+    _, user_id = login()
+    mine = make_queue(FakeRenderer())
+    theirs = make_queue(FakeRenderer())
+    interrupted = mine.submit(user_id, 'mine')
+    other = theirs.submit(user_id, 'theirs')
+
+    restarted = ImageJobQueue(FakeRenderer(result=None), worker_id=mine.worker_id)
+    restarted.start()
+
+    assert restarted.get(interrupted)['status'] == JOB_FAILED
+    assert restarted.get(interrupted)['error'] == 'Interrupted by server restart'
+    assert restarted.get(other)['status'] == JOB_QUEUED
@@ -0,0 +1,91 @@
+import pytest
+
+from utils.db import transaction
+from utils.pagination import (
+    InvalidCursorError, decode_cursor, encode_cursor, keyset_page_sql, parse_limit, split_page
+)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('2024-01-01 10:00:00', 42)) == ['2024-01-01 10:00:00', 42]
+    assert decode_cursor(encode_cursor(7), size=1) == [7]
+
+
+@pytest.mark.parametrize('token', ['zzz', encode_cursor(1), encode_cursor({'a': 1}, 2)[:-2], ''])
+def test_bad_cursors_are_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_limit_is_clamped():
+    assert parse_limit(None) == 20
+    assert parse_limit('abc') == 20
+    assert parse_limit('0') == 1
+    assert parse_limit('500') == 100
+
+
+def test_split_page_reports_more():
+    assert split_page([1, 2, 3], 2) == ([1, 2], True)
+    assert split_page([1, 2], 2) == ([1, 2], False)
+
+
+def test_seek_on_id_alone_uses_a_single_value_cursor():
+    assert keyset_page_sql('id', True, None) == ('', [], 'ORDER BY id DESC')
+    assert keyset_page_sql('id', True, encode_cursor(9)) == ('id < ?', [9], 'ORDER BY id DESC')
+    where_sql, params, order_sql = keyset_page_sql('username', False, encode_cursor('bo', 3))
+    assert (where_sql, params) == ('(username, id) > (?, ?)', ['bo', 3])
+    assert order_sql == 'ORDER BY username ASC, id ASC'
+
+
+def add_content(user_id, count, created_at):
+    with transaction() as cursor:
+        for i in range(count):
+            cursor.execute(
+                'INSERT INTO generated_content (user_id, prompt, generated_tweet, created_at) VALUES (?, ?, ?, ?)',
+                (user_id, f'prompt {i}', f'tweet {i}', created_at)
+            )
+
+
+def read_all_pages(client, limit, between_pages=None):
+    ids, cursor = [], None
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        data = client.get('/api/user-content', query_string=params).get_json()
+        ids += [item['id'] for item in data['content']]
+        cursor = data['next_cursor']
+        if not cursor:
+            return ids
+        if between_pages:
+            between_pages()
+
+
+def test_pages_split_ties_on_created_at_by_id(web, login):
+    client, user_id = login()
+    add_content(user_id, 7, '2024-01-01 10:00:00')
+    add_content(user_id, 5, '2024-01-02 10:00:00')
+
+    ids = read_all_pages(client, limit=3)
+
+    assert len(ids) == 12
+    assert ids[:5] == sorted(ids[:5], reverse=True)
+    assert ids[5:] == sorted(ids[5:], reverse=True)
+
+
+def test_new_content_does_not_shift_later_pages(web, login):
+    client, user_id = login()
+    add_content(user_id, 10, '2024-01-01 10:00:00')
+    first_pass = read_all_pages(client, limit=4)
+
+    # Rows added mid-way are newer than every cursor, so no row already
+    # returned comes back and none is skipped
+    second_pass = read_all_pages(client, limit=4, between_pages=lambda: add_content(user_id, 2, '2024-02-01 10:00:00'))
+
+    assert second_pass == first_pass
+
+
+def test_invalid_cursor_is_a_client_error(web, login):
+    client, _ = login()
+
+    response = client.get('/api/user-content', query_string={'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from utils.db import transaction
+from utils.realtime import EventCoalescer
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_burst_is_sent_as_one_batch_in_order():
+    batches = []
+    coalescer = EventCoalescer(batches.append, interval=0.1)
+
+    for i in range(50):
+        coalescer.publish('content_update', {'n': i})
+
+    assert wait_for(lambda: batches)
+    time.sleep(0.2)
+    assert len(batches) == 1
+    assert [event['data']['n'] for event in batches[0]] == list(range(50))
+    assert coalescer.stats()['published'] == 50
+
+
+def test_full_buffer_is_sent_without_waiting():
+    batches = []
+    coalescer = EventCoalescer(batches.append, interval=60, max_batch=3)
+
+    for i in range(3):
+        coalescer.publish('content_update', {'n': i})
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+
+
+def test_failed_send_does_not_stop_later_batches():
+    batches = []
+    sent = threading.Event()
+
+    def send(events):
+        if not batches:
+            batches.append(None)
+            raise RuntimeError('socket closed')
+        batches.append(events)
+        sent.set()
+
+    coalescer = EventCoalescer(send, interval=0.05)
+    coalescer.publish('a', {})
+    assert wait_for(lambda: batches)
+    coalescer.publish('b', {})
+
+    assert sent.wait(2)
+    assert batches[-1] == [{'event': 'b', 'data': {}}]
+
+
+def events_named(socket, name):
+    return [packet['args'][0] for packet in socket.get_received() if packet['name'] == name]
+
+
+def connect(web, http, join, *args):
+    socket = web.socketio.test_client(web.app, flask_test_client=http)
+    socket.emit(join, *args)
+    socket.get_received()
+    return socket
+
+
+def test_events_reach_only_their_user_and_the_admins(web, login, admin):
+    alice_http, alice_id = login()
+    bob_http, _ = login()
+    alice = connect(web, alice_http, 'join_user', {})
+    bob = connect(web, bob_http, 'join_user', {})
+    admins = connect(web, admin, 'join_admin')
+
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO generated_content (user_id, prompt, generated_tweet) VALUES (?, 'p', 't')",
+                       (alice_id,))
+        content_id = cursor.lastrowid
+    alice_http.post('/post-tweet', json={'content_id': content_id})
+
+    assert [event['content_id'] for event in events_named(alice, 'content_update')] == [content_id]
+    assert events_named(bob, 'content_update') == []
+    # The admin feed arrives coalesced, after the feed interval
+    feed = []
+
+    def published():
+        for batch in events_named(admins, 'admin_events'):
+            feed.extend(event for event in batch['events'] if event['data'].get('content_id') == content_id)
+        return feed
+
+    assert wait_for(published)
+    assert feed[0]['event'] == 'content_update'
+    assert feed[0]['data']['action'] == 'content_published'
+
+
+def test_admin_room_is_admins_only(web, login):
+    http, _ = login()
+    socket = web.socketio.test_client(web.app, flask_test_client=http)
+    socket.get_received()
+
+    socket.emit('join_admin')
+
+    assert events_named(socket, 'admin_joined') == []
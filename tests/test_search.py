@@ -0,0 +1,140 @@
+import sqlite3
+
+import pytest
+
+from utils.db import MIGRATIONS, SCHEMA, get_db, migrate, transaction
+from utils.search import build_match_query, rebuild_search_index, render_highlight
+
+
+@pytest.mark.parametrize('text, query', [
+    ('coffee shop', '"coffee" "shop"*'),
+    ('"coffee shop" latte', '"coffee shop" "latte"*'),
+    ('latte "coffee shop"', '"latte" "coffee shop"'),
+    ('NEAR(a OR b', '"NEAR" "a" "OR" "b"*'),
+    ('café-au-lait', '"café" "au" "lait"*'),
+])
+def test_input_becomes_quoted_terms(text, query):
+    assert build_match_query(text) == query
+
+
+@pytest.mark.parametrize('text', ['', '   ', '"', '*', '""'])
+def test_input_without_terms_has_no_query(text):
+    assert build_match_query(text) is None
+
+
+def test_highlight_escapes_text_around_marks():
+    assert render_highlight('<b>\x02coffee\x03</b>') == '&lt;b&gt;<mark>coffee</mark>&lt;/b&gt;'
+    assert render_highlight(None) is None
+
+
+def indexed(match):
+    return [row[0] for row in get_db().execute(
+        'SELECT rowid FROM content_fts WHERE content_fts MATCH ? ORDER BY rowid', (match,)
+    )]
+
+
+def add_content(user_id, prompt, tweet):
+    with transaction() as cursor:
+        cursor.execute('INSERT INTO generated_content (user_id, prompt, generated_tweet) VALUES (?, ?, ?)',
+                       (user_id, prompt, tweet))
+        return cursor.lastrowid
+
+
+def test_triggers_keep_the_index_in_sync(web, login):
+    _, user_id = login()
+
+    content_id = add_content(user_id, 'zanzibar sunrise', 'a tweet about spice')
+    assert indexed('zanzibar') == [content_id]
+
+    with transaction() as cursor:
+        cursor.execute("UPDATE generated_content SET generated_tweet = 'cardamom dreams' WHERE id = ?", (content_id,))
+    assert indexed('spice') == []
+    assert indexed('cardamom') == [content_id]
+
+    # Columns outside the index do not touch it
+    with transaction() as cursor:
+        cursor.execute('UPDATE generated_content SET is_posted = TRUE WHERE id = ?', (content_id,))
+    assert indexed('cardamom') == [content_id]
+
+    with transaction() as cursor:
+        cursor.execute('DELETE FROM generated_content WHERE id = ?', (content_id,))
+    assert indexed('zanzibar') == []
+    assert indexed('cardamom') == []
+
+
+def test_results_are_ranked_highlighted_and_escaped(web, login):
+    client, user_id = login()
+    in_tweet = add_content(user_id, 'morning', 'my <b>kumquat</b> jam')
+    in_prompt = add_content(user_id, 'kumquat harvest', 'orchard day')
+
+    results = client.get('/api/search', query_string={'q': 'kumquat'}).get_json()['results']
+
+    # A prompt match outweighs a tweet match
+    assert [result['id'] for result in results] == [in_prompt, in_tweet]
+    assert results[0]['prompt_html'] == '<mark>kumquat</mark> harvest'
+    assert results[1]['tweet_html'] == 'my &lt;b&gt;<mark>kumquat</mark>&lt;/b&gt; jam'
+
+
+def test_filters_apply_before_the_limit_and_highlight(web, login, monkeypatch):
+    client, user_id = login()
+    _, other_id = login()
+    for i in range(30):
+        add_content(other_id, f'quokka {i}', 'quokka quokka quokka')
+    mine = [add_content(user_id, f'quokka walk {i}', 'a walk') for i in range(3)]
+
+    # Count highlight() evaluations; the request shares this thread's connection
+    calls = []
+    conn = get_db()
+    conn.create_function('counted', 1, lambda value: calls.append(value) or value)
+    monkeypatch.setattr(web, 'highlight_sql', lambda column: f'counted(highlight(content_fts, {column}, char(2), char(3)))')
+
+    data = client.get('/api/search', query_string={'q': 'quokka', 'limit': 2}).get_json()
+
+    assert [result['user_id'] for result in data['results']] == [user_id, user_id]
+    assert data['has_more']
+    assert len(calls) == 4
+
+    rest = client.get('/api/search', query_string={'q': 'quokka', 'limit': 2, 'cursor': data['next_cursor']}).get_json()
+    assert sorted(result['id'] for result in data['results'] + rest['results']) == mine
+    assert not rest['has_more']
+
+
+def test_admins_search_everyone_or_one_user(web, login, admin):
+    _, alice = login()
+    _, bob = login()
+    add_content(alice, 'wombat', 'tweet')
+    add_content(bob, 'wombat', 'tweet')
+
+    everyone = admin.get('/api/search', query_string={'q': 'wombat'}).get_json()['results']
+    just_bob = admin.get('/api/search', query_string={'q': 'wombat', 'user_id': bob}).get_json()['results']
+
+    assert {result['user_id'] for result in everyone} >= {alice, bob}
+    assert [result['user_id'] for result in just_bob] == [bob]
+
+
+@pytest.mark.parametrize('params, status', [({'q': ''}, 400), ({'q': '"'}, 400),
+                                            ({'q': 'x', 'cursor': 'bogus'}, 400)])
+def test_bad_searches_are_client_errors(web, login, params, status):
+    client, _ = login()
+
+    assert client.get('/api/search', query_string=params).status_code == status
+
+
+def test_index_is_backfilled_and_rebuilt(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO generated_content (user_id, prompt, generated_tweet) VALUES (1, 'legacy latte', 'old')")
+    conn.execute(f'PRAGMA user_version = {len(MIGRATIONS) - 1}')
+    conn.commit()
+
+    migrate(conn)
+    assert conn.execute("SELECT rowid FROM content_fts WHERE content_fts MATCH 'latte'").fetchall() == [(1,)]
+
+    # Rows written behind the triggers' back come back after a rebuild
+    conn.execute('DROP TRIGGER generated_content_fts_insert')
+    conn.execute("INSERT INTO generated_content (user_id, prompt, generated_tweet) VALUES (1, 'bulk mocha', 'x')")
+    conn.commit()
+    assert conn.execute("SELECT rowid FROM content_fts WHERE content_fts MATCH 'mocha'").fetchall() == []
+    assert rebuild_search_index(conn) == 2
+    assert conn.execute("SELECT rowid FROM content_fts WHERE content_fts MATCH 'mocha'").fetchall() == [(2,)]
@@ -0,0 +1,73 @@
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+
+from utils.training_log import TrainingLog
+
+
+def write_legacy(path, count, start=0):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([{'prompt': f'p{i}', 'timestamp': '2024-01-01T00:00:00'} for i in range(start, start + count)], f)
+
+
+def migrate_after(barrier, directory, legacy, results):
+    barrier.wait()
+    try:
+        results.put(TrainingLog(directory=directory).migrate_json_array(legacy))
+    except Exception as e:
+        results.put(repr(e))
+
+
+def test_records_survive_rotation_in_order(tmp_path):
+    log = TrainingLog(directory=str(tmp_path), max_bytes=60, flush_interval=0)
+
+    for i in range(20):
+        log.append({'prompt': f'p{i}'})
+
+    assert len(log.segments()) > 2
+    assert [record['prompt'] for record in log.iter_records()] == [f'p{i}' for i in range(20)]
+
+
+def test_concurrent_workers_migrate_once(tmp_path):
+    legacy = str(tmp_path / 'generated_data.json')
+    write_legacy(legacy, 25)
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    results = context.Queue()
+
+    workers = [
+        context.Process(target=migrate_after, args=(barrier, str(tmp_path), legacy, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+
+    assert sorted(results.get(timeout=1) for _ in workers) == [0, 0, 0, 25]
+    assert len(list(TrainingLog(directory=str(tmp_path)).iter_records())) == 25
+    assert os.path.exists(legacy + '.migrated')
+
+
+def test_migration_keeps_an_earlier_legacy_archive(tmp_path):
+    log = TrainingLog(directory=str(tmp_path))
+    legacy = str(tmp_path / 'generated_data.json')
+
+    write_legacy(legacy, 3)
+    assert log.migrate_json_array(legacy) == 3
+    write_legacy(legacy, 2, start=3)
+    assert log.migrate_json_array(legacy) == 2
+
+    archives = glob.glob(str(tmp_path / 'generated_data-00000000-000000-legacy-*.jsonl.gz'))
+    assert len(archives) == 2
+    with gzip.open(archives[0], 'rt') as a, gzip.open(archives[1], 'rt') as b:
+        assert sorted(len(f.readlines()) for f in (a, b)) == [2, 3]
+    assert len(list(log.iter_records())) == 5
+
+
+def test_missing_legacy_file_is_a_no_op(tmp_path):
+    log = TrainingLog(directory=str(tmp_path))
+
+    assert log.migrate_json_array(str(tmp_path / 'generated_data.json')) == 0
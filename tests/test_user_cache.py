@@ -0,0 +1,57 @@
+import threading
+
+from utils.user_cache import UserCache
+
+
+def test_rows_are_loaded_once_until_invalidated():
+    loads = []
+    users = UserCache(lambda user_id: loads.append(user_id) or (int(user_id), f'user{user_id}'))
+
+    assert users.get(1) == (1, 'user1')
+    assert users.get('1') == (1, 'user1')
+    users.invalidate(1)
+    users.get(1)
+
+    assert loads == ['1', '1']
+
+
+def test_missing_users_are_not_cached():
+    loads = []
+    users = UserCache(lambda user_id: loads.append(user_id))
+
+    assert users.get(7) is None
+    assert users.get(7) is None
+    assert len(loads) == 2
+
+
+def test_row_loaded_before_an_invalidation_is_not_cached():
+    loading, invalidated = threading.Event(), threading.Event()
+    rows = iter([(1, 'old name'), (1, 'new name')])
+
+    def load(user_id):
+        row = next(rows)
+        if row[1] == 'old name':
+            loading.set()
+            invalidated.wait(2)
+        return row
+
+    users = UserCache(load)
+    reader = threading.Thread(target=users.get, args=(1,))
+    reader.start()
+    loading.wait(2)
+    users.invalidate(1)
+    invalidated.set()
+    reader.join()
+
+    assert users.get(1) == (1, 'new name')
+
+
+def test_registering_invalidates_the_new_id(web):
+    client = web.app.test_client()
+    before = web.user_cache.stats()['invalidations']
+
+    client.post('/register', json={'username': 'cachedname', 'email': 'cachedname@example.com', 'password': 'pw'})
+
+    assert web.user_cache.stats()['invalidations'] == before + 1
+    assert client.post('/login', json={'username': 'cachedname', 'password': 'pw'}).get_json()['success']
+    assert client.get('/api/user-stats').status_code == 200
@@ -0,0 +1,58 @@
+from utils.db import get_db, transaction
+from utils.user_stats import read_user_stats, rebuild_user_stats, record_content_created
+
+
+def add_content(user_id, image_url=None):
+    with transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO generated_content (user_id, prompt, generated_tweet, image_url) VALUES (?, ?, ?, ?)',
+            (user_id, 'coffee', 'tweet', image_url)
+        )
+        content_id = cursor.lastrowid
+        record_content_created(cursor, user_id, has_image=image_url is not None)
+    return content_id
+
+
+def rebuilt(user_id):
+    rebuild_user_stats(get_db())
+    return read_user_stats(user_id)
+
+
+def test_counters_follow_generate_and_publish(web, login):
+    client, user_id = login()
+
+    content_id = client.post('/generate-tweet', json={'prompt': 'coffee'}).get_json()['content_id']
+    client.post('/post-tweet', json={'content_id': content_id})
+    client.post('/post-tweet', json={'content_id': content_id})
+
+    stats = read_user_stats(user_id)
+    assert stats == {'total': 1, 'published': 1, 'drafts': 0, 'images': 0}
+    assert stats == rebuilt(user_id)
+
+
+def test_delete_takes_back_what_the_row_counted(web, login, admin):
+    client, user_id = login()
+    posted = add_content(user_id, image_url='/images/a.png')
+    client.post('/post-tweet', json={'content_id': posted})
+    draft = add_content(user_id)
+    add_content(user_id)
+
+    assert admin.delete(f'/delete-content/{posted}').get_json()['success']
+    assert admin.delete(f'/delete-content/{draft}').get_json()['success']
+
+    stats = read_user_stats(user_id)
+    assert stats == {'total': 1, 'published': 0, 'drafts': 1, 'images': 0}
+    assert stats == rebuilt(user_id)
+
+
+def test_deleting_a_missing_row_changes_nothing(web, login, admin):
+    _, user_id = login()
+    add_content(user_id)
+
+    admin.delete('/delete-content/999999')
+
+    assert read_user_stats(user_id)['total'] == 1
+
+
+def test_unknown_user_reads_as_zero(web):
+    assert read_user_stats(-1) == {'total': 0, 'published': 0, 'drafts': 0, 'images': 0}
@@ -0,0 +1,156 @@
+"""
+Admission control for expensive work.
+
+Before an image job is queued, AdmissionController checks three limits: a
+token bucket per user (so one user cannot monopolise the workers), a global
+token bucket (so the total rate stays within what the workers sustain) and
+a cap on jobs already queued or running. A rejected request is answered at
+once with how long to wait, instead of joining a queue it would time out in.
+Buckets live in process memory, so with several web workers each limit
+applies per worker.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; not thread-safe on its own"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        # now may predate a bucket created after the caller read the clock
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, n=1, now=None):
+        """Seconds until n tokens are available (0 if they are now)"""
+        self._refill(now or time.monotonic())
+        if self.tokens >= n:
+            return 0.0
+        if self.rate <= 0 or n > self.burst:
+            return math.inf
+        return (n - self.tokens) / self.rate
+
+    def take(self, n=1):
+        self.tokens -= n
+
+    def refund(self, n=1):
+        self.tokens = min(self.burst, self.tokens + n)
+
+
+class Admission:
+    """Outcome of an admission check"""
+
+    def __init__(self, admitted, reason=None, retry_after=0.0, queue_position=None):
+        self.admitted = admitted
+        self.reason = reason
+        self.retry_after = retry_after
+        self.queue_position = queue_position
+
+    def to_dict(self):
+        return {
+            'reason': self.reason,
+            'retry_after': math.ceil(self.retry_after) if self.retry_after != math.inf else None,
+            'queue_position': self.queue_position
+        }
+
+
+class AdmissionController:
+    """Per-user and global token buckets plus a cap on pending jobs"""
+
+    def __init__(self, user_rate, user_burst, global_rate, global_burst, max_pending,
+                 pending=None, job_seconds=None, slots=1, max_users=10000):
+        # Rates are configured per minute; buckets refill per second
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_pending = max_pending
+        self.pending = pending or (lambda: 0)
+        self.job_seconds = job_seconds or (lambda: None)
+        self.slots = max(1, int(slots))
+        self.max_users = max_users
+        self._global = TokenBucket(global_rate / 60, global_burst)
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = {'queue_full': 0, 'global_rate': 0, 'user_rate': 0}
+
+    def _user_bucket(self, user_id):
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = TokenBucket(self.user_rate / 60, self.user_burst)
+            if len(self._users) > self.max_users:
+                # Least recently seen user; its bucket has long refilled
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return bucket
+
+    def estimate_wait(self, ahead):
+        """Rough seconds until a job with this many jobs ahead of it starts"""
+        seconds = self.job_seconds() or 10.0
+        return math.ceil((ahead + 1) / self.slots) * seconds
+
+    def admit(self, user_id, n=1):
+        """Take n job slots for user_id, all or nothing"""
+        with self._lock:
+            now = time.monotonic()
+            pending = self.pending()
+            if self.max_pending and pending + n > self.max_pending:
+                self.rejected['queue_full'] += 1
+                ahead = pending + n - self.max_pending
+                return Admission(False, 'queue_full', self.estimate_wait(ahead), pending + 1)
+
+            # A rate of 0 turns that bucket off
+            user = self._user_bucket(user_id) if self.user_rate > 0 else None
+            user_wait = user.wait_time(n, now) if user else 0.0
+            global_wait = self._global.wait_time(n, now) if self.global_rate > 0 else 0.0
+            if user_wait:
+                self.rejected['user_rate'] += 1
+                return Admission(False, 'user_rate', max(user_wait, global_wait))
+            if global_wait:
+                self.rejected['global_rate'] += 1
+                return Admission(False, 'global_rate', global_wait)
+
+            if user:
+                user.take(n)
+            if self.global_rate > 0:
+                self._global.take(n)
+            self.admitted += n
+            return Admission(True, queue_position=pending + 1)
+
+    def refund(self, user_id, n=1):
+        """Give back n admitted job slots whose jobs were never queued"""
+        with self._lock:
+            user = self._users.get(user_id) if self.user_rate > 0 else None
+            if user:
+                user.refund(n)
+            if self.global_rate > 0:
+                self._global.refund(n)
+            self.admitted -= n
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limits': {
+                    'user_per_minute': self.user_rate,
+                    'user_burst': self.user_burst,
+                    'global_per_minute': self.global_rate,
+                    'global_burst': self.global_burst,
+                    'max_pending': self.max_pending
+                },
+                'pending': self.pending(),
+                'global_tokens': round(self._global.tokens, 2),
+                'tracked_users': len(self._users),
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected)
+            }
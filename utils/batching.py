@@ -0,0 +1,88 @@
+"""
+Micro-batching of concurrent work items.
+
+Items submitted within a short window are collected into one batch and
+handed to a single batch function call, e.g. one diffusion call for several
+prompts. Each caller gets a Future resolved with its own result.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def drain_batch(source, first, max_batch_size, max_wait):
+    """Collect up to max_batch_size items, starting with first, waiting at most max_wait seconds"""
+    batch = [first]
+    deadline = time.monotonic() + max_wait
+    while len(batch) < max_batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(source.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+class MicroBatcher:
+    """Coalesces submitted items into batched calls of run_batch(items) -> results"""
+
+    def __init__(self, run_batch, max_batch_size=4, max_wait=0.05, name='micro-batcher', concurrency=1):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.name = name
+        # Batches run at the same time, e.g. one per image worker process
+        self.concurrency = max(1, int(concurrency))
+        self._queue = queue.Queue()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        """Queue an item and return a Future for its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _ensure_started(self):
+        with self._start_lock:
+            while len(self._threads) < self.concurrency:
+                thread = threading.Thread(target=self._loop, name=f'{self.name}-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            batch = drain_batch(self._queue, first, self.max_batch_size, self.max_wait)
+            self._run(batch)
+
+    def _run(self, batch):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        with self._start_lock:
+            self.batches += 1
+            self.items += len(items)
+        try:
+            results = self.run_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f'Batch returned {len(results)} results for {len(items)} items')
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0
+        }
@@ -0,0 +1,108 @@
+"""
+Circuit breaker for upstream calls.
+
+While closed, every call goes through and its outcome is kept in a sliding
+window of recent calls. Once enough of them failed or were slow the breaker
+opens and callers are told to skip the upstream straight away. After a cool
+down it lets a trial call through (half-open): success closes it again,
+failure re-opens it.
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open breaker with error-rate and latency thresholds"""
+
+    def __init__(self, name, window_size=20, min_calls=5, failure_threshold=0.5,
+                 slow_call_seconds=5.0, slow_call_threshold=0.5, open_seconds=30, half_open_calls=1):
+        self.name = name
+        self.min_calls = max(1, int(min_calls))
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_threshold = slow_call_threshold
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, int(half_open_calls))
+        self._window = deque(maxlen=max(self.min_calls, int(window_size)))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_locked()
+            return self._state
+
+    def _refresh_locked(self):
+        if self._state == OPEN and time.monotonic() >= self._opened_at + self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+
+    def _open_locked(self):
+        if self._state != OPEN:
+            self.times_opened += 1
+            print(f"[WARNING] Circuit '{self.name}' opened")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+
+    def allow(self):
+        """Return True if a call may go upstream now; every allowed call must be recorded"""
+        with self._lock:
+            self._refresh_locked()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, seconds, ok=True):
+        """Record the outcome of an allowed call"""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._window.clear()
+                    print(f"[DEBUG] Circuit '{self.name}' closed")
+                else:
+                    self._open_locked()
+                return
+            if self._state == OPEN:
+                return
+
+            self._window.append((ok, slow))
+            if len(self._window) < self.min_calls:
+                return
+            failures = sum(1 for ok, _ in self._window if not ok)
+            slow_calls = sum(1 for _, slow in self._window if slow)
+            if (failures / len(self._window) >= self.failure_threshold
+                    or slow_calls / len(self._window) >= self.slow_call_threshold):
+                self._open_locked()
+
+    def stats(self):
+        with self._lock:
+            self._refresh_locked()
+            calls = len(self._window)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'failure_rate': round(sum(1 for ok, _ in self._window if not ok) / calls, 3) if calls else 0.0,
+                'slow_rate': round(sum(1 for _, slow in self._window if slow) / calls, 3) if calls else 0.0,
+                'times_opened': self.times_opened,
+                'short_circuited': self.short_circuited,
+                'retry_in': round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+                if self._state == OPEN else 0
+            }
@@ -0,0 +1,277 @@
+"""
+Shared SQLite access for the app and maintenance scripts.
+
+Each thread uses one connection at a time, opened in WAL mode so readers
+never block behind a writer. Request threads hand theirs back to a small
+idle pool when the request ends (the app calls close_db() on teardown), so
+connection setup and the prepared-statement cache are paid once per pooled
+connection, not per request, and short-lived threads cannot leak them. The schema for every table lives
+here so app.py and scripts/init_database.py create identical databases.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.health import LatencyWindow
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'database.db')
+
+# Applied to every new connection
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KB', '20000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024))),
+    'temp_store': 'MEMORY',
+}
+STATEMENT_CACHE_SIZE = 256
+# Idle connections kept per database for the next request; more are closed
+POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', '8'))
+
+_local = threading.local()
+_idle = {}
+_open_connections = 0
+_count_lock = threading.Lock()
+
+# Durations of transaction() blocks, reported in the admin health feed
+query_latency = LatencyWindow()
+
+
+def connect(path=None, check_same_thread=True):
+    """Open a new tuned connection; callers own and must close it"""
+    conn = sqlite3.connect(
+        path or DATABASE_PATH,
+        timeout=PRAGMAS['busy_timeout'] / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=check_same_thread
+    )
+    for name, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def get_db(path=None):
+    """Return the calling thread's shared connection; release it with close_db()"""
+    path = path or DATABASE_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        with _count_lock:
+            idle = _idle.get(path)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            # Pooled connections move between threads, one thread at a time
+            conn = connect(path, check_same_thread=False)
+            _count_connections(1)
+        connections[path] = conn
+    return conn
+
+
+def _count_connections(delta):
+    global _open_connections
+    with _count_lock:
+        _open_connections += delta
+
+
+def open_connections():
+    """Number of shared connections currently open, in use or idle"""
+    return _open_connections
+
+
+def close_db():
+    """Return the calling thread's connections to the idle pool, closing any beyond POOL_SIZE"""
+    connections = getattr(_local, 'connections', None) or {}
+    _local.connections = {}
+    for path, conn in connections.items():
+        if conn.in_transaction:
+            conn.rollback()
+        with _count_lock:
+            idle = _idle.setdefault(path, [])
+            pooled = len(idle) < POOL_SIZE
+            if pooled:
+                idle.append(conn)
+        if not pooled:
+            conn.close()
+            _count_connections(-1)
+
+
+@contextmanager
+def transaction(path=None):
+    """Yield a cursor on the shared connection; commit on success, roll back on error"""
+    conn = get_db(path)
+    started = time.perf_counter()
+    ok = False
+    try:
+        with conn:
+            yield conn.cursor()
+        ok = True
+    finally:
+        query_latency.record(time.perf_counter() - started, ok)
+
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        is_admin BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS generated_content (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        prompt TEXT NOT NULL,
+        generated_tweet TEXT NOT NULL,
+        image_url TEXT,
+        is_posted BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS image_jobs (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        content_id INTEGER,
+        prompt TEXT NOT NULL,
+        status TEXT NOT NULL,
+        image_url TEXT,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (content_id) REFERENCES generated_content (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS tweet_cache (
+        key TEXT PRIMARY KEY,
+        prompt TEXT NOT NULL,
+        tweet TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        published INTEGER NOT NULL DEFAULT 0,
+        images INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    ''',
+]
+
+
+# Schema changes for existing databases, applied in order and tracked with
+# PRAGMA user_version. Append new migrations; never edit released ones.
+MIGRATIONS = [
+    # 1: indexes for per-user and global newest-first listings
+    [
+        'CREATE INDEX IF NOT EXISTS idx_generated_content_user_created '
+        'ON generated_content (user_id, created_at DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_generated_content_created '
+        'ON generated_content (created_at DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_image_jobs_status ON image_jobs (status)',
+    ],
+    # 2: backfill per-user content counters
+    [
+        '''
+        INSERT OR REPLACE INTO user_stats (user_id, total, published, images)
+        SELECT user_id, COUNT(*), COALESCE(SUM(is_posted), 0), COUNT(image_url)
+        FROM generated_content
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        ''',
+    ],
+    # 3: indexes for the paginated admin listings
+    [
+        'CREATE INDEX IF NOT EXISTS idx_generated_content_posted_created '
+        'ON generated_content (is_posted, created_at DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at, id)',
+    ],
+    # 4: image jobs remember which web worker runs them
+    [
+        'ALTER TABLE image_jobs ADD COLUMN worker TEXT',
+    ],
+    # 5: quality presets and preview-first image jobs
+    [
+        'ALTER TABLE image_jobs ADD COLUMN preset TEXT',
+        'ALTER TABLE image_jobs ADD COLUMN preview_first BOOLEAN DEFAULT FALSE',
+        'ALTER TABLE image_jobs ADD COLUMN preview_url TEXT',
+    ],
+    # 6: full-text index over prompts and tweets, kept in sync by triggers
+    [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+            prompt, generated_tweet,
+            content='generated_content', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_insert AFTER INSERT ON generated_content BEGIN
+            INSERT INTO content_fts (rowid, prompt, generated_tweet)
+            VALUES (new.id, new.prompt, new.generated_tweet);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_delete AFTER DELETE ON generated_content BEGIN
+            INSERT INTO content_fts (content_fts, rowid, prompt, generated_tweet)
+            VALUES ('delete', old.id, old.prompt, old.generated_tweet);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS generated_content_fts_update
+        AFTER UPDATE OF prompt, generated_tweet ON generated_content BEGIN
+            INSERT INTO content_fts (content_fts, rowid, prompt, generated_tweet)
+            VALUES ('delete', old.id, old.prompt, old.generated_tweet);
+            INSERT INTO content_fts (rowid, prompt, generated_tweet)
+            VALUES (new.id, new.prompt, new.generated_tweet);
+        END
+        ''',
+        # Index rows written before the triggers existed
+        "INSERT INTO content_fts (content_fts) VALUES ('rebuild')",
+    ],
+]
+
+
+def migrate(conn):
+    """Apply any migrations newer than the database's user_version"""
+    while True:
+        # The write lock is taken before reading the version, so workers
+        # starting together apply each migration exactly once
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                return
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+        print(f"[DEBUG] Applied database migration {version + 1}")
+
+
+def init_schema(conn):
+    """Create any missing tables and bring the schema up to date"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    migrate(conn)
@@ -0,0 +1,244 @@
+"""
+Shared HTTP client for the Gemini API.
+
+All calls go through one pooled, keep-alive requests.Session so TLS
+connections are reused between requests, and a semaphore caps the number of
+concurrent upstream calls. Rate limits (429), server errors (5xx) and
+dropped connections are retried a few times with exponential backoff; other
+4xx responses are the caller's fault and fail at once. A call's timeout is
+a total deadline: waiting for a slot, every attempt and every backoff all
+count against it, and no retry starts once it has passed.
+
+stream_text() yields text as Gemini produces it using the server-sent-events
+form of streamGenerateContent. AsyncGeminiClient exposes the same calls to
+code running on an asyncio event loop.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# Responses worth another attempt; any other 4xx is returned as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiBusyError(Exception):
+    """Raised when no upstream call slot frees up within the wait timeout"""
+
+
+class GeminiTimeoutError(requests.Timeout):
+    """Raised when a call's deadline passes before it completes"""
+
+
+def deadline_after(timeout):
+    """Monotonic deadline timeout seconds from now, or None for no deadline"""
+    return time.monotonic() + timeout if timeout else None
+
+
+def build_payload(text, generation_config=None):
+    payload = {
+        "contents": [
+            {
+                "parts": [
+                    {
+                        "text": text
+                    }
+                ]
+            }
+        ]
+    }
+    if generation_config:
+        payload["generationConfig"] = generation_config
+    return payload
+
+
+def extract_texts(result):
+    """Return the stripped text of every candidate in a generateContent response"""
+    texts = []
+    for candidate in result.get('candidates') or []:
+        parts = (candidate.get('content') or {}).get('parts') or [{}]
+        text = ''.join(part.get('text', '') for part in parts).strip()
+        if text:
+            texts.append(text)
+    return texts
+
+
+def extract_chunk_text(chunk):
+    """Text of the first candidate in one streamed chunk, whitespace intact"""
+    candidates = chunk.get('candidates') or [{}]
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    return ''.join(part.get('text', '') for part in parts)
+
+
+class GeminiClient:
+    """Pooled, concurrency-limited client for generateContent calls"""
+
+    def __init__(self, api_key, model="gemini-2.0-flash", base_url=None, max_concurrency=8,
+                 pool_size=None, connect_timeout=3.05, read_timeout=10, acquire_timeout=5,
+                 max_retries=2, backoff=0.5, max_backoff=4.0):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.acquire_timeout = acquire_timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        pool_size = pool_size or self.max_concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'X-goog-api-key': api_key
+        })
+
+    def url(self, method='generateContent'):
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    def retry_delay(self, attempt, response=None):
+        """Seconds to wait before retry number attempt (0-based)"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # Full jitter keeps callers that failed together from retrying together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _remaining(self, deadline):
+        """Seconds left before deadline; raises GeminiTimeoutError once it has passed"""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise GeminiTimeoutError('Gemini call deadline exceeded')
+        return remaining
+
+    def _acquire(self, deadline):
+        remaining = self._remaining(deadline)
+        wait = self.acquire_timeout if remaining is None else min(self.acquire_timeout, remaining)
+        if not self._slots.acquire(timeout=wait):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise GeminiTimeoutError('Gemini call deadline exceeded waiting for a slot')
+            raise GeminiBusyError('Too many concurrent Gemini requests')
+
+    def _attempt_timeout(self, deadline):
+        """(connect, read) timeouts for one attempt, capped by the time left"""
+        remaining = self._remaining(deadline)
+        if remaining is None:
+            return self.timeout
+        return tuple(min(limit, remaining) for limit in self.timeout)
+
+    def _post(self, method, deadline=None, **kwargs):
+        """POST to a model method, retrying rate limits, 5xx and dropped connections"""
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(deadline)
+            try:
+                response = self.session.post(self.url(method), timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                response.close()
+
+            delay = self.retry_delay(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                # The retry could not finish in time; report the last failure
+                if response is None:
+                    raise GeminiTimeoutError('Gemini call deadline exceeded before a retry')
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    def generate_content(self, text, generation_config=None, timeout=None, deadline=None):
+        """
+        POST a generateContent request and return the decoded JSON response.
+        timeout (seconds) or deadline (time.monotonic() value) bound the whole call.
+        """
+        deadline = deadline or deadline_after(timeout)
+        self._acquire(deadline)
+        try:
+            response = self._post('generateContent', deadline, json=build_payload(text, generation_config))
+            response.raise_for_status()
+            return response.json()
+        finally:
+            self._slots.release()
+
+    def generate_text(self, text, generation_config=None, timeout=None, deadline=None):
+        """Return the first candidate's text, or '' if there is none"""
+        texts = extract_texts(self.generate_content(text, generation_config, timeout, deadline))
+        return texts[0] if texts else ''
+
+    def stream_text(self, text, generation_config=None, timeout=None, deadline=None):
+        """Yield the first candidate's text in pieces as the response streams in"""
+        deadline = deadline or deadline_after(timeout)
+        self._acquire(deadline)
+        try:
+            # Only the request is retried; once text has been yielded a
+            # failure is the caller's to handle
+            response = self._post(
+                'streamGenerateContent',
+                deadline,
+                params={'alt': 'sse'},
+                json=build_payload(text, generation_config),
+                stream=True
+            )
+            with response:
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    piece = extract_chunk_text(json.loads(line[5:]))
+                    if piece:
+                        yield piece
+                    # Read timeouts only bound the gap between chunks
+                    self._remaining(deadline)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncGeminiClient:
+    """asyncio wrapper running pooled GeminiClient calls in an executor"""
+
+    def __init__(self, client, executor=None):
+        self.client = client
+        self.executor = executor
+        self._slots = None
+
+    def _semaphore(self):
+        # Created lazily so it binds to the loop that first uses it
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.client.max_concurrency)
+        return self._slots
+
+    async def generate_content(self, text, generation_config=None, timeout=None):
+        loop = asyncio.get_running_loop()
+        # The deadline starts now, so time queued on the event loop counts
+        deadline = deadline_after(timeout)
+        async with self._semaphore():
+            return await loop.run_in_executor(
+                self.executor,
+                lambda: self.client.generate_content(text, generation_config, deadline=deadline)
+            )
+
+    async def generate_text(self, text, generation_config=None, timeout=None):
+        texts = extract_texts(await self.generate_content(text, generation_config, timeout))
+        return texts[0] if texts else ''
@@ -0,0 +1,214 @@
+"""
+System health metrics for the admin feed.
+
+Hot paths only append a sample to a fixed-size LatencyWindow (a lock and a
+deque append); everything else - percentiles, /proc reads, directory sizes -
+is computed by HealthCollector.snapshot() on the background health thread.
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LatencyWindow:
+    """Most recent call durations and outcomes, plus running totals"""
+
+    def __init__(self, size=512):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self._samples.append((seconds, ok))
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+
+    def summary(self):
+        """Percentiles (ms) and error rate over the window"""
+        with self._lock:
+            samples = list(self._samples)
+        durations = sorted(seconds * 1000 for seconds, _ in samples)
+        failures = sum(1 for _, ok in samples if not ok)
+        return {
+            'count': len(samples),
+            'p50_ms': percentile(durations, 0.50),
+            'p95_ms': percentile(durations, 0.95),
+            'p99_ms': percentile(durations, 0.99),
+            'error_rate': failures / len(samples) if samples else 0.0
+        }
+
+
+def read_process_times():
+    """CPU seconds (user + system) used by this process"""
+    with open('/proc/self/stat') as f:
+        # The command name may contain spaces, so split after its closing paren
+        fields = f.read().rsplit(')', 1)[1].split()
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks
+
+
+def read_memory():
+    """(process RSS, total system memory) in bytes"""
+    rss = total = 0
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) * 1024
+                break
+    with open('/proc/meminfo') as f:
+        for line in f:
+            if line.startswith('MemTotal:'):
+                total = int(line.split()[1]) * 1024
+                break
+    return rss, total
+
+
+def read_network_bytes():
+    """Bytes received + sent on all non-loopback interfaces"""
+    total = 0
+    with open('/proc/net/dev') as f:
+        for line in f.readlines()[2:]:
+            name, data = line.split(':', 1)
+            if name.strip() == 'lo':
+                continue
+            fields = data.split()
+            total += int(fields[0]) + int(fields[8])
+    return total
+
+
+def directory_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+                elif entry.is_dir(follow_symlinks=False):
+                    total += directory_size(entry.path)
+    except OSError:
+        pass
+    return total
+
+
+def _ms(value):
+    if value is None:
+        return 'n/a'
+    return f'{value:.1f}ms' if value < 10 else f'{value:.0f}ms'
+
+
+class HealthCollector:
+    """Builds the system_health_update payload from measured values"""
+
+    def __init__(self, db_latency=None, images_dir='generated_images', database_path=None):
+        self.db = db_latency or LatencyWindow()
+        self.gemini = LatencyWindow()
+        self.diffusion = LatencyWindow(size=128)
+        self.images_dir = images_dir
+        self.database_path = database_path
+        self._last = None
+
+    def _rates(self, now):
+        """CPU %, network Mbps and Gemini calls/hour since the previous snapshot"""
+        try:
+            cpu_seconds = read_process_times()
+        except (OSError, ValueError, IndexError):
+            cpu_seconds = None
+        try:
+            net_bytes = read_network_bytes()
+        except (OSError, ValueError, IndexError):
+            net_bytes = None
+        current = (now, cpu_seconds, net_bytes, self.gemini.calls)
+        previous, self._last = self._last, current
+        if previous is None or now <= previous[0]:
+            return None, None, None
+
+        elapsed = now - previous[0]
+        cpu = net = None
+        if cpu_seconds is not None and previous[1] is not None:
+            cpu = 100 * (cpu_seconds - previous[1]) / elapsed
+        if net_bytes is not None and previous[2] is not None:
+            net = (net_bytes - previous[2]) * 8 / elapsed / 1e6
+        calls_per_hour = (self.gemini.calls - previous[3]) * 3600 / elapsed
+        return cpu, net, calls_per_hour
+
+    def snapshot(self, queue_depth=0, probe=None, connections=None):
+        """
+        Collect current metrics. probe() runs a representative query so the
+        database latency window has fresh samples even when the app is idle.
+        """
+        if probe:
+            started = time.perf_counter()
+            try:
+                probe()
+                self.db.record(time.perf_counter() - started)
+            except Exception:
+                self.db.record(time.perf_counter() - started, ok=False)
+
+        cpu, net, calls_per_hour = self._rates(time.monotonic())
+        db = self.db.summary()
+        gemini = self.gemini.summary()
+        diffusion = self.diffusion.summary()
+
+        try:
+            rss, mem_total = read_memory()
+            memory = f'{rss / 2**30:.2f}GB/{mem_total / 2**30:.1f}GB'
+        except (OSError, ValueError):
+            memory = 'n/a'
+        try:
+            usage = shutil.disk_usage(self.images_dir if os.path.isdir(self.images_dir) else '.')
+            disk = f'{100 * usage.used / usage.total:.0f}% used'
+        except OSError:
+            disk = 'n/a'
+        try:
+            load = f'{os.getloadavg()[0]:.1f}'
+        except OSError:
+            load = 'n/a'
+
+        db_bytes = 0
+        if self.database_path:
+            for suffix in ('', '-wal'):
+                try:
+                    db_bytes += os.path.getsize(self.database_path + suffix)
+                except OSError:
+                    pass
+
+        return {
+            'database': {
+                'responseTime': _ms(db['p50_ms']),
+                'p95': _ms(db['p95_ms']),
+                'p99': _ms(db['p99_ms']),
+                'connections': f'{connections} open' if connections is not None else 'n/a',
+                'storage': f'{db_bytes / 2**20:.1f}MB used'
+            },
+            'ai': {
+                'apiCalls': f'{calls_per_hour / 1000:.1f}K/hour' if calls_per_hour is not None else 'n/a',
+                'successRate': f'{100 * (1 - gemini["error_rate"]):.1f}%' if gemini['count'] else 'n/a',
+                'queue': f'{queue_depth} pending',
+                'latency': _ms(gemini['p50_ms']),
+                'latencyP95': _ms(gemini['p95_ms']),
+                'errorRate': f'{100 * gemini["error_rate"]:.1f}%',
+                'diffusion': f'{diffusion["p50_ms"] / 1000:.1f}s' if diffusion['count'] else 'n/a'
+            },
+            'server': {
+                'cpu': f'{cpu:.0f}%' if cpu is not None else 'n/a',
+                'memory': memory,
+                'disk': disk,
+                'images': f'{directory_size(self.images_dir) / 2**20:.1f}MB',
+                'network': f'{net:.1f} Mbps' if net is not None else 'n/a',
+                'load': load
+            }
+        }
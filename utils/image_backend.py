@@ -0,0 +1,114 @@
+"""
+Image generation backend.
+
+The web tier talks to a backend through ``render(prompts, paths, preset, **settings)``
+and never imports torch or diffusers itself; LocalDiffusionBackend imports
+them on the first image request, so starting the app, running scripts and
+serving text-only traffic never pay for the heavy stack. See
+utils/image_workers.py for the out-of-process backend.
+"""
+
+import threading
+
+DEFAULT_SETTINGS = {
+    'height': 512,
+    'width': 512,
+    'num_inference_steps': 15,
+    'guidance_scale': 6.0
+}
+
+# Diffusers scheduler classes by short name, with extra config. Multistep
+# solvers reach a given quality in far fewer steps than the model's default
+# PNDM scheduler, which is what makes low step counts usable on CPU.
+SCHEDULERS = {
+    'default': None,
+    'dpm++': ('DPMSolverMultistepScheduler', {'use_karras_sigmas': True}),
+    'unipc': ('UniPCMultistepScheduler', {}),
+    'euler_a': ('EulerAncestralDiscreteScheduler', {}),
+}
+
+# Quality presets selectable per image: scheduler, step count and resolution
+PREVIEW_PRESET = 'preview'
+QUALITY_PRESETS = {
+    PREVIEW_PRESET: {'scheduler': 'dpm++', 'num_inference_steps': 6, 'height': 384, 'width': 384,
+                     'guidance_scale': 5.0},
+    'standard': {'scheduler': 'dpm++', 'num_inference_steps': 15, 'height': 512, 'width': 512,
+                 'guidance_scale': 6.0},
+    'high': {'scheduler': 'dpm++', 'num_inference_steps': 30, 'height': 640, 'width': 640,
+             'guidance_scale': 7.0},
+}
+DEFAULT_PRESET = 'standard'
+
+
+def preset_settings(preset=None, **overrides):
+    """Pipeline settings for a preset name, with explicit settings taking precedence"""
+    if preset is not None and preset not in QUALITY_PRESETS:
+        raise ValueError(f"Unknown quality preset '{preset}'")
+    settings = dict(DEFAULT_SETTINGS, scheduler='default')
+    if preset:
+        settings.update(QUALITY_PRESETS[preset])
+    settings.update(overrides)
+    return settings
+
+
+def use_scheduler(pipe, name):
+    """Switch a pipeline to the named scheduler; instances are kept on the pipeline for reuse"""
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler '{name}'")
+    schedulers = pipe.__dict__.setdefault('_preset_schedulers', {'default': pipe.scheduler})
+    if name not in schedulers:
+        import diffusers
+        class_name, options = SCHEDULERS[name]
+        schedulers[name] = getattr(diffusers, class_name).from_config(schedulers['default'].config, **options)
+    pipe.scheduler = schedulers[name]
+
+
+def resolve_device(torch_threads=None):
+    """Pick (device, dtype): CUDA with fp16 when available, else CPU with fp32"""
+    try:
+        import torch
+    except ImportError:
+        # The pipeline loader reports the missing dependency when it runs
+        return 'cpu', None
+    if torch.cuda.is_available():
+        return 'cuda', torch.float16
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    return 'cpu', torch.float32
+
+
+class LocalDiffusionBackend:
+    """Runs batched diffusion in this process using a shared PipelineCache"""
+
+    def __init__(self, model_id, cache, torch_threads=None):
+        self.model_id = model_id
+        self.cache = cache
+        self.torch_threads = torch_threads
+        self._device = None
+        self._lock = threading.Lock()
+
+    @property
+    def device(self):
+        with self._lock:
+            if self._device is None:
+                self._device = resolve_device(self.torch_threads)
+            return self._device
+
+    def generate(self, prompts, preset=None, **settings):
+        """Run one pipeline call for a list of prompts; returns PIL images"""
+        device, dtype = self.device
+        options = preset_settings(preset, **settings)
+        scheduler = options.pop('scheduler')
+        with self.cache.use(self.model_id, device, dtype) as pipe:
+            # Safe to switch: the cache lends a pipeline to one caller at a
+            # time. Stand-in pipelines used by the benchmarks have no scheduler.
+            if hasattr(pipe, 'scheduler'):
+                use_scheduler(pipe, scheduler)
+            return pipe(prompts, **options).images
+
+    def render(self, prompts, paths, preset=None, **settings):
+        """Generate one image per prompt and save it to the matching path"""
+        images = self.generate(prompts, preset, **settings)
+        for image, path in zip(images, paths):
+            image.save(path)
+        return paths
@@ -0,0 +1,274 @@
+"""
+Background image-generation job queue.
+
+Requests enqueue a job and return straight away; dedicated worker threads run
+the diffusion step, store the result and hand the finished job to a
+completion callback (used by the app to notify the user over Socket.IO).
+Job state is persisted in the ``image_jobs`` table so it can be polled and
+survives a restart.
+
+Jobs are tagged with the worker process that runs them, so a restarting
+process only fails its own unfinished jobs and leaves those of the other web
+workers alone. A job can be submitted before its content row exists and
+linked to it later with attach_content(), so the image renders while the
+tweet is still being generated.
+
+A job can ask for a quick preview first: the preview is rendered with the
+preview preset, applied to the content row and announced through on_preview,
+then replaced by the full image.
+"""
+
+import queue
+import sqlite3
+import threading
+import uuid
+
+from utils.db import get_db, transaction
+from utils.user_stats import record_image_added
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class ImageJobQueue:
+    """Bounded queue of image jobs served by a fixed pool of worker threads"""
+
+    def __init__(self, generate, on_complete=None, max_queued=32, workers=1, worker_id='main',
+                 preview_preset=None, on_preview=None):
+        # generate(prompt, preset) -> image URL or None
+        self.generate = generate
+        self.worker_id = worker_id
+        self.on_complete = on_complete
+        self.preview_preset = preview_preset
+        self.on_preview = on_preview
+        self.workers = max(1, int(workers))
+        self._queue = queue.Queue(maxsize=max(1, int(max_queued)))
+        self._threads = []
+        self._finished = {}
+        self._previewed = {}
+        self._finished_lock = threading.Lock()
+        self._pending = 0
+
+    def start(self):
+        """Fail this worker's jobs interrupted by its previous shutdown and start the workers"""
+        if self._threads:
+            return
+        with transaction() as cursor:
+            cursor.execute('''
+                UPDATE image_jobs
+                SET status = ?, error = 'Interrupted by server restart', updated_at = CURRENT_TIMESTAMP
+                WHERE status IN (?, ?) AND (worker = ? OR worker IS NULL)
+            ''', (JOB_FAILED, JOB_QUEUED, JOB_RUNNING, self.worker_id))
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'image-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wants_preview(self, preset, preview_first):
+        """Whether a job for this preset really renders a preview before its image"""
+        return bool(preview_first and self.preview_preset and preset != self.preview_preset)
+
+    def renders(self, preset=None, preview_first=False):
+        """Diffusion runs a job costs: two with a preview first, otherwise one"""
+        return 2 if self.wants_preview(preset, preview_first) else 1
+
+    def submit(self, user_id, prompt, content_id=None, preset=None, preview_first=False):
+        """Queue a job and return its id, or raise QueueFullError"""
+        job_id = uuid.uuid4().hex
+        preview_first = self.wants_preview(preset, preview_first)
+        with self._finished_lock:
+            self._finished[job_id] = threading.Event()
+            if preview_first:
+                self._previewed[job_id] = threading.Event()
+        with transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO image_jobs (id, user_id, content_id, prompt, status, worker, preset, preview_first)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (job_id, user_id, content_id, prompt, JOB_QUEUED, self.worker_id, preset, preview_first))
+
+        # Counted before the put, so a worker never decrements it first
+        with self._finished_lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._finished_lock:
+                self._pending -= 1
+            self._set_status(job_id, JOB_FAILED, error='Image queue is full')
+            self._mark_finished(job_id)
+            raise QueueFullError('Image generation queue is full')
+        return job_id
+
+    def attach_content(self, job_id, content_id):
+        """
+        Link a job to its content row. If the job already finished, or has a
+        preview, that image is applied to the row here; returns the job as
+        of the link.
+        """
+        with transaction() as cursor:
+            cursor.execute('UPDATE image_jobs SET content_id = ? WHERE id = ?', (content_id, job_id))
+            cursor.row_factory = sqlite3.Row
+            job = dict(cursor.execute('SELECT * FROM image_jobs WHERE id = ?', (job_id,)).fetchone())
+            if job['status'] == JOB_DONE and job['image_url']:
+                self._apply_image(cursor, job['user_id'], content_id, job['image_url'], replaces=job['preview_url'])
+            elif job['preview_url']:
+                self._apply_image(cursor, job['user_id'], content_id, job['preview_url'])
+        return job
+
+    def wait(self, job_id, timeout=None, until_preview=False):
+        """
+        Block until the job finishes (or, with until_preview, until its
+        preview is ready) or timeout passes; returns its current state
+        """
+        with self._finished_lock:
+            event = (until_preview and self._previewed.get(job_id)) or self._finished.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Return the stored state of a job as a dict, or None"""
+        cursor = get_db().cursor()
+        cursor.row_factory = sqlite3.Row
+        row = cursor.execute('SELECT * FROM image_jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def depth(self):
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def pending(self):
+        """Number of jobs queued or running"""
+        return self._pending
+
+    def _set_status(self, job_id, status, image_url=None, error=None):
+        with transaction() as cursor:
+            cursor.execute('''
+                UPDATE image_jobs
+                SET status = ?, image_url = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status, image_url, error, job_id))
+
+    def _mark_previewed(self, job_id):
+        with self._finished_lock:
+            event = self._previewed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _mark_finished(self, job_id):
+        self._mark_previewed(job_id)
+        with self._finished_lock:
+            event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _apply_image(self, cursor, user_id, content_id, image_url, replaces=None):
+        """Set the row's image if it has none, or swap out the preview it replaces"""
+        cursor.execute('SELECT image_url FROM generated_content WHERE id = ?', (content_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        if row[0] is None:
+            cursor.execute('UPDATE generated_content SET image_url = ? WHERE id = ?', (image_url, content_id))
+            record_image_added(cursor, user_id)
+        elif replaces and row[0] == replaces:
+            cursor.execute('UPDATE generated_content SET image_url = ? WHERE id = ?', (image_url, content_id))
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"[ERROR] Image job {job_id} crashed: {e}")
+            finally:
+                with self._finished_lock:
+                    self._pending -= 1
+                self._mark_finished(job_id)
+                self._queue.task_done()
+
+    def _run_preview(self, job):
+        """Render, store and announce the quick preview; returns its URL or None"""
+        try:
+            preview_url = self.generate(job['prompt'], self.preview_preset)
+        except Exception as e:
+            print(f"[ERROR] Preview for image job {job['id']} failed: {e}")
+            preview_url = None
+        if not preview_url:
+            return None
+
+        with transaction() as cursor:
+            cursor.execute('''
+                UPDATE image_jobs SET preview_url = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (preview_url, job['id']))
+            cursor.execute('SELECT content_id FROM image_jobs WHERE id = ?', (job['id'],))
+            content_id = cursor.fetchone()[0]
+            if content_id:
+                self._apply_image(cursor, job['user_id'], content_id, preview_url)
+        self._mark_previewed(job['id'])
+
+        if self.on_preview and content_id:
+            try:
+                previewed = self.get(job['id'])
+                previewed['content_id'] = content_id
+                self.on_preview(previewed)
+            except Exception as e:
+                print(f"[ERROR] Image preview callback failed: {e}")
+        return preview_url
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        if not job:
+            return
+        self._set_status(job_id, JOB_RUNNING)
+
+        preview_url = self._run_preview(job) if job['preview_first'] else None
+
+        image_url = None
+        error = None
+        content_id = job['content_id']
+        try:
+            image_url = self.generate(job['prompt'], job['preset'])
+            if not image_url:
+                error = 'Image generation failed'
+        except Exception as e:
+            error = str(e)
+
+        if image_url:
+            with transaction() as cursor:
+                cursor.execute('''
+                    UPDATE image_jobs
+                    SET status = ?, image_url = ?, error = NULL, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (JOB_DONE, image_url, job_id))
+                # Re-read the link: attach_content may have run meanwhile
+                cursor.execute('SELECT content_id FROM image_jobs WHERE id = ?', (job_id,))
+                content_id = cursor.fetchone()[0]
+                if content_id:
+                    self._apply_image(cursor, job['user_id'], content_id, image_url, replaces=preview_url)
+        else:
+            with transaction() as cursor:
+                cursor.execute('''
+                    UPDATE image_jobs
+                    SET status = ?, image_url = NULL, error = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (JOB_FAILED, error, job_id))
+                cursor.execute('SELECT content_id FROM image_jobs WHERE id = ?', (job_id,))
+                content_id = cursor.fetchone()[0]
+
+        if self.on_complete:
+            try:
+                finished = self.get(job_id)
+                # Report the link as it was when the job finished; a later
+                # attach_content() handles the result itself
+                finished['content_id'] = content_id
+                self.on_complete(finished)
+            except Exception as e:
+                print(f"[ERROR] Image job callback failed: {e}")
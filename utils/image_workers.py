@@ -0,0 +1,106 @@
+"""
+Out-of-process image generation.
+
+ProcessImageBackend runs diffusion in a pool of spawned worker processes, so
+CPU-bound inference never competes with the web process for the GIL or
+stalls the Socket.IO event loop. Each worker keeps its own PipelineCache,
+limits torch to a fixed number of threads and saves finished images
+straight to disk; only prompts and file paths cross the process boundary.
+If a worker dies the pool is replaced and the batch retried. Workers only
+need this module; app.py keeps them from re-importing the web app.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# The backend owned by a worker process, set up by _init_worker
+_worker_backend = None
+
+
+def _init_worker(model_id, torch_threads, cache_settings):
+    global _worker_backend
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+    from utils.image_backend import LocalDiffusionBackend
+    from utils.pipeline_cache import PipelineCache
+    _worker_backend = LocalDiffusionBackend(model_id, PipelineCache(**cache_settings))
+
+
+def _render_in_worker(prompts, paths, settings):
+    return _worker_backend.render(prompts, paths, **settings)
+
+
+def default_torch_threads(processes):
+    """Split the machine's cores evenly between worker processes"""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+class ProcessImageBackend:
+    """Renders batches in a pool of worker processes, restarting it after a crash"""
+
+    def __init__(self, model_id, processes=1, torch_threads=None, cache_settings=None, max_retries=1):
+        self.model_id = model_id
+        self.processes = max(1, int(processes))
+        self.torch_threads = torch_threads or default_torch_threads(self.processes)
+        self.cache_settings = cache_settings or {}
+        self.max_retries = max_retries
+        self._executor = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.restarts = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: torch and CUDA are not fork-safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.model_id, self.torch_threads, self.cache_settings)
+                )
+            return self._executor
+
+    def _replace(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, prompts, paths, **settings):
+        """Generate one image per prompt in a worker and save it to the matching path"""
+        paths = [os.path.abspath(path) for path in paths]
+        for attempt in range(self.max_retries + 1):
+            executor = self._get_executor()
+            try:
+                result = executor.submit(_render_in_worker, list(prompts), paths, settings).result()
+                self.batches += 1
+                return result
+            except BrokenProcessPool:
+                print(f"[ERROR] Image worker process died; restarting the pool (attempt {attempt + 1})")
+                self._replace(executor)
+                if attempt == self.max_retries:
+                    raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'processes': self.processes,
+            'torch_threads': self.torch_threads,
+            'batches': self.batches,
+            'restarts': self.restarts
+        }
@@ -0,0 +1,61 @@
+"""
+Leader election between web processes.
+
+Work that must happen once per deployment rather than once per process
+(the admin health feed) is guarded by a lease row in SQLite. The holder
+renews the lease each time it does the work; if it stops renewing, any
+other process takes the lease over once it has expired.
+"""
+
+import os
+import socket
+import time
+
+from utils.db import transaction
+
+
+def default_holder():
+    """Identifies this process among all workers on all hosts"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLease:
+    """A named, time-limited lease that at most one process holds at a time"""
+
+    def __init__(self, name, ttl=75, holder=None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or default_holder()
+        self.is_leader = False
+
+    def acquire(self):
+        """Take or renew the lease; returns True while this process holds it"""
+        now = time.time()
+        try:
+            with transaction() as cursor:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO leases (name, holder, expires_at) VALUES (?, ?, 0)',
+                    (self.name, self.holder)
+                )
+                cursor.execute('''
+                    UPDATE leases SET holder = ?, expires_at = ?
+                    WHERE name = ? AND (holder = ? OR expires_at < ?)
+                ''', (self.holder, now + self.ttl, self.name, self.holder, now))
+                held = cursor.rowcount == 1
+        except Exception as e:
+            print(f"[ERROR] Lease '{self.name}' update failed: {e}")
+            held = False
+
+        if held != self.is_leader:
+            print(f"[DEBUG] {self.holder} {'acquired' if held else 'lost'} lease '{self.name}'")
+        self.is_leader = held
+        return held
+
+    def release(self):
+        """Give the lease up so another process can take it at once"""
+        with transaction() as cursor:
+            cursor.execute(
+                'UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ?',
+                (self.name, self.holder)
+            )
+        self.is_leader = False
@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the sort key of the last row on a page, so the next page is
+fetched with an indexed ``WHERE (created_at, id) < (?, ?)`` seek instead of
+an OFFSET that grows with the page number.
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(*values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size=2):
+    """Return the list of sort key values stored in a cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a page size query parameter into 1..maximum"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def split_page(rows, limit):
+    """Split a LIMIT limit+1 result into (page rows, has_more)"""
+    return rows[:limit], len(rows) > limit
+
+
+def keyset_page_sql(sort_column, descending, cursor, id_column='id'):
+    """
+    Build the seek condition and ORDER BY for a (sort_column, id) keyset.
+    Returns (where_sql, params, order_sql); where_sql is '' on the first page.
+    """
+    direction = 'DESC' if descending else 'ASC'
+    if sort_column == id_column:
+        order_sql = f'ORDER BY {id_column} {direction}'
+        if not cursor:
+            return '', [], order_sql
+        (last_id,) = decode_cursor(cursor, size=1)
+        return f'{id_column} {"<" if descending else ">"} ?', [last_id], order_sql
+
+    order_sql = f'ORDER BY {sort_column} {direction}, {id_column} {direction}'
+    if not cursor:
+        return '', [], order_sql
+    last_value, last_id = decode_cursor(cursor)
+    return f'({sort_column}, {id_column}) {"<" if descending else ">"} (?, ?)', [last_value, last_id], order_sql
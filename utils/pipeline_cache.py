@@ -0,0 +1,173 @@
+"""
+Process-wide cache of loaded Stable Diffusion pipelines.
+
+Loading a pipeline from disk takes far longer than a short denoising run, so
+pipelines are loaded once per (model id, device, dtype) and shared by every
+request in the process. Least recently used pipelines are evicted when the
+cache is full, when they have been idle too long, or when the estimated
+memory of all cached pipelines exceeds the configured budget.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def load_stable_diffusion_pipeline(model_id, device, dtype, channels_last=None):
+    """Load a Stable Diffusion pipeline with the settings used by the app"""
+    from diffusers import StableDiffusionPipeline
+
+    pipe = StableDiffusionPipeline.from_pretrained(
+        model_id,
+        dtype=dtype,
+        low_cpu_mem_usage=True
+    ).to(device)
+
+    pipe.enable_attention_slicing()
+    pipe.enable_vae_slicing()
+
+    if device == "cuda":
+        import torch
+        pipe.vae.to(dtype=torch.float32)
+
+    # NHWC layout lets oneDNN pick its faster convolution kernels on CPU
+    if channels_last is None:
+        channels_last = device == "cpu"
+    if channels_last:
+        import torch
+        pipe.unet.to(memory_format=torch.channels_last)
+        pipe.vae.to(memory_format=torch.channels_last)
+
+    return pipe
+
+
+def estimate_pipeline_bytes(pipe):
+    """Estimate the memory held by a pipeline's model weights"""
+    total = 0
+    components = getattr(pipe, 'components', None) or {}
+    for component in components.values():
+        parameters = getattr(component, 'parameters', None)
+        if not callable(parameters):
+            continue
+        try:
+            total += sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            continue
+    return total
+
+
+class _CacheEntry:
+    def __init__(self, pipe, size_bytes):
+        self.pipe = pipe
+        self.size_bytes = size_bytes
+        self.last_used = time.monotonic()
+        # Pipelines keep per-call scheduler state, so one call at a time
+        self.run_lock = threading.Lock()
+
+
+class PipelineCache:
+    """Thread-safe LRU cache of pipelines keyed by (model id, device, dtype)"""
+
+    def __init__(self, max_entries=1, idle_timeout=1800, memory_budget_mb=None, loader=None):
+        self.max_entries = max(1, int(max_entries))
+        self.idle_timeout = idle_timeout
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self.loader = loader or load_stable_diffusion_pipeline
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_id, device, dtype):
+        """Return the cached pipeline for the key, loading it on first use"""
+        return self._get_entry((model_id, device, dtype)).pipe
+
+    @contextmanager
+    def use(self, model_id, device, dtype):
+        """Borrow a pipeline for exclusive use by the calling thread"""
+        entry = self._get_entry((model_id, device, dtype))
+        with entry.run_lock:
+            try:
+                yield entry.pipe
+            finally:
+                entry.last_used = time.monotonic()
+
+    def _get_entry(self, key):
+        with self._lock:
+            self._evict_idle_locked()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.monotonic()
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the cache lock so other keys stay available; the
+        # per-key lock makes concurrent first requests share a single load.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry.last_used = time.monotonic()
+                    self.hits += 1
+                    return entry
+                self.misses += 1
+
+            print(f"[DEBUG] Loading pipeline {key[0]} on {key[1]}")
+            pipe = self.loader(*key)
+            entry = _CacheEntry(pipe, estimate_pipeline_bytes(pipe))
+
+            with self._lock:
+                self._entries[key] = entry
+                self._load_locks.pop(key, None)
+                self._enforce_limits_locked()
+            return entry
+
+    def _evict_locked(self, key):
+        self._entries.pop(key, None)
+        self.evictions += 1
+        print(f"[DEBUG] Evicted pipeline {key[0]} on {key[1]}")
+
+    def _evict_idle_locked(self):
+        if not self.idle_timeout:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        for key, entry in list(self._entries.items()):
+            if entry.last_used < cutoff and not entry.run_lock.locked():
+                self._evict_locked(key)
+
+    def _enforce_limits_locked(self):
+        # The most recently loaded pipeline is always kept, even on its own
+        # over budget, otherwise the caller would get nothing back.
+        while len(self._entries) > self.max_entries:
+            self._evict_locked(next(iter(self._entries)))
+        if self.memory_budget_bytes:
+            while len(self._entries) > 1 and self.total_bytes() > self.memory_budget_bytes:
+                self._evict_locked(next(iter(self._entries)))
+
+    def evict_idle(self):
+        """Drop pipelines that have not been used within the idle timeout"""
+        with self._lock:
+            self._evict_idle_locked()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def total_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'memory_mb': round(self.total_bytes() / (1024 * 1024), 1)
+            }
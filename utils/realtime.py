@@ -0,0 +1,73 @@
+"""
+Coalesced delivery of real-time events.
+
+The admin feed receives an event for every user action. Instead of one
+Socket.IO message per event, EventCoalescer buffers them and hands the
+whole buffer to a send callback at most once per interval, so a burst of
+activity costs each admin browser one message rather than hundreds.
+"""
+
+import threading
+import time
+
+
+class EventCoalescer:
+    """Buffers (event, data) pairs and sends them in batches, at most one batch per interval"""
+
+    def __init__(self, send, interval=0.5, max_batch=200, name='event-coalescer'):
+        self.send = send
+        self.interval = interval
+        self.max_batch = max(1, int(max_batch))
+        self.name = name
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.published = 0
+        self.batches = 0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def publish(self, event, data):
+        """Queue an event; it is sent with the next batch"""
+        with self._lock:
+            self._pending.append({'event': event, 'data': data})
+            self.published += 1
+            full = len(self._pending) >= self.max_batch
+            self._ensure_thread()
+            self._wake.set()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Send everything buffered so far as one batch"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._wake.clear()
+        if not events:
+            return
+        self.batches += 1
+        try:
+            self.send(events)
+        except Exception as e:
+            print(f"[ERROR] Sending {len(events)} coalesced events failed: {e}")
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let the rest of the burst arrive before sending
+            time.sleep(self.interval)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'interval': self.interval,
+            'published': self.published,
+            'batches': self.batches,
+            'pending': pending
+        }
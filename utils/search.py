@@ -0,0 +1,69 @@
+"""
+Full-text search over generated content.
+
+``content_fts`` is an FTS5 index over generated_content.prompt and
+generated_tweet, kept in sync by triggers (see migration 6 in utils/db.py)
+and stored as an external-content table, so the text itself is not
+duplicated. Search input is turned into a MATCH query of quoted terms, so
+no user input is ever parsed as FTS5 query syntax.
+"""
+
+import html
+import re
+
+# bm25 column weights: a match in the prompt says more about what a user is
+# looking for than the same word somewhere in a generated tweet
+PROMPT_WEIGHT = 2.0
+TWEET_WEIGHT = 1.0
+MAX_TERMS = 16
+
+# Control characters cannot appear in escaped text, so they mark matches
+# through html.escape and are swapped for <mark> tags afterwards
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+_TERM_RE = re.compile(r'"([^"]*)"|(\w+)', re.UNICODE)
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text):
+    """
+    MATCH expression for free-text input, or None if it has no terms.
+    Words must all match, "quoted phrases" match as phrases and the last
+    word matches as a prefix so results appear while the user types.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(text or ''):
+        if word:
+            terms.append((word, False))
+        else:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                terms.append((' '.join(words), True))
+    terms = terms[:MAX_TERMS]
+    if not terms:
+        return None
+
+    parts = [f'"{term}"' for term, _ in terms]
+    if not terms[-1][1] and not (text or '').rstrip().endswith('"'):
+        parts[-1] += '*'
+    return ' '.join(parts)
+
+
+def highlight_sql(column):
+    """SQL for the FTS5 highlight() of an indexed column with match markers"""
+    return f"highlight(content_fts, {column}, char(2), char(3))"
+
+
+def render_highlight(marked):
+    """HTML-escape highlighted text and turn its match markers into <mark> tags"""
+    if marked is None:
+        return None
+    return html.escape(marked).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def rebuild_search_index(conn):
+    """Re-index every content row and merge the index; returns the row count"""
+    with conn:
+        conn.execute("INSERT INTO content_fts (content_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO content_fts (content_fts) VALUES ('optimize')")
+    return conn.execute('SELECT COUNT(*) FROM generated_content').fetchone()[0]
@@ -0,0 +1,85 @@
+"""
+SQLite-backed message queue for Flask-SocketIO.
+
+With several web processes, each one only knows its own Socket.IO clients,
+so an emit must be relayed to every process. python-socketio does this
+through a pub/sub client manager (Redis, Kombu, ...); SQLiteManager is the
+same thing on top of a shared SQLite file, for single-box deployments and
+tests that should not need a broker. Every emit is appended to a table and
+each process polls it for rows newer than the last one it handled.
+"""
+
+import pickle
+import threading
+import time
+
+import socketio
+
+from utils.db import connect
+
+URL_PREFIX = 'sqlite:///'
+
+
+class SQLiteManager(socketio.PubSubManager):
+    """Socket.IO client manager relaying emits between processes through a SQLite table"""
+
+    name = 'sqlite'
+
+    def __init__(self, url='sqlite:///socketio-queue.db', channel='flask-socketio', write_only=False,
+                 logger=None, poll_interval=0.05, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = url[len(URL_PREFIX):] if url.startswith(URL_PREFIX) else url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS socketio_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def _publish(self, data):
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT INTO socketio_messages (channel, payload, created_at) VALUES (?, ?, ?)',
+                (self.channel, pickle.dumps(data), time.time())
+            )
+
+    def _prune(self, conn):
+        with conn:
+            conn.execute('DELETE FROM socketio_messages WHERE created_at < ?', (time.time() - self.retention,))
+
+    def _listen(self):
+        conn = self._connection()
+        # Only messages published after this process started are relayed
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        last_prune = time.monotonic()
+        while True:
+            try:
+                rows = conn.execute(
+                    'SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                    (last_id, self.channel)
+                ).fetchall()
+                if time.monotonic() - last_prune > self.retention:
+                    self._prune(conn)
+                    last_prune = time.monotonic()
+            except Exception as e:
+                print(f"[ERROR] Socket.IO queue read failed: {e}")
+                rows = []
+
+            for message_id, payload in rows:
+                last_id = message_id
+                yield bytes(payload)
+            if not rows:
+                # Yields to the Socket.IO async loop as well as other threads
+                self.server.sleep(self.poll_interval)
@@ -0,0 +1,194 @@
+"""
+Append-only training data log in JSON Lines format.
+
+Records are buffered in memory and appended to the active segment in
+batches under an exclusive file lock, so concurrent requests and processes
+never rewrite or corrupt earlier data. The active segment is rotated by size
+or age, rotated segments can be gzip-compressed, and iter_records() streams
+every record across all segments in order.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+
+class TrainingLog:
+    """Buffered, locked, rotating JSON Lines writer and reader"""
+
+    def __init__(self, directory='training_data', basename='generated_data', max_bytes=64 * 1024 * 1024,
+                 max_age=None, compress=True, buffer_size=50, flush_interval=2.0):
+        self.directory = directory
+        self.basename = basename
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.buffer_size = max(1, int(buffer_size))
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flusher = None
+        atexit.register(self.flush)
+
+    @property
+    def active_path(self):
+        return os.path.join(self.directory, f'{self.basename}.jsonl')
+
+    def append(self, record):
+        """Queue a record; it is written on the next batched flush"""
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.buffer_size
+        if full or not self.flush_interval:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='training-log-flusher', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Training data flush failed: {e}")
+
+    def flush(self):
+        """Write all buffered records to the active segment"""
+        with self._lock:
+            if not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            data = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+            os.makedirs(self.directory, exist_ok=True)
+            with self._open_active_locked() as f:
+                self._maybe_rotate(f)
+                f.write(data)
+                f.flush()
+
+    def _open_active_locked(self):
+        # Another process may rotate the file between open() and flock(), so
+        # retry until the locked handle is still the active segment.
+        while True:
+            f = open(self.active_path, 'a', encoding='utf-8')
+            if fcntl is None:
+                return f
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.active_path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _maybe_rotate(self, f):
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = self.max_age and self._segment_age() >= self.max_age
+        if too_big or too_old:
+            self._rotate(f)
+
+    def _segment_age(self):
+        try:
+            with open(self.active_path, 'r', encoding='utf-8') as active:
+                first = json.loads(active.readline())
+            started = datetime.fromisoformat(first['timestamp'])
+            return (datetime.now() - started).total_seconds()
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def _rotate(self, f):
+        """Move the active segment aside; f keeps writing to a fresh file"""
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        rotated = os.path.join(self.directory, f'{self.basename}-{stamp}-{uuid.uuid4().hex[:6]}.jsonl')
+        os.rename(self.active_path, rotated)
+        new_file = open(self.active_path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            fcntl.flock(new_file.fileno(), fcntl.LOCK_EX)
+        # Swap the underlying descriptor so the caller's handle points at
+        # the new segment; the old lock is released when its fd closes.
+        os.dup2(new_file.fileno(), f.fileno())
+        new_file.close()
+        if self.compress:
+            self._compress(rotated)
+
+    def _compress(self, path):
+        with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+
+    def segments(self):
+        """All segment paths, oldest first, ending with the active one"""
+        pattern = os.path.join(self.directory, f'{self.basename}-*.jsonl*')
+        paths = sorted(glob.glob(pattern))
+        if os.path.exists(self.active_path):
+            paths.append(self.active_path)
+        return paths
+
+    def iter_records(self):
+        """Stream every record from every segment without loading them all"""
+        self.flush()
+        for path in self.segments():
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        print(f"[WARNING] Skipping corrupt training record in {path}")
+
+    def migrate_json_array(self, json_path):
+        """
+        One-time import of a legacy JSON array file into a segment.
+        Returns the number of records migrated; the legacy file is renamed
+        to *.migrated so the migration never runs twice. Workers starting
+        together all call this: it runs under the writers' file lock, and a
+        file already gone once the lock is held was migrated by another one.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._open_active_locked():
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+            except FileNotFoundError:
+                return 0
+            except ValueError:
+                records = []
+            if not isinstance(records, list):
+                records = []
+
+            # Legacy records predate every rotated segment, so sort them
+            # first; the suffix keeps an earlier legacy archive intact
+            legacy = os.path.join(
+                self.directory, f'{self.basename}-00000000-000000-legacy-{uuid.uuid4().hex[:6]}.jsonl'
+            )
+            with open(legacy, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            if self.compress:
+                self._compress(legacy)
+            os.rename(json_path, json_path + '.migrated')
+        return len(records)
@@ -0,0 +1,117 @@
+"""
+Result cache for AI tweet generation.
+
+Tweets are cached by normalized prompt plus the generation settings, kept in
+an in-memory TTL/LRU cache and optionally persisted in the ``tweet_cache``
+SQLite table. Identical prompts generated at the same time share a single
+upstream call.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+from utils.cache import TTLCache, SingleFlight
+from utils.db import get_db, transaction
+
+
+def normalize_prompt(prompt):
+    """Lower-case a prompt and collapse its whitespace"""
+    return re.sub(r'\s+', ' ', prompt or '').strip().lower()
+
+
+def make_cache_key(prompt, settings=None):
+    payload = json.dumps({'prompt': normalize_prompt(prompt), 'settings': settings or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TweetCache:
+    """Caches generated tweets and de-duplicates in-flight generation"""
+
+    def __init__(self, max_size=1024, ttl=3600, persist=False):
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.persist = persist
+        self.flights = SingleFlight()
+        self.db_hits = 0
+        self.upstream_calls = 0
+
+    def get_or_generate(self, prompt, settings, generate):
+        """
+        Return the cached tweet for prompt/settings or call generate().
+        A None result from generate() is returned but not cached.
+        """
+        key = make_cache_key(prompt, settings)
+        tweet = self.memory.get(key)
+        if tweet is not None:
+            return tweet
+
+        def load():
+            tweet = self._load_persisted(key)
+            if tweet is not None:
+                self.db_hits += 1
+            else:
+                self.upstream_calls += 1
+                tweet = generate()
+                if tweet is None:
+                    return None
+                self._persist(key, prompt, tweet)
+            self.memory.set(key, tweet)
+            return tweet
+
+        return self.flights.do(key, load)
+
+    def lookup(self, prompt, settings):
+        """Return the cached tweet for prompt/settings, or None"""
+        key = make_cache_key(prompt, settings)
+        tweet = self.memory.get(key)
+        if tweet is None:
+            tweet = self._load_persisted(key)
+            if tweet is not None:
+                self.db_hits += 1
+                self.memory.set(key, tweet)
+        return tweet
+
+    def store(self, prompt, settings, tweet):
+        """Cache a tweet produced outside get_or_generate, e.g. by streaming"""
+        key = make_cache_key(prompt, settings)
+        self.upstream_calls += 1
+        self._persist(key, prompt, tweet)
+        self.memory.set(key, tweet)
+
+    def _load_persisted(self, key):
+        if not self.persist:
+            return None
+        try:
+            cursor = get_db().cursor()
+            cursor.execute('SELECT tweet, created_at FROM tweet_cache WHERE key = ?', (key,))
+            row = cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"[ERROR] Tweet cache lookup failed: {e}")
+            return None
+        if row and (not self.ttl or row[1] > time.time() - self.ttl):
+            return row[0]
+        return None
+
+    def _persist(self, key, prompt, tweet):
+        if not self.persist:
+            return
+        try:
+            with transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO tweet_cache (key, prompt, tweet, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (key, normalize_prompt(prompt), tweet, time.time()))
+        except sqlite3.Error as e:
+            print(f"[ERROR] Tweet cache save failed: {e}")
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats.update({
+            'persistent_hits': self.db_hits,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.flights.coalesced
+        })
+        return stats
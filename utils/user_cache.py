@@ -0,0 +1,57 @@
+"""
+Cache for Flask-Login's user loader.
+
+Every authenticated request and Socket.IO event resolves ``current_user``
+through the user loader, so the user row is kept in a small TTL/LRU cache
+instead of being read from SQLite each time. Code that creates, changes or
+deletes a user must call ``invalidate``; the TTL bounds how stale a row
+changed by another process (e.g. a maintenance script) can be.
+"""
+
+import threading
+
+from utils.cache import TTLCache
+
+
+class UserCache:
+    """Caches user rows by id in front of a loader function"""
+
+    def __init__(self, load, max_size=1024, ttl=60):
+        self.load = load
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        """Return the cached row for user_id, loading it on a miss"""
+        key = str(user_id)
+        row = self.memory.get(key)
+        if row is not None:
+            return row
+
+        generation = self._generation
+        row = self.load(key)
+        if row is not None:
+            with self._lock:
+                # Skip the write if the user was invalidated while loading
+                if generation == self._generation:
+                    self.memory.set(key, row)
+        return row
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self.memory.delete(str(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self.memory.clear()
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats['invalidations'] = self.invalidations
+        return stats
@@ -0,0 +1,66 @@
+"""
+Per-user content counters.
+
+The ``user_stats`` table keeps running totals of each user's content so
+dashboards read them in O(1) instead of scanning generated_content. The
+record_* helpers take the cursor of the transaction that changes the
+content, so counters and content always commit together.
+"""
+
+from utils.db import get_db
+
+REBUILD_SQL = '''
+    INSERT OR REPLACE INTO user_stats (user_id, total, published, images)
+    SELECT user_id, COUNT(*), COALESCE(SUM(is_posted), 0), COUNT(image_url)
+    FROM generated_content
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id
+'''
+
+
+def _adjust(cursor, user_id, total=0, published=0, images=0):
+    cursor.execute('''
+        INSERT INTO user_stats (user_id, total, published, images)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total = total + excluded.total,
+            published = published + excluded.published,
+            images = images + excluded.images
+    ''', (user_id, total, published, images))
+
+
+def record_content_created(cursor, user_id, has_image=False):
+    _adjust(cursor, user_id, total=1, images=1 if has_image else 0)
+
+
+def record_content_published(cursor, user_id):
+    _adjust(cursor, user_id, published=1)
+
+
+def record_image_added(cursor, user_id):
+    _adjust(cursor, user_id, images=1)
+
+
+def record_content_deleted(cursor, user_id, was_posted, had_image):
+    _adjust(cursor, user_id, total=-1, published=-1 if was_posted else 0, images=-1 if had_image else 0)
+
+
+def read_user_stats(user_id):
+    """Return a user's counters as a dict"""
+    cursor = get_db().cursor()
+    cursor.execute('SELECT total, published, images FROM user_stats WHERE user_id = ?', (user_id,))
+    total, published, images = cursor.fetchone() or (0, 0, 0)
+    return {
+        'total': total,
+        'published': published,
+        'drafts': total - published,
+        'images': images
+    }
+
+
+def rebuild_user_stats(conn):
+    """Recompute every user's counters from generated_content"""
+    with conn:
+        conn.execute('DELETE FROM user_stats')
+        conn.execute(REBUILD_SQL)
+    return conn.execute('SELECT COUNT(*) FROM user_stats').fetchone()[0]